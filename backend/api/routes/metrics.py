@@ -0,0 +1,85 @@
+from fastapi import APIRouter
+import logging
+from typing import Optional
+
+from services.http_client import http_client
+from services.analysis_cache import analysis_cache
+from services.analysis_jobs import analysis_jobs
+from services.conversation_store import conversation_store
+from services.patient_import import patient_importer
+from services.profile_cache import profile_cache
+from services.realtime_sessions import realtime_session_pool
+from services.consultation_recorder import consultation_recorder
+from services.speculative_analysis import speculative_analysis
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/http")
+async def get_http_client_stats():
+    """Outbound HTTP pool statistics"""
+    return http_client.stats()
+
+
+@router.get("/analysis-jobs")
+async def get_analysis_job_stats():
+    """Analysis worker pool statistics"""
+    return analysis_jobs.stats()
+
+
+@router.get("/analysis-cache")
+async def get_analysis_cache_stats():
+    """Analysis result cache size and hit/miss counters"""
+    return analysis_cache.stats()
+
+
+@router.get("/profile-cache")
+async def get_profile_cache_stats():
+    """Supabase profile cache hit/miss and update coalescing counters"""
+    return profile_cache.stats()
+
+
+@router.get("/patient-import")
+async def get_patient_import_stats():
+    """Bulk patient import pool size and document counters"""
+    return patient_importer.stats()
+
+
+@router.get("/realtime-sessions")
+async def get_realtime_session_pool_stats():
+    """Pre-minted Realtime session pool hits, misses and expirations"""
+    return realtime_session_pool.stats()
+
+
+@router.get("/recordings")
+async def get_consultation_recorder_stats():
+    """Consultation audio recorder activity and dropped audio"""
+    return consultation_recorder.stats()
+
+
+@router.get("/speculative-analysis")
+async def get_speculative_analysis_stats():
+    """Speculative analysis drafts and run counters"""
+    return speculative_analysis.stats()
+
+
+@router.get("/subscribers")
+async def get_subscriber_stats(session_id: Optional[str] = None):
+    """Per-subscriber transcript fan-out lag counters"""
+    subscribers = conversation_store.subscriber_stats(session_id)
+    return {
+        "subscribers": subscribers,
+        "count": len(subscribers)
+    }
+
+
+@router.get("/conversations")
+async def get_conversation_store_stats():
+    """Conversation store residency, eviction, WAL and store bus counters"""
+    return {
+        **conversation_store.retention_stats(),
+        "wal": conversation_store.wal_stats(),
+        "bus": conversation_store.bus.stats() if conversation_store.bus else None
+    }
@@ -1,26 +1,31 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query
 import logging
 import os
-import aiohttp
 import uuid
 from datetime import datetime
-from typing import Optional
+from functools import partial
+from typing import Any, Dict, Optional
 
+from api.responses import FastJSONResponse
 from api.types.medical_types import (
     UserProfile, 
     CreateUserProfileRequest, 
     UpdateUserProfileRequest,
     MedicalHistory
 )
+from services.http_client import http_client
+from services.profile_cache import profile_cache
+from services.profile_index import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 # Supabase configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+SUPABASE_TIMEOUT = 10.0
+MAX_PAGE_SIZE = 200
 
 if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
     logger.warning("⚠️ Supabase environment variables not configured. Profile features will be limited.")
@@ -61,33 +66,88 @@ async def create_user_profile(request: CreateUserProfileRequest):
         logger.info(f"👤 Creating user profile: {request.name}")
         
         # Upsert into Supabase (update if exists, insert if not)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{SUPABASE_URL}/rest/v1/user_profiles",
-                headers={
-                    **await get_supabase_headers(),
-                    "Prefer": "resolution=merge-duplicates"  # Upsert on conflict
-                },
-                json=profile_data
-            ) as response:
-                if response.status not in [200, 201]:
-                    error_text = await response.text()
-                    logger.error(f"❌ Supabase profile upsert failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        async with http_client.post(
+            f"{SUPABASE_URL}/rest/v1/user_profiles",
+            headers={
+                **await get_supabase_headers(),
+                "Prefer": "resolution=merge-duplicates"  # Upsert on conflict
+            },
+            json=profile_data,
+            timeout=SUPABASE_TIMEOUT
+        ) as response:
+            if response.status not in [200, 201]:
+                error_text = await response.text()
+                logger.error(f"❌ Supabase profile upsert failed: {response.status} - {error_text}")
+                raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
                 
-                logger.info(f"✅ User profile saved successfully: {user_id}")
+            profile_cache.invalidate(user_id)
+            logger.info(f"✅ User profile saved successfully: {user_id}")
                 
-                return JSONResponse({
-                    "user_id": user_id,
-                    "status": "saved",
-                    "message": "Profile saved successfully"
-                })
+            return FastJSONResponse({
+                "user_id": user_id,
+                "status": "saved",
+                "message": "Profile saved successfully"
+            })
                 
     except Exception as e:
         logger.error(f"❌ Profile creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def fetch_profile_row(user_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch one profile row from Supabase, or None if it doesn't exist"""
+    async with http_client.get(
+        f"{SUPABASE_URL}/rest/v1/user_profiles",
+        headers=await get_supabase_headers(),
+        params={"user_id": f"eq.{user_id}"},
+        timeout=SUPABASE_TIMEOUT
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"❌ Supabase profile query failed: {response.status} - {error_text}")
+            raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        profiles = await response.json()
+        return profiles[0] if profiles else None
+
+
+async def fetch_profile_updated_at(user_id: str) -> Optional[str]:
+    """Fetch only a profile's updated_at, to revalidate a cached row cheaply"""
+    async with http_client.get(
+        f"{SUPABASE_URL}/rest/v1/user_profiles",
+        headers=await get_supabase_headers(),
+        params={"user_id": f"eq.{user_id}", "select": "updated_at"},
+        timeout=SUPABASE_TIMEOUT
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"❌ Supabase profile query failed: {response.status} - {error_text}")
+            raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        profiles = await response.json()
+        return profiles[0]["updated_at"] if profiles else None
+
+
+async def patch_profile_row(user_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply a partial update in Supabase and return the updated row"""
+    async with http_client.patch(
+        f"{SUPABASE_URL}/rest/v1/user_profiles",
+        headers={
+            **await get_supabase_headers(),
+            "Prefer": "return=representation"  # Updated row refreshes the cache
+        },
+        params={"user_id": f"eq.{user_id}"},
+        json=update_data,
+        timeout=SUPABASE_TIMEOUT
+    ) as response:
+        if response.status not in [200, 204]:
+            error_text = await response.text()
+            logger.error(f"❌ Supabase profile update failed: {response.status} - {error_text}")
+            raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        if response.status == 204:
+            return None
+        profiles = await response.json()
+        return profiles[0] if profiles else None
+
+
 @router.get("/{user_id}")
 async def get_user_profile(user_id: str):
     """Get user profile by ID"""
@@ -97,39 +157,31 @@ async def get_user_profile(user_id: str):
         
         logger.info(f"🔍 Retrieving user profile: {user_id}")
         
-        # Query Supabase
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{SUPABASE_URL}/rest/v1/user_profiles",
-                headers=await get_supabase_headers(),
-                params={"user_id": f"eq.{user_id}"}
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"❌ Supabase profile query failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
-                
-                profiles = await response.json()
-                
-                if not profiles:
-                    raise HTTPException(status_code=404, detail="User profile not found")
-                
-                profile_data = profiles[0]
-                logger.info(f"✅ User profile retrieved: {user_id}")
-                
-                # Convert to UserProfile model
-                user_profile = UserProfile(
-                    user_id=profile_data["user_id"],
-                    name=profile_data["name"],
-                    age=profile_data.get("age"),
-                    gender=profile_data.get("gender"),
-                    date_of_birth=profile_data.get("date_of_birth"),
-                    medical_history=MedicalHistory(**profile_data["medical_history"]),
-                    created_at=profile_data.get("created_at"),
-                    updated_at=profile_data.get("updated_at")
-                )
-                
-                return user_profile
+        # Served from the read-through cache; concurrent misses share one query
+        profile_data = await profile_cache.get(
+            user_id,
+            partial(fetch_profile_row, user_id),
+            partial(fetch_profile_updated_at, user_id)
+        )
+            
+        if profile_data is None:
+            raise HTTPException(status_code=404, detail="User profile not found")
+            
+        logger.info(f"✅ User profile retrieved: {user_id}")
+            
+        # Convert to UserProfile model
+        user_profile = UserProfile(
+            user_id=profile_data["user_id"],
+            name=profile_data["name"],
+            age=profile_data.get("age"),
+            gender=profile_data.get("gender"),
+            date_of_birth=profile_data.get("date_of_birth"),
+            medical_history=MedicalHistory(**profile_data["medical_history"]),
+            created_at=profile_data.get("created_at"),
+            updated_at=profile_data.get("updated_at")
+        )
+            
+        return user_profile
                 
     except HTTPException:
         raise
@@ -161,26 +213,16 @@ async def update_user_profile(user_id: str, request: UpdateUserProfileRequest):
         if request.medical_history is not None:
             update_data["medical_history"] = request.medical_history.model_dump()
         
-        # Update in Supabase
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f"{SUPABASE_URL}/rest/v1/user_profiles",
-                headers=await get_supabase_headers(),
-                params={"user_id": f"eq.{user_id}"},
-                json=update_data
-            ) as response:
-                if response.status != 204:  # Supabase PATCH returns 204 No Content
-                    error_text = await response.text()
-                    logger.error(f"❌ Supabase profile update failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
-                
-                logger.info(f"✅ User profile updated: {user_id}")
-                
-                return JSONResponse({
-                    "user_id": user_id,
-                    "status": "updated",
-                    "message": "Profile updated successfully"
-                })
+        # Bursts of updates to the same user are merged into one PATCH
+        await profile_cache.update(user_id, update_data, partial(patch_profile_row, user_id))
+            
+        logger.info(f"✅ User profile updated: {user_id}")
+            
+        return FastJSONResponse({
+            "user_id": user_id,
+            "status": "updated",
+            "message": "Profile updated successfully"
+        })
                 
     except HTTPException:
         raise
@@ -199,24 +241,25 @@ async def delete_user_profile(user_id: str):
         logger.info(f"🗑️ Deleting user profile: {user_id}")
         
         # Delete from Supabase
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                f"{SUPABASE_URL}/rest/v1/user_profiles",
-                headers=await get_supabase_headers(),
-                params={"user_id": f"eq.{user_id}"}
-            ) as response:
-                if response.status != 204:  # Supabase DELETE returns 204 No Content
-                    error_text = await response.text()
-                    logger.error(f"❌ Supabase profile deletion failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        async with http_client.delete(
+            f"{SUPABASE_URL}/rest/v1/user_profiles",
+            headers=await get_supabase_headers(),
+            params={"user_id": f"eq.{user_id}"},
+            timeout=SUPABASE_TIMEOUT
+        ) as response:
+            if response.status != 204:  # Supabase DELETE returns 204 No Content
+                error_text = await response.text()
+                logger.error(f"❌ Supabase profile deletion failed: {response.status} - {error_text}")
+                raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
                 
-                logger.info(f"✅ User profile deleted: {user_id}")
+            profile_cache.invalidate(user_id)
+            logger.info(f"✅ User profile deleted: {user_id}")
                 
-                return JSONResponse({
-                    "user_id": user_id,
-                    "status": "deleted",
-                    "message": "Profile deleted successfully"
-                })
+            return FastJSONResponse({
+                "user_id": user_id,
+                "status": "deleted",
+                "message": "Profile deleted successfully"
+            })
                 
     except HTTPException:
         raise
@@ -226,36 +269,73 @@ async def delete_user_profile(user_id: str):
 
 
 @router.get("/")
-async def list_user_profiles():
-    """List all user profiles (for demo purposes)"""
+async def list_user_profiles(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    gender: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0)
+):
+    """List user profiles newest first, one page at a time (keyset pagination)"""
     try:
         if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
             raise HTTPException(status_code=500, detail="Supabase not configured")
         
-        logger.info("📋 Listing all user profiles")
+        logger.info("📋 Listing user profiles")
         
-        # Query all profiles from Supabase
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{SUPABASE_URL}/rest/v1/user_profiles",
-                headers=await get_supabase_headers(),
-                params={"select": "user_id,name,age,gender,created_at", "order": "created_at.desc"}
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"❌ Supabase profiles list failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
+        # Keyset pagination on (created_at, user_id): the database seeks
+        # straight to the cursor instead of scanning the whole table
+        params = [
+            ("select", "user_id,name,age,gender,created_at"),
+            ("order", "created_at.desc,user_id.desc"),
+            ("limit", str(limit + 1)),
+        ]
+        if cursor:
+            try:
+                created_at, user_id = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            params.append((
+                "or",
+                f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",user_id.lt."{user_id}"))'
+            ))
+        if name:
+            params.append(("name", f"ilike.{name.replace('*', '')}*"))
+        if gender:
+            params.append(("gender", f"ilike.{gender}"))
+        if min_age is not None:
+            params.append(("age", f"gte.{min_age}"))
+        if max_age is not None:
+            params.append(("age", f"lte.{max_age}"))
+        
+        async with http_client.get(
+            f"{SUPABASE_URL}/rest/v1/user_profiles",
+            headers=await get_supabase_headers(),
+            params=params,
+            timeout=SUPABASE_TIMEOUT
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"❌ Supabase profiles list failed: {response.status} - {error_text}")
+                raise HTTPException(status_code=response.status, detail=f"Database error: {error_text}")
                 
-                profiles = await response.json()
-                logger.info(f"✅ Retrieved {len(profiles)} user profiles")
+            profiles = await response.json()
+            next_cursor = None
+            if len(profiles) > limit:
+                profiles = profiles[:limit]
+                last = profiles[-1]
+                next_cursor = encode_cursor((last["created_at"], last["user_id"]))
+            logger.info(f"✅ Retrieved {len(profiles)} user profiles")
                 
-                return JSONResponse({
-                    "profiles": profiles,
-                    "count": len(profiles)
-                })
+            return FastJSONResponse({
+                "profiles": profiles,
+                "count": len(profiles),
+                "next_cursor": next_cursor
+            })
                 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ Profiles listing error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,22 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+import heapq
+import json
 import logging
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from api.responses import FastJSONResponse
 from api.types.medical_types import (
     UserProfile, 
     CreateUserProfileRequest, 
-    UpdateUserProfileRequest,
-    MedicalHistory
+    UpdateUserProfileRequest
 )
+from services.medical_analysis import on_profile_change
+from services.medical_history_index import MedicalHistoryIndex, QueryError
+from services.patient_import import patient_importer
+from services.profile_index import ProfileIndex, decode_cursor, encode_cursor
+from services.profile_view_cache import ProfileViewCache
+from services.store_bus import ReplicatedDict
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
-# In-memory storage for demo purposes
-profiles_store: Dict[str, dict] = {}
+# In-memory storage for demo purposes, replicated across workers via the store bus
+profiles_store: Dict[str, dict] = ReplicatedDict("profiles")
+profile_index = ProfileIndex()
+profiles_store.watch(profile_index.on_change)
+history_index = MedicalHistoryIndex()
+profiles_store.watch(history_index.on_change)
+profile_views = ProfileViewCache()
+profiles_store.watch(profile_views.on_change)
+# Rendered prompt contexts are keyed on version, which restarts after a delete
+profiles_store.watch(on_profile_change)
+
+MAX_PAGE_SIZE = 200
 
 
 @router.post("/create")
@@ -25,7 +43,10 @@ async def create_user_profile(request: CreateUserProfileRequest):
     try:
         # Use a hardcoded default user ID for demo
         user_id = "demo-user-12345"
-        now = datetime.now().isoformat()
+        created = datetime.now()
+        now = created.isoformat()
+        # Re-creating a profile must also invalidate cached renderings of the old one
+        version = profiles_store.get(user_id, {}).get("version", 0) + 1
         
         # Prepare profile data
         profile_data = {
@@ -36,17 +57,29 @@ async def create_user_profile(request: CreateUserProfileRequest):
             "date_of_birth": request.date_of_birth,
             "medical_history": request.medical_history.model_dump(),
             "created_at": now,
-            "updated_at": now
+            "updated_at": now,
+            "version": version
         }
         
         logger.info(f"👤 Creating user profile: {request.name}")
         
         # Store in memory
         profiles_store[user_id] = profile_data
+        # The request is already validated, so the read model needs no second pass
+        profile_views.put(user_id, version, UserProfile.model_construct(
+            user_id=user_id,
+            name=request.name,
+            age=request.age,
+            gender=request.gender,
+            date_of_birth=request.date_of_birth,
+            medical_history=request.medical_history,
+            created_at=created,
+            updated_at=created
+        ))
         
         logger.info(f"✅ User profile saved successfully: {user_id}")
         
-        return JSONResponse({
+        return FastJSONResponse({
             "user_id": user_id,
             "status": "saved",
             "message": "Profile saved successfully"
@@ -57,6 +90,116 @@ async def create_user_profile(request: CreateUserProfileRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def imported_document(event: Any) -> Tuple[str, str]:
+    if not isinstance(event, dict) or not isinstance(event.get("content"), str):
+        raise ValueError("Each document needs a 'content' string")
+    return str(event.get("filename") or "document"), event["content"]
+
+
+async def uploaded_documents(request: Request) -> AsyncIterator[Tuple[str, str]]:
+    """Yield (filename, content) pairs from an NDJSON stream or a JSON array body"""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        # Hand documents on as their lines arrive rather than buffering the upload
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield imported_document(json.loads(line))
+        if pending.strip():
+            yield imported_document(json.loads(pending))
+        return
+    events = json.loads(await request.body())
+    for event in events if isinstance(events, list) else [events]:
+        yield imported_document(event)
+
+
+async def insert_imported_profiles(records: List[Dict[str, Any]]) -> int:
+    """Upsert a batch of parsed profiles, keeping created_at for patients already on file"""
+    now = datetime.now().isoformat()
+    for record in records:
+        user_id = record["user_id"]
+        existing = profiles_store.get(user_id, {})
+        profiles_store[user_id] = {
+            "user_id": user_id,
+            "name": record["name"],
+            "age": record.get("age"),
+            "gender": record.get("gender"),
+            "date_of_birth": record.get("date_of_birth"),
+            "medical_history": record["medical_history"],
+            "created_at": existing.get("created_at", now),
+            "updated_at": now,
+            "version": existing.get("version", 0) + 1
+        }
+    return len(records)
+
+
+@router.post("/import")
+async def import_user_profiles(request: Request):
+    """Bulk import chart exports sent as NDJSON or a JSON array of {filename, content} (in-memory)"""
+    try:
+        logger.info("📦 Importing patient documents")
+        
+        try:
+            report = await patient_importer.import_documents(uploaded_documents(request), insert_imported_profiles)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid import body: {e}")
+        
+        logger.info(
+            f"✅ Imported {report['imported']} of {report['received']} documents "
+            f"({report['documents_per_second']} docs/s, {report['failed']} failed)"
+        )
+        
+        return FastJSONResponse(report)
+                
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Profile import error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cohort")
+async def query_cohort(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Find profiles by medical history, e.g. 'metformin AND family:"heart disease"' (in-memory)"""
+    try:
+        logger.info(f"🔎 Cohort query: {q}")
+        
+        started = time.perf_counter()
+        try:
+            user_ids = history_index.search(q)
+        except QueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        # Newest first; only the returned page is ever sorted
+        summaries = heapq.nlargest(
+            limit,
+            (profile_index.summaries[user_id] for user_id in user_ids),
+            key=lambda summary: (summary["created_at"] or "", summary["user_id"])
+        )
+        
+        logger.info(f"✅ Cohort query matched {len(user_ids)} profiles in {took_ms:.3f}ms")
+        
+        return FastJSONResponse({
+            "query": q,
+            "profiles": summaries,
+            "count": len(user_ids),
+            "took_ms": round(took_ms, 3)
+        })
+                
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Cohort query error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{user_id}")
 async def get_user_profile(user_id: str):
     """Get user profile by ID (in-memory)"""
@@ -66,22 +209,11 @@ async def get_user_profile(user_id: str):
         if user_id not in profiles_store:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        profile_data = profiles_store[user_id]
+        # Validated and encoded once per profile version
+        _, body = profile_views.get(user_id, profiles_store[user_id])
         logger.info(f"✅ User profile retrieved: {user_id}")
         
-        # Convert to UserProfile model
-        user_profile = UserProfile(
-            user_id=profile_data["user_id"],
-            name=profile_data["name"],
-            age=profile_data.get("age"),
-            gender=profile_data.get("gender"),
-            date_of_birth=profile_data.get("date_of_birth"),
-            medical_history=MedicalHistory(**profile_data["medical_history"]),
-            created_at=profile_data.get("created_at"),
-            updated_at=profile_data.get("updated_at")
-        )
-        
-        return user_profile
+        return Response(content=body, media_type="application/json")
                 
     except HTTPException:
         raise
@@ -101,6 +233,7 @@ async def update_user_profile(user_id: str, request: UpdateUserProfileRequest):
         
         profile_data = profiles_store[user_id].copy()
         profile_data["updated_at"] = datetime.now().isoformat()
+        profile_data["version"] = profile_data.get("version", 0) + 1
         
         # Update fields if provided
         if request.name is not None:
@@ -118,7 +251,7 @@ async def update_user_profile(user_id: str, request: UpdateUserProfileRequest):
         
         logger.info(f"✅ User profile updated: {user_id}")
         
-        return JSONResponse({
+        return FastJSONResponse({
             "user_id": user_id,
             "status": "updated",
             "message": "Profile updated successfully"
@@ -144,7 +277,7 @@ async def delete_user_profile(user_id: str):
         
         logger.info(f"✅ User profile deleted: {user_id}")
         
-        return JSONResponse({
+        return FastJSONResponse({
             "user_id": user_id,
             "status": "deleted",
             "message": "Profile deleted successfully"
@@ -158,28 +291,42 @@ async def delete_user_profile(user_id: str):
 
 
 @router.get("/")
-async def list_user_profiles():
-    """List all user profiles (in-memory)"""
+async def list_user_profiles(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    gender: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0)
+):
+    """List user profiles newest first, one page at a time (in-memory)"""
     try:
-        logger.info("📋 Listing all user profiles")
-        
-        profiles = []
-        for user_id, profile_data in profiles_store.items():
-            profiles.append({
-                "user_id": profile_data["user_id"],
-                "name": profile_data["name"],
-                "age": profile_data.get("age"),
-                "gender": profile_data.get("gender"),
-                "created_at": profile_data.get("created_at")
-            })
+        logger.info("📋 Listing user profiles")
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        profiles, next_key = profile_index.page(
+            limit,
+            cursor=after,
+            name_prefix=name,
+            gender=gender,
+            min_age=min_age,
+            max_age=max_age
+        )
         
         logger.info(f"✅ Retrieved {len(profiles)} user profiles")
         
-        return JSONResponse({
+        return FastJSONResponse({
             "profiles": profiles,
-            "count": len(profiles)
+            "count": len(profiles),
+            "next_cursor": encode_cursor(next_key) if next_key else None
         })
                 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Profiles listing error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,11 +3,13 @@ from fastapi.responses import JSONResponse
 import logging
 import asyncio
 import sys
+from typing import Optional
 import os
 
 # Add parent directory to path to import services
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.conversation_store import conversation_store
+from services.transcript_fanout import POLICIES, ResyncEvent, SlowConsumerError
 
 logger = logging.getLogger(__name__)
 
@@ -15,47 +17,98 @@ router = APIRouter()
 
 
 @router.websocket("/ws/{session_id}")
-async def websocket_transcript_stream(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for streaming transcripts to frontend"""
+async def websocket_transcript_stream(
+    websocket: WebSocket,
+    session_id: str,
+    policy: Optional[str] = None,
+    since: int = 0
+):
+    """WebSocket endpoint for streaming transcripts to frontend.
+
+    Reconnecting clients pass ``since`` (the last seq they received) to get
+    only the transcripts they missed.
+    """
+    if policy is not None and policy not in POLICIES:
+        await websocket.close(code=1008, reason=f"Unknown policy: {policy}")
+        return
+    
     await websocket.accept()
     
-    # Subscribe to transcript updates
-    queue = conversation_store.subscribe(session_id)
+    # Subscribe before reading the backlog so nothing lands in between; the
+    # cursor drops anything that shows up in both
+    subscriber = conversation_store.subscribe(session_id, policy=policy)
+    cursor = since
+    
+    async def send_since_cursor() -> None:
+        nonlocal cursor
+        for transcript in conversation_store.transcripts_since(session_id, cursor):
+            await websocket.send_json({
+                "type": "transcript",
+                "data": transcript.to_dict()
+            })
+            cursor = transcript.seq
     
     try:
-        logger.info(f"WebSocket connected for transcript streaming: {session_id}")
+        logger.info(f"WebSocket connected for transcript streaming: {session_id} (policy: {subscriber.policy}, since: {since})")
         
-        # Send existing transcripts if any
-        conversation = conversation_store.get_conversation(session_id)
-        if conversation and conversation.get("transcripts"):
-            for transcript in conversation["transcripts"]:
-                await websocket.send_json({
-                    "type": "transcript",
-                    "data": transcript
-                })
+        # Send the transcripts the client hasn't seen yet
+        await send_since_cursor()
         
         # Stream new transcripts as they arrive
         while True:
             try:
                 # Wait for new transcript with timeout
-                transcript = await asyncio.wait_for(queue.get(), timeout=30.0)
+                event = await asyncio.wait_for(subscriber.get(), timeout=30.0)
+                
+                if isinstance(event, ResyncEvent):
+                    # Fell behind and the backlog was coalesced: catch up from the store
+                    logger.info(f"🔁 Resyncing subscriber {subscriber.id} from seq {cursor} ({event.missed} missed)")
+                    await send_since_cursor()
+                    continue
+                
+                if isinstance(event, list):
+                    # One ingestion batch: forward it as a single frame
+                    batch = [transcript for transcript in event if transcript.seq > cursor]
+                    if batch and batch[0].seq > cursor + 1:
+                        # drop_oldest lost the events in between; the store has them all
+                        await send_since_cursor()
+                    elif batch:
+                        await websocket.send_json({
+                            "type": "transcripts",
+                            "data": [transcript.to_dict() for transcript in batch]
+                        })
+                        cursor = batch[-1].seq
+                    continue
+                
+                if event.seq <= cursor:
+                    # Already sent while replaying the backlog
+                    continue
+                
+                if event.seq > cursor + 1:
+                    # drop_oldest lost the events in between; the store has them all
+                    await send_since_cursor()
+                    continue
                 
                 await websocket.send_json({
                     "type": "transcript",
-                    "data": transcript
+                    "data": event.to_dict()
                 })
+                cursor = event.seq
                 
             except asyncio.TimeoutError:
                 # Send ping to keep connection alive
                 await websocket.send_json({"type": "ping"})
                 
+    except SlowConsumerError:
+        logger.warning(f"⚠️ Closing slow WebSocket consumer for session: {session_id}")
+        await websocket.close(code=1013, reason="Consumer too slow")
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session: {session_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
         # Unsubscribe from updates
-        conversation_store.unsubscribe(session_id, queue)
+        conversation_store.unsubscribe(session_id, subscriber)
 
 
 
@@ -1,105 +1,156 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import logging
 import sys
 import os
 import aiohttp
-import openai
-from datetime import datetime
+import asyncio
 import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 # Add parent directory to path to import services
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.conversation_store import conversation_store
-from api.types.medical_types import FinishConversationResponse, FinishConversationRequest
-from config.prompts import MEDICAL_ANALYSIS_PROMPT, MEDICAL_ANALYSIS_SYSTEM_PROMPT
+from services.http_client import http_client
+from services.store_bus import ReplicatedDict
+from services.analysis_cache import analysis_cache
+from services.analysis_jobs import analysis_jobs, JOB_DONE, JOB_FAILED
+from services.medical_analysis import (
+    analyze_session,
+    build_report,
+    report_timestamps,
+    session_cache_key,
+    stream_session_analysis,
+)
+from services.speculative_analysis import speculative_analysis
+from services.consultation_recorder import consultation_recorder
+from services.realtime_sessions import (
+    OPENAI_API_BASE,
+    REALTIME_MODEL,
+    RealtimeSessionError,
+    realtime_session_pool,
+)
+from api.responses import FastJSONResponse
+from api.types.medical_types import AnalysisJobResponse, FinishConversationRequest
+from api.routes.profile_memory import profiles_store
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
+
+OPENAI_WEBRTC_TIMEOUT = 20.0
+
+# Data channel events that carry a finished transcript, by speaker role
+TRANSCRIPT_EVENT_ROLES = {
+    "conversation.item.input_audio_transcription.completed": "user",
+    "response.audio_transcript.done": "assistant",
+}
+
+# Store session information, replicated across workers via the store bus;
+# values are replaced rather than mutated so updates replicate
+sessions = ReplicatedDict("sessions")
 
-# Store session information
-sessions = {}
+# Last batch saved per session from a client ingest channel, {"channel", "batch"}
+ingest_cursors = ReplicatedDict("ingest_cursors")
 
 class SessionRequest(BaseModel):
     session_id: str = "default"
+    user_id: Optional[str] = None
 
 class SDPOffer(BaseModel):
     sdp: str
     session_id: str = "default"
 
+class ConnectRequest(BaseModel):
+    sdp: str
+    session_id: str = "default"
+    user_id: Optional[str] = None
+
+async def acquire_openai_session(session_id: str) -> dict:
+    """Pre-minted when the session pool is enabled, otherwise minted now"""
+    logger.info(f"🔑 Creating ephemeral session for: {session_id}")
+    try:
+        session_data, pooled = await realtime_session_pool.acquire()
+    except RealtimeSessionError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    logger.info(
+        f"✅ OpenAI ephemeral session {'taken from pool' if pooled else 'created'}: {session_data.get('id', 'unknown')}"
+    )
+    return session_data
+
+def register_session(session_id: str, user_id: Optional[str], session_data: dict, conversation_started: bool = False):
+    """Track a new consultation and start its transcript"""
+    sessions[session_id] = {
+        "openai_session": session_data,
+        "created_at": datetime.now().isoformat(),
+        "conversation_started": conversation_started
+    }
+    conversation_store.create_session(session_id)
+
+    # Start drafting the report while the conversation runs (opt-in)
+    if speculative_analysis.enabled:
+        speculative_analysis.track(session_id, profiles_store.get(user_id) if user_id else None)
+
+async def forward_sdp_offer(ephemeral_key: str, sdp: str) -> str:
+    """POST the browser's SDP offer to OpenAI and return the validated SDP answer"""
+    logger.info(f"📡 Forwarding SDP offer to OpenAI...")
+    logger.debug(f"📋 SDP Offer preview: {sdp[:200]}...")
+
+    openai_webrtc_url = f"{OPENAI_API_BASE}/realtime?model={REALTIME_MODEL}"
+    logger.info(f"🔗 OpenAI WebRTC URL: {openai_webrtc_url}")
+    logger.info(f"🔑 Using ephemeral key: {ephemeral_key[:20]}...{ephemeral_key[-10:]}")
+
+    async with http_client.post(
+        openai_webrtc_url,
+        headers={
+            "Authorization": f"Bearer {ephemeral_key}",
+            "Content-Type": "application/sdp"
+        },
+        data=sdp,
+        timeout=OPENAI_WEBRTC_TIMEOUT
+    ) as response:
+        # OpenAI returns 201 for successful WebRTC connection creation
+        if response.status not in [200, 201]:
+            error_text = await response.text()
+            logger.error(f"❌ OpenAI WebRTC offer failed: {response.status} - {error_text}")
+            raise HTTPException(status_code=response.status, detail=f"OpenAI WebRTC error: {error_text}")
+
+        answer_sdp = await response.text()
+        logger.info(f"✅ Received SDP answer from OpenAI (status: {response.status}, length: {len(answer_sdp)} chars)")
+        logger.debug(f"📋 SDP Answer preview: {answer_sdp[:200]}...")
+
+    # Validate SDP response
+    if not answer_sdp.strip():
+        logger.error("❌ Empty SDP response from OpenAI")
+        raise HTTPException(status_code=500, detail="Empty SDP response from OpenAI")
+
+    if not answer_sdp.startswith("v=0"):
+        logger.error(f"❌ Invalid SDP response format: {answer_sdp[:50]}...")
+        raise HTTPException(status_code=500, detail="Invalid SDP response format")
+
+    return answer_sdp
+
 @router.post("/session")
 async def create_session(request: SessionRequest):
     """Create an ephemeral key session for OpenAI Realtime API"""
     try:
         session_id = request.session_id if request else "default"
-        logger.info(f"🔑 Creating ephemeral session for: {session_id}")
-        
-        # Get OpenAI API key from environment
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
-        # Create ephemeral key request
-        ephemeral_request = {
-            "model": "gpt-4o-realtime-preview",
-            "modalities": ["text", "audio"],
-            "instructions": "You are Dr. AI, a witty and knowledgeable medical expert with a great sense of humor. You have years of experience in general practice and love making patients feel comfortable with your friendly banter and medical dad jokes. Always respond in English only, regardless of what language the patient speaks to you. Keep your responses conversational, warm, and reassuring while maintaining medical professionalism. Feel free to use light humor to put patients at ease, but always take their concerns seriously. Ask relevant follow-up questions about symptoms, medical history, and current concerns. Always respond with audio.",
-            "voice": "alloy",
-            "input_audio_format": "pcm16",
-            "output_audio_format": "pcm16",
-            "input_audio_transcription": {
-                "model": "whisper-1",
-                "language": "en"
-            },
-            "turn_detection": {
-                "type": "server_vad",
-                "threshold": 0.5,
-                "prefix_padding_ms": 300,
-                "silence_duration_ms": 500
+        session_data = await acquire_openai_session(session_id)
+        register_session(session_id, request.user_id, session_data)
+            
+        return FastJSONResponse({
+            "client_secret": {
+                "value": session_data["client_secret"]["value"]
             },
-            "temperature": 0.8,
-            "max_response_output_tokens": 4096
-        }
-        
-        # Call OpenAI to create ephemeral session
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.openai.com/v1/realtime/sessions",
-                headers={
-                    "Authorization": f"Bearer {openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=ephemeral_request
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"❌ OpenAI session creation failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"OpenAI API error: {error_text}")
-                
-                session_data = await response.json()
-                logger.info(f"✅ OpenAI ephemeral session created: {session_data.get('id', 'unknown')}")
-                
-                # Store session info
-                sessions[session_id] = {
-                    "openai_session": session_data,
-                    "created_at": datetime.now(),
-                    "conversation_started": False
-                }
-                
-                # Initialize conversation store
-                conversation_store.create_session(session_id)
-                
-                return JSONResponse({
-                    "client_secret": {
-                        "value": session_data["client_secret"]["value"]
-                    },
-                    "session_id": session_id,
-                    "openai_session_id": session_data.get("id"),
-                    "status": "created"
-                })
-                
+            "session_id": session_id,
+            "openai_session_id": session_data.get("id"),
+            "status": "created"
+        })
+            
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Session creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,53 +165,19 @@ async def handle_webrtc_offer(offer: SDPOffer):
         if session_id not in sessions:
             raise HTTPException(status_code=404, detail="Session not found. Create session first.")
         
-        session_info = sessions[session_id]
-        ephemeral_key = session_info["openai_session"]["client_secret"]["value"]
-        
-        logger.info(f"📡 Forwarding SDP offer to OpenAI...")
-        logger.debug(f"📋 SDP Offer preview: {offer.sdp[:200]}...")
-        
-        # Forward SDP offer to OpenAI Realtime API
-        openai_webrtc_url = "https://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview"
-        logger.info(f"🔗 OpenAI WebRTC URL: {openai_webrtc_url}")
-        logger.info(f"🔑 Using ephemeral key: {ephemeral_key[:20]}...{ephemeral_key[-10:]}")
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                openai_webrtc_url,
-                headers={
-                    "Authorization": f"Bearer {ephemeral_key}",
-                    "Content-Type": "application/sdp"
-                },
-                data=offer.sdp
-            ) as response:
-                # OpenAI returns 201 for successful WebRTC connection creation
-                if response.status not in [200, 201]:
-                    error_text = await response.text()
-                    logger.error(f"❌ OpenAI WebRTC offer failed: {response.status} - {error_text}")
-                    raise HTTPException(status_code=response.status, detail=f"OpenAI WebRTC error: {error_text}")
-                
-                answer_sdp = await response.text()
-                logger.info(f"✅ Received SDP answer from OpenAI (status: {response.status}, length: {len(answer_sdp)} chars)")
-                logger.debug(f"📋 SDP Answer preview: {answer_sdp[:200]}...")
-                
-                # Validate SDP response
-                if not answer_sdp.strip():
-                    logger.error("❌ Empty SDP response from OpenAI")
-                    raise HTTPException(status_code=500, detail="Empty SDP response from OpenAI")
-                
-                if not answer_sdp.startswith("v=0"):
-                    logger.error(f"❌ Invalid SDP response format: {answer_sdp[:50]}...")
-                    raise HTTPException(status_code=500, detail="Invalid SDP response format")
+        ephemeral_key = sessions[session_id]["openai_session"]["client_secret"]["value"]
+        answer_sdp = await forward_sdp_offer(ephemeral_key, offer.sdp)
                 
-                # Mark conversation as started
-                sessions[session_id]["conversation_started"] = True
+        # Mark conversation as started
+        sessions[session_id] = {**sessions[session_id], "conversation_started": True}
                 
-                return PlainTextResponse(
-                    content=answer_sdp,
-                    media_type="application/sdp"
-                )
+        return PlainTextResponse(
+            content=answer_sdp,
+            media_type="application/sdp"
+        )
                 
+    except HTTPException:
+        raise
     except aiohttp.ClientError as e:
         logger.error(f"❌ HTTP Client error: {e}")
         raise HTTPException(status_code=500, detail=f"Connection error to OpenAI: {str(e)}")
@@ -170,6 +187,39 @@ async def handle_webrtc_offer(offer: SDPOffer):
         logger.error(f"❌ Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/connect")
+async def connect_session(request: ConnectRequest):
+    """Create the session and exchange SDP in one call: the browser sends its offer, gets the answer back.
+
+    Saves the client a round trip over /session then /webrtc; the ephemeral
+    key never leaves the backend.
+    """
+    try:
+        session_id = request.session_id
+        logger.info(f"🔗 Connecting session: {session_id}")
+
+        session_data = await acquire_openai_session(session_id)
+        answer_sdp = await forward_sdp_offer(session_data["client_secret"]["value"], request.sdp)
+        register_session(session_id, request.user_id, session_data, conversation_started=True)
+
+        return FastJSONResponse({
+            "sdp": answer_sdp,
+            "session_id": session_id,
+            "openai_session_id": session_data.get("id"),
+            "expires_at": session_data["client_secret"].get("expires_at"),
+            "model": REALTIME_MODEL,
+            "status": "connected"
+        })
+
+    except HTTPException:
+        raise
+    except aiohttp.ClientError as e:
+        logger.error(f"❌ HTTP Client error: {e}")
+        raise HTTPException(status_code=500, detail=f"Connection error to OpenAI: {str(e)}")
+    except Exception as e:
+        logger.error(f"❌ Connect error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/transcript")
 async def save_transcript(data: dict):
     """Save transcript from frontend WebRTC data channel events"""
@@ -179,19 +229,11 @@ async def save_transcript(data: dict):
         
         logger.debug(f"📝 Received transcript event: {event_type} for session: {session_id}")
         
-        if event_type == "conversation.item.input_audio_transcription.completed":
-            # User transcript
-            transcript = data.get("transcript", "")
-            if transcript:
-                await conversation_store.add_transcript(session_id, "user", transcript)
-                logger.info(f"✅ User transcript saved: {transcript}")
-        
-        elif event_type == "response.audio_transcript.done":
-            # Assistant transcript
-            transcript = data.get("transcript", "")
-            if transcript:
-                await conversation_store.add_transcript(session_id, "assistant", transcript)
-                logger.info(f"✅ Assistant transcript saved: {transcript}")
+        role = TRANSCRIPT_EVENT_ROLES.get(event_type)
+        transcript = data.get("transcript", "")
+        if role is not None and transcript:
+            await conversation_store.add_transcript(session_id, role, transcript)
+            logger.info(f"✅ {role.capitalize()} transcript saved: {transcript}")
         
         return {"status": "success"}
         
@@ -199,6 +241,114 @@ async def save_transcript(data: dict):
         logger.error(f"❌ Transcript save error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def group_transcript_events(events: List[Any], default_session_id: str = "default") -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """Turn data channel events into per-session (role, content) batches.
+
+    Consecutive events for the same session form one batch, so order is kept
+    within and across sessions. Non-transcript events are skipped.
+    """
+    batches: List[Tuple[str, List[Tuple[str, str]]]] = []
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        role = TRANSCRIPT_EVENT_ROLES.get(event.get("type"))
+        transcript = event.get("transcript", "")
+        if role is None or not transcript:
+            continue
+        session_id = event.get("session_id", default_session_id)
+        if batches and batches[-1][0] == session_id:
+            batches[-1][1].append((role, transcript))
+        else:
+            batches.append((session_id, [(role, transcript)]))
+    return batches
+
+
+def parse_event_body(body: bytes, content_type: str) -> List[Any]:
+    """Parse an NDJSON body, a JSON array of events or a single JSON event"""
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    events = json.loads(body)
+    return events if isinstance(events, list) else [events]
+
+
+def is_batch_frame(message: Any) -> bool:
+    """A client batch: {"channel", "batch", "events"}, numbered so resends can be recognized"""
+    return isinstance(message, dict) and isinstance(message.get("events"), list)
+
+
+async def save_batch_frame(session_id: str, frame: Dict[str, Any]) -> Dict[str, Any]:
+    """Save a client batch once and ack it; a resend whose first ack was lost is acked without saving"""
+    channel, batch, events = frame.get("channel"), frame.get("batch"), frame["events"]
+    numbered = isinstance(channel, str) and isinstance(batch, int)
+    ack = {"type": "ack", "batch": batch, "received": len(events), "saved": 0}
+    cursor = ingest_cursors.get(session_id)
+    if numbered and cursor is not None and cursor["channel"] == channel and batch <= cursor["batch"]:
+        return {**ack, "duplicate": True}
+    
+    entries = [
+        entry
+        for _, batch_entries in group_transcript_events(events, session_id)
+        for entry in batch_entries
+    ]
+    # The batch belongs to one session, whatever the events say
+    ack["saved"] = await conversation_store.add_transcripts(session_id, entries)
+    if numbered:
+        ingest_cursors[session_id] = {"channel": channel, "batch": batch}
+    return ack
+
+
+@router.post("/transcripts")
+async def save_transcripts(request: Request):
+    """Save a batch of data channel events sent as NDJSON, a JSON array or a client batch frame"""
+    try:
+        events = parse_event_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid event batch: {e}")
+    
+    try:
+        if len(events) == 1 and is_batch_frame(events[0]):
+            # Sent by the ingest client while its WebSocket is down
+            frame = events[0]
+            return await save_batch_frame(frame.get("session_id", "default"), frame)
+        
+        saved = 0
+        for session_id, entries in group_transcript_events(events):
+            saved += await conversation_store.add_transcripts(session_id, entries)
+        logger.info(f"✅ Transcript batch saved: {saved} of {len(events)} events")
+        return {"status": "success", "received": len(events), "saved": saved}
+        
+    except Exception as e:
+        logger.error(f"❌ Transcript batch save error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.websocket("/ingest/{session_id}")
+async def ingest_transcripts(websocket: WebSocket, session_id: str):
+    """Persistent ingestion channel for a session's data channel events.
+
+    Each message is a client batch frame, one event or a JSON array of events
+    and is saved as one batch; the server acks every message with the number
+    of transcripts saved (and the frame's batch number).
+    """
+    await websocket.accept()
+    logger.info(f"📥 Transcript ingestion channel opened for session: {session_id}")
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                events = parse_event_body(message.encode("utf-8"), "application/json")
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": f"Invalid event batch: {e}"})
+                continue
+            
+            frame = events[0] if len(events) == 1 and is_batch_frame(events[0]) else {"events": events}
+            await websocket.send_json(await save_batch_frame(session_id, frame))
+            
+    except WebSocketDisconnect:
+        logger.info(f"📥 Transcript ingestion channel closed for session: {session_id}")
+    except Exception as e:
+        logger.error(f"❌ Transcript ingestion error: {e}")
+        await websocket.close(code=1011)
+
 @router.get("/status/{session_id}")
 async def get_session_status(session_id: str = "default"):
     """Get session status"""
@@ -211,7 +361,7 @@ async def get_session_status(session_id: str = "default"):
         "session_id": session_id,
         "openai_session_id": session_info["openai_session"].get("id"),
         "conversation_started": session_info.get("conversation_started", False),
-        "created_at": session_info["created_at"].isoformat()
+        "created_at": session_info["created_at"]
     }
 
 @router.delete("/disconnect/{session_id}")
@@ -227,6 +377,15 @@ async def disconnect_session(session_id: str = "default"):
     conversation_store.end_session(session_id)
     cleanup_tasks.append("conversation")
     
+    if speculative_analysis.is_tracking(session_id):
+        await speculative_analysis.discard(session_id)
+        cleanup_tasks.append("speculative_analysis")
+    
+    # Kept for the report if the conversation is finished afterwards
+    if session_id in consultation_recorder.recordings:
+        consultation_recorder.stop(session_id)
+        cleanup_tasks.append("recording")
+    
     logger.info(f"🔒 Session disconnected: {session_id}, cleaned up: {cleanup_tasks}")
     
     return {
@@ -234,224 +393,244 @@ async def disconnect_session(session_id: str = "default"):
         "cleaned_up": cleanup_tasks
     }
 
-@router.post("/finish/{session_id}")
-async def finish_conversation(session_id: str = "default", request: FinishConversationRequest = None) -> FinishConversationResponse:
-    """Finish conversation, analyze transcript with LLM, and return results"""
+def load_finish_profile(request: Optional[FinishConversationRequest]) -> Optional[dict]:
+    """Get the user profile to analyze with, if the finish request names one"""
+    user_profile = None
+
+    if request and request.user_id:
+        try:
+            logger.info(f"🔍 Retrieving user profile: {request.user_id}")
+
+            if request.user_id in profiles_store:
+                user_profile = profiles_store[request.user_id]
+                logger.info(f"✅ User profile retrieved for analysis")
+            else:
+                logger.warning(f"⚠️ User profile not found: {request.user_id}")
+
+        except Exception as e:
+            logger.warning(f"⚠️ Error retrieving user profile: {e}, proceeding without profile")
+    
+    return user_profile
+
+
+def claim_recording(session_id: str) -> Optional[str]:
+    """Stop the session's audio recording, if any, and return its ID for the report.
+
+    The segments are joined in the background, so long consultations don't
+    hold up /finish; the download returns 404 until the WAV is ready.
+    """
+    try:
+        consultation_recorder.stop(session_id)
+    except Exception as e:
+        logger.error(f"❌ Could not finalize recording for {session_id}: {e}")
+    return consultation_recorder.claim(session_id)
+
+
+def attach_recording(analysis: dict, recording_id: Optional[str], timestamps: dict) -> dict:
+    """Point the report's attachment fields at the consultation recording"""
+    if recording_id is None:
+        return analysis
+    return {
+        **analysis,
+        "videoAttachmentUrl": f"/api/stream/recordings/{recording_id}",
+        "videoAttachmentName": f"Consultation_{timestamps['timestamp']}.wav",
+    }
+
+
+def end_session_for_analysis(session_id: str) -> Tuple[List[Any], float]:
+    """Close a session and return its transcripts and duration; raises if there is nothing to analyze"""
+    # Step 2: Get conversation data before cleanup
+    conversation = conversation_store.get_conversation(session_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    transcripts = list(conversation.get("transcripts", []))
+    if not transcripts:
+        raise HTTPException(status_code=400, detail="No conversation data to analyze")
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+
+    # Step 3: Cleanup session (same as disconnect)
+    sessions.pop(session_id, None)
+    conversation_store.end_session(session_id)
+
+    return transcripts, conversation.get("duration_seconds", 0)
+
+
+@router.post("/finish/{session_id}", status_code=202)
+async def finish_conversation(
+    response: Response,
+    session_id: str = "default",
+    request: FinishConversationRequest = None
+) -> AnalysisJobResponse:
+    """Finish conversation and queue the transcript for LLM analysis"""
     try:
         logger.info(f"🏁 Finishing conversation for session: {session_id}")
         
         # Step 1: Get user profile if user_id is provided
-        user_profile = None
-        profile_context = "No patient profile information available."
-        
-        if request and request.user_id:
-            try:
-                logger.info(f"🔍 Retrieving user profile: {request.user_id}")
-                
-                # Import the in-memory profiles store
-                from api.routes.profile_memory import profiles_store
-                
-                if request.user_id in profiles_store:
-                    user_profile = profiles_store[request.user_id]
-                    
-                    # Build profile context for LLM
-                    profile_context = f"""
-Patient Information:
-- Name: {user_profile.get('name', 'Unknown')}
-- Age: {user_profile.get('age', 'Not provided')}
-- Gender: {user_profile.get('gender', 'Not provided')}
-- Date of Birth: {user_profile.get('date_of_birth', 'Not provided')}
-
-Medical History:
-- Medical Conditions: {', '.join(user_profile.get('medical_history', {}).get('conditions', [])) or 'None reported'}
-- Allergies: {', '.join(user_profile.get('medical_history', {}).get('allergies', [])) or 'None reported'}
-- Current Medications: {', '.join(user_profile.get('medical_history', {}).get('medications', [])) or 'None reported'}
-- Family History: {', '.join(user_profile.get('medical_history', {}).get('family_history', [])) or 'None reported'}
-- Previous Surgeries: {', '.join(user_profile.get('medical_history', {}).get('surgeries', [])) or 'None reported'}
-- Additional Notes: {user_profile.get('medical_history', {}).get('notes', 'None')}
-"""
-                    
-                    logger.info(f"✅ User profile retrieved for analysis")
-                else:
-                    logger.warning(f"⚠️ User profile not found: {request.user_id}")
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Error retrieving user profile: {e}, proceeding without profile")
-        
-        # Step 2: Get conversation data before cleanup
-        conversation = conversation_store.get_conversation(session_id)
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        # Step 2: Extract transcript text for LLM analysis
-        transcripts = conversation.get("transcripts", [])
-        if not transcripts:
-            raise HTTPException(status_code=400, detail="No conversation data to analyze")
-        
-        # Build conversation text
-        conversation_text = ""
-        for transcript in transcripts:
-            role = "Patient" if transcript["role"] == "user" else "AI Assistant"
-            conversation_text += f"{role}: {transcript['content']}\n"
-        
-        logger.info(f"📋 Analyzing conversation with {len(transcripts)} transcript entries")
-        
-        # Step 3: Send to LLM for medical analysis
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
-        client = openai.OpenAI(api_key=openai_api_key)
-        
-        # Generate timestamps for the report
-        now = datetime.now()
-        timestamp = now.strftime("%Y%m%d-%H%M%S")
-        timestamp_short = now.strftime("%Y%m%d%H%M")
-        date = now.strftime("%Y-%m-%d")
-        time = now.strftime("%I:%M %p %Z")
+        user_profile = load_finish_profile(request)
+        
+        # Step 2-3: Get conversation data and clean up the session
+        transcripts, duration_seconds = end_session_for_analysis(session_id)
+        timestamps = report_timestamps()
+        recording_id = claim_recording(session_id)
+        
+        # Identical transcript and profile already analyzed (retry, double click, replay)
+        cache_key = session_cache_key(transcripts, user_profile)
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            # The draft report is moot; stop its incremental analysis
+            if speculative_analysis.is_tracking(session_id):
+                await speculative_analysis.discard(session_id)
+            report = build_report(session_id, cached, duration_seconds, len(transcripts), timestamps)
+            conversation_store.store_analysis(session_id, attach_recording(report.model_dump(), recording_id, timestamps))
+            job = analysis_jobs.record_done(session_id, cache_key=cache_key)
+            logger.info(f"⚡ Analysis cache hit for session: {session_id}")
+            response.status_code = 200
+            return AnalysisJobResponse(**job)
+        
+        # Step 4: Queue the LLM analysis; results land in the conversation store.
+        # With speculative analysis only the turns the draft report misses are analyzed
+        speculative = speculative_analysis.is_tracking(session_id)
+        
+        async def run_analysis() -> None:
+            if speculative:
+                report = await speculative_analysis.finalize(
+                    session_id, user_profile, duration_seconds, timestamps, cache_key=cache_key
+                )
+            else:
+                report = await analyze_session(
+                    session_id, transcripts, user_profile, duration_seconds, timestamps
+                )
+            conversation_store.store_analysis(session_id, attach_recording(report.model_dump(), recording_id, timestamps))
         
-        # Format the prompt with conversation, profile context, and timestamps
-        analysis_prompt = MEDICAL_ANALYSIS_PROMPT.format(
-            profile_context=profile_context,
-            conversation_text=conversation_text,
-            timestamp=timestamp,
-            timestamp_short=timestamp_short,
-            date=date,
-            time=time
-        )
-
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": MEDICAL_ANALYSIS_SYSTEM_PROMPT},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
+        job = analysis_jobs.submit(
+            session_id, run_analysis, cache_key=cache_key,
+            report_fields={"recording_id": recording_id, "timestamps": timestamps}
         )
         
-        # Step 4: Parse LLM response
-        try:
-            content = response.choices[0].message.content
-            if content is None:
-                raise ValueError("Empty response from LLM")
-            analysis_result = json.loads(content)
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            # Fallback analysis with full report structure
-            patient_name = user_profile.get('name', 'Patient Name') if user_profile else "Patient Name"
-            patient_dob = user_profile.get('date_of_birth', 'Not Provided') if user_profile else "Not Provided"
-            
-            analysis_result = {
-                "reportId": f"MEDIREP-{timestamp}",
-                "patientName": patient_name,
-                "patientId": f"P{timestamp_short}",
-                "dateOfBirth": patient_dob,
-                "providerName": "AI Medical Assistant",
-                "providerSpecialty": "General Practice AI",
-                "consultationDate": date,
-                "consultationTime": time,
-                "consultationType": "AI Voice Consultation",
-                "mainComplaint": "Analysis unavailable",
-                "detectedSymptoms": [{
-                    "name": "Analysis unavailable",
-                    "confidence": 0.0,
-                    "timestamp": "",
-                    "labelColor": "red"
-                }],
-                "consultationSummary": "Failed to analyze conversation. Please consult with a healthcare professional for proper evaluation.",
-                "potentialDiagnoses": ["Requires manual review"],
-                "recommendations": ["Please consult with a healthcare professional for proper evaluation."],
-                "videoAttachmentUrl": "",
-                "videoAttachmentName": f"Consultation_{timestamp}.mp4"
-            }
+        logger.info(f"✅ Conversation finished for session: {session_id}, analysis job: {job['job_id']}")
         
-        # Step 5: Calculate session metrics
-        duration_seconds = conversation.get("duration_seconds", 0)
-        if not duration_seconds and conversation.get("start_time"):
-            start = datetime.fromisoformat(conversation["start_time"])
-            end = datetime.now()
-            duration_seconds = (end - start).total_seconds()
-        
-        # Step 6: Store analysis results before cleanup
-        # Merge analysis result with session metadata
-        full_report = {
-            **analysis_result,
-            "session_id": session_id,
-            "status": "analyzed",
-            "duration_seconds": duration_seconds,
-            "transcript_count": len(transcripts)
-        }
-        conversation_store.store_analysis(session_id, full_report)
-        
-        # Step 7: Cleanup session (same as disconnect)
-        cleanup_tasks = []
-        if session_id in sessions:
-            sessions.pop(session_id, None)
-            cleanup_tasks.append("session")
-        
-        conversation_store.end_session(session_id)
-        cleanup_tasks.append("conversation")
-        
-        logger.info(f"✅ Conversation analysis completed for session: {session_id}")
-        logger.info(f"📊 Found {len(analysis_result.get('detectedSymptoms', []))} symptoms")
-        
-        # Import Symptom type for proper conversion
-        from api.types.medical_types import Symptom
-        
-        # Convert detected symptoms to proper format
-        detected_symptoms = []
-        for symptom in analysis_result.get("detectedSymptoms", []):
-            if isinstance(symptom, dict):
-                detected_symptoms.append(Symptom(**symptom))
-            else:
-                # Fallback for string symptoms
-                detected_symptoms.append(Symptom(
-                    name=str(symptom),
-                    confidence=0.5,
-                    timestamp="",
-                    labelColor="yellow"
-                ))
-        
-        return FinishConversationResponse(
-            # Session metadata
-            session_id=session_id,
-            status="analyzed",
-            duration_seconds=duration_seconds,
-            transcript_count=len(transcripts),
-            # Report data
-            reportId=analysis_result.get("reportId", f"MEDIREP-{timestamp}"),
-            patientName=analysis_result.get("patientName", "Patient Name"),
-            patientId=analysis_result.get("patientId", f"P{timestamp_short}"),
-            dateOfBirth=analysis_result.get("dateOfBirth", "Not Provided"),
-            providerName=analysis_result.get("providerName", "AI Medical Assistant"),
-            providerSpecialty=analysis_result.get("providerSpecialty", "General Practice AI"),
-            consultationDate=analysis_result.get("consultationDate", date),
-            consultationTime=analysis_result.get("consultationTime", time),
-            consultationType=analysis_result.get("consultationType", "AI Voice Consultation"),
-            mainComplaint=analysis_result.get("mainComplaint", ""),
-            detectedSymptoms=detected_symptoms,
-            consultationSummary=analysis_result.get("consultationSummary", ""),
-            potentialDiagnoses=analysis_result.get("potentialDiagnoses", []),
-            recommendations=analysis_result.get("recommendations", []),
-            videoAttachmentUrl=analysis_result.get("videoAttachmentUrl", ""),
-            videoAttachmentName=analysis_result.get("videoAttachmentName", f"Consultation_{timestamp}.mp4")
-        )
+        return AnalysisJobResponse(**job)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error finishing conversation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Streaming analyses keep running if the client goes away; hold references until they finish
+streaming_analyses: set = set()
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/finish/{session_id}/stream")
+async def finish_conversation_stream(session_id: str = "default", request: FinishConversationRequest = None):
+    """Finish conversation and stream the report as Server-Sent Events.
+
+    Emits a "field" event per completed top-level report field, an "item"
+    event per completed symptom, diagnosis or recommendation, then a "report"
+    event with the full report (or an "error" event).
+    """
+    logger.info(f"🏁 Finishing conversation with streamed analysis for session: {session_id}")
+    user_profile = load_finish_profile(request)
+    transcripts, duration_seconds = end_session_for_analysis(session_id)
+    timestamps = report_timestamps()
+    recording_id = claim_recording(session_id)
+    if speculative_analysis.is_tracking(session_id):
+        await speculative_analysis.discard(session_id)
+    
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def run_analysis() -> None:
+        try:
+            report = await stream_session_analysis(
+                session_id, transcripts, user_profile, duration_seconds, timestamps,
+                lambda event, data: events.put_nowait((event, data))
+            )
+            analysis = attach_recording(report.model_dump(), recording_id, timestamps)
+            conversation_store.store_analysis(session_id, analysis)
+            analysis_jobs.record_done(session_id, cache_key=session_cache_key(transcripts, user_profile))
+            events.put_nowait(("report", analysis))
+            logger.info(f"✅ Streamed analysis completed for session: {session_id}")
+        except Exception as e:
+            logger.error(f"❌ Streamed analysis failed for session {session_id}: {e}")
+            # Pollers of GET /analysis see the failure too
+            analysis_jobs.record_failed(session_id, str(e), cache_key=session_cache_key(transcripts, user_profile))
+            events.put_nowait(("error", {"detail": str(e)}))
+        finally:
+            events.put_nowait(None)
+    
+    task = asyncio.create_task(run_analysis())
+    streaming_analyses.add(task)
+    task.add_done_callback(streaming_analyses.discard)
+    
+    async def event_stream():
+        while True:
+            item = await events.get()
+            if item is None:
+                return
+            yield format_sse(*item)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/recordings/{recording_id}")
+async def get_recording(recording_id: str):
+    """Download a finalized consultation recording (WAV)"""
+    path = consultation_recorder.recording_path(recording_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return FileResponse(path, media_type="audio/wav", filename=f"{recording_id}.wav")
+
 @router.get("/analysis/{session_id}")
 async def get_analysis_results(session_id: str = "default"):
-    """Get analysis results for a completed session"""
+    """Get analysis results for a session, or the state of its pending analysis job"""
     try:
-        analysis = conversation_store.get_analysis(session_id)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found for this session")
+        # The latest job decides: a stored report from an earlier /finish is stale while it runs
+        job = analysis_jobs.get_session_job(session_id)
+        if not job or job["status"] == JOB_DONE:
+            analysis = conversation_store.get_analysis(session_id)
+            if analysis:
+                return FastJSONResponse(content=analysis)
+            if not job:
+                raise HTTPException(status_code=404, detail="Analysis not found for this session")
+        
+        if job["status"] != JOB_FAILED and job.get("cache_key"):
+            # An identical analysis may have finished elsewhere in the meantime
+            cached = analysis_cache.peek(job["cache_key"])
+            if cached is not None:
+                # Same timestamps and recording as the job's own report, whichever write lands last
+                fields = job.get("report_fields") or {}
+                timestamps = fields.get("timestamps") or report_timestamps()
+                conversation = conversation_store.get_conversation(session_id) or {}
+                report = build_report(
+                    session_id, cached, conversation.get("duration_seconds", 0),
+                    len(conversation.get("transcripts", [])), timestamps
+                )
+                analysis = attach_recording(report.model_dump(), fields.get("recording_id"), timestamps)
+                conversation_store.store_analysis(session_id, analysis)
+                return FastJSONResponse(content=analysis)
+        
+        if job["status"] == JOB_FAILED:
+            return FastJSONResponse(status_code=500, content=job)
         
-        return JSONResponse(content=analysis)
+        if job["status"] == JOB_DONE:
+            # Finished, but the report is gone from memory, disk and the cache; polling won't bring it back
+            raise HTTPException(status_code=410, detail="Analysis for this session is no longer available")
         
+        # Pending or running: tell the client to poll again
+        return FastJSONResponse(status_code=202, content=job)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error fetching analysis: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
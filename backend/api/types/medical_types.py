@@ -90,4 +90,14 @@ class FinishConversationResponse(BaseModel):
     potentialDiagnoses: List[str]
     recommendations: List[str]
     videoAttachmentUrl: str
-    videoAttachmentName: str
\ No newline at end of file
+    videoAttachmentName: str
+
+
+class AnalysisJobResponse(BaseModel):
+    job_id: str
+    session_id: str
+    status: str  # "pending" | "running" | "done" | "failed"
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
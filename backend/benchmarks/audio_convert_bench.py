@@ -0,0 +1,56 @@
+"""Measure capture audio conversion throughput (downmix, resample to 24 kHz, int16) as a real-time factor.
+
+Streams a synthetic multi-tone signal through AudioConverter in
+capture-sized chunks for each common source format, checks chunked output
+matches a one-shot conversion, and reports CPU time per second of audio.
+
+    python benchmarks/audio_convert_bench.py --seconds 60 --chunk-ms 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.audio_convert import SAMPLE_FORMATS, AudioConverter
+
+SOURCES = (
+    (48000, 2, "f32"),
+    (48000, 1, "f32"),
+    (44100, 2, "f32"),
+    (44100, 2, "s16"),
+    (16000, 1, "s16"),
+)
+
+
+def capture(rate: int, channels: int, sample_format: str, seconds: float) -> bytes:
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 3100 * t)
+    frames = np.repeat(signal[:, None], channels, axis=1)
+    if sample_format == "s16":
+        frames = frames * 32767
+    return frames.astype(SAMPLE_FORMATS[sample_format]).tobytes()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--chunk-ms", type=int, default=10)
+    args = parser.parse_args()
+
+    for rate, channels, sample_format in SOURCES:
+        data = capture(rate, channels, sample_format, args.seconds)
+        frame_bytes = SAMPLE_FORMATS[sample_format].itemsize * channels
+        chunk = rate * args.chunk_ms // 1000 * frame_bytes
+
+        converter = AudioConverter(rate, channels, sample_format)
+        started = time.process_time()
+        out = b"".join(converter.convert(data[i:i + chunk]) for i in range(0, len(data), chunk))
+        cpu = time.process_time() - started
+
+        assert out == AudioConverter(rate, channels, sample_format).convert(data), "chunked output differs"
+        rtf = cpu / args.seconds
+        print(f"{rate:>5} Hz x{channels} {sample_format}: RTF {rtf:.4f} ({1 / rtf:,.0f}x real time), "
+              f"{converter.stats()['taps_per_phase']} taps per phase, {len(out) // 2} samples out")
@@ -0,0 +1,70 @@
+"""Measure cohort queries over medical history: full scan vs inverted index.
+
+    python benchmarks/cohort_query_bench.py --profiles 20000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.medical_history_index import MedicalHistoryIndex
+
+CONDITIONS = ["Type 2 diabetes", "Hypertension", "Asthma", "Hypothyroidism", "Migraine", "GERD", "Depression", "Arthritis",
+              "Celiac disease", "Gout", "Psoriasis", "Anemia"]
+MEDICATIONS = ["Metformin 500mg", "Lisinopril 10mg", "Albuterol inhaler", "Levothyroxine 50mcg", "Sumatriptan",
+               "Omeprazole", "Sertraline", "Ibuprofen", "Atorvastatin", "Allopurinol", "Iron supplement", "Insulin"]
+FAMILY_HISTORY = ["Father: heart disease", "Mother: breast cancer", "Grandfather: stroke", "Mother: diabetes",
+                  "Sibling: asthma", "Grandmother: dementia", "Father: glaucoma"]
+ALLERGIES = ["Penicillin", "Peanuts", "Latex", "Sulfa drugs", "Shellfish", "Pollen"]
+
+QUERY = 'metformin AND family:"heart disease"'
+
+
+def make_profiles(count: int) -> dict:
+    rng = random.Random(11)
+    return {
+        f"user-{i:07d}": {
+            "medical_history": {
+                "conditions": rng.sample(CONDITIONS, rng.randint(0, 3)),
+                "allergies": rng.sample(ALLERGIES, rng.randint(0, 2)),
+                "medications": rng.sample(MEDICATIONS, rng.randint(0, 3)),
+                "family_history": rng.sample(FAMILY_HISTORY, rng.randint(0, 2)),
+                "surgeries": [],
+            }
+        }
+        for i in range(count)
+    }
+
+
+def scan(profiles: dict) -> set:
+    """What the query costs without an index: look at every profile's history"""
+    matches = set()
+    for user_id, profile in profiles.items():
+        history = profile["medical_history"]
+        on_metformin = any("metformin" in entry.lower() for entry in history["medications"])
+        if on_metformin and any("heart disease" in entry.lower() for entry in history["family_history"]):
+            matches.add(user_id)
+    return matches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.profiles)
+    index = MedicalHistoryIndex()
+    for user_id, profile in profiles.items():
+        index.on_change(user_id, None, profile)
+
+    matches = index.search(QUERY)
+    assert matches == scan(profiles)
+    print(f"{QUERY!r} matches {len(matches):,} of {args.profiles:,} profiles")
+
+    scanned = timeit.timeit(lambda: scan(profiles), number=max(1, args.repeat // 20)) / max(1, args.repeat // 20)
+    indexed = timeit.timeit(lambda: index.search(QUERY), number=args.repeat) / args.repeat
+    print(f"full scan:       {scanned * 1e3:.2f} ms")
+    print(f"inverted index:  {indexed * 1e3:.3f} ms  ({scanned / indexed:.0f}x)")
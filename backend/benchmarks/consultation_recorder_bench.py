@@ -0,0 +1,77 @@
+"""Measure memory while recording many consultations at once, and check the finalized WAV files.
+
+Feeds every session 20 ms PCM16 chunks in lockstep, faster than real time,
+and samples process RSS as the recordings grow on disk.
+
+    python benchmarks/consultation_recorder_bench.py --sessions 200 --minutes 5 --speed 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.consultation_recorder import ConsultationRecorder
+from services.realtime_audio import pcm16_bytes
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def main(args) -> None:
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = ConsultationRecorder(directory, enabled=True, segment_seconds=args.segment_seconds)
+        recorder.start()
+        sessions = [f"bench-{i}" for i in range(args.sessions)]
+        recordings = [recorder.open(session_id) for session_id in sessions]
+
+        chunk = os.urandom(pcm16_bytes(20))
+        ticks = int(args.minutes * 60 * 1000 / 20)
+        samples = []
+        started = time.perf_counter()
+        for tick in range(ticks):
+            for recording in recordings:
+                recording.write(chunk)
+            if tick % 50 == 0:
+                # Paced at `speed` x real time
+                await asyncio.sleep(max(0.0, tick * 0.02 / args.speed - (time.perf_counter() - started)))
+            if tick % (ticks // 10 or 1) == 0:
+                samples.append((tick * 20 / 1000, rss_mb()))
+        samples.append((ticks * 20 / 1000, rss_mb()))
+
+        ids = []
+        for session_id in sessions:
+            await recorder.finalize(session_id)
+            ids.append(recorder.claim(session_id))
+        stats = recorder.stats()
+        await recorder.close()
+
+        with wave.open(recorder.recording_path(ids[0]), "rb") as wav:
+            recorded_seconds = wav.getnframes() / wav.getframerate()
+
+    total_mb = args.sessions * pcm16_bytes(int(args.minutes * 60 * 1000)) / 1e6
+    print(f"{args.sessions} sessions x {args.minutes:g} min at {args.speed:g}x real time "
+          f"({total_mb:.0f} MB of audio written, would be held in memory if buffered whole)")
+    for seconds, rss in samples:
+        print(f"  audio t={seconds:6.1f} s   RSS {rss:7.1f} MB")
+    print(f"buffers written: {stats['buffers_written']}, audio dropped: {stats['bytes_dropped']} bytes, "
+          f"first recording: {recorded_seconds:.1f} s of WAV")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--speed", type=float, default=20, help="how many times faster than real time to feed audio")
+    parser.add_argument("--segment-seconds", type=int, default=60)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""Compare a fresh aiohttp.ClientSession per call against the shared HTTPClient pool.
+
+Runs a local aiohttp server standing in for OpenAI/Supabase and counts how
+many TCP connections each strategy opens.
+
+    python benchmarks/http_pool_bench.py --requests 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.http_client import HTTPClient
+
+
+async def start_stub_server():
+    peers = set()
+
+    @web.middleware
+    async def track_connections(request, handler):
+        peers.add(request.transport.get_extra_info("peername"))
+        return await handler(request)
+
+    async def realtime_sessions(request):
+        return web.json_response({"id": "sess_stub", "client_secret": {"value": "ek_stub"}})
+
+    async def user_profiles(request):
+        return web.json_response([])
+
+    app = web.Application(middlewares=[track_connections])
+    app.router.add_post("/v1/realtime/sessions", realtime_sessions)
+    app.router.add_get("/rest/v1/user_profiles", user_profiles)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", peers
+
+
+async def per_request_sessions(base_url: str, n: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{base_url}/v1/realtime/sessions", json={}) as response:
+                    await response.json()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(n)))
+    return time.perf_counter() - started
+
+
+async def pooled_client(base_url: str, n: int, concurrency: int) -> tuple:
+    client = HTTPClient(limit_per_host=concurrency)
+    await client.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            async with client.post(f"{base_url}/v1/realtime/sessions", json={}) as response:
+                await response.json()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(n)))
+    elapsed = time.perf_counter() - started
+    stats = client.stats()
+    await client.close()
+    return elapsed, stats
+
+
+async def main(n: int, concurrency: int) -> None:
+    runner, base_url, peers = await start_stub_server()
+    try:
+        elapsed = await per_request_sessions(base_url, n, concurrency)
+        print(f"per-request session: {n} calls in {elapsed:.3f}s "
+              f"({n / elapsed:.0f} req/s), {len(peers)} connections opened")
+
+        peers.clear()
+        elapsed, stats = await pooled_client(base_url, n, concurrency)
+        print(f"shared pool:         {n} calls in {elapsed:.3f}s "
+              f"({n / elapsed:.0f} req/s), {len(peers)} connections opened")
+        print(f"pool stats: {stats['totals']}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
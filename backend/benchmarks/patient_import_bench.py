@@ -0,0 +1,72 @@
+"""Measure bulk patient import throughput: serial parsing vs the process pool at several worker counts.
+
+Generates chart exports from the samples in files/ with varied names and
+dates of birth, then parses them through PatientImporter.
+
+    python benchmarks/patient_import_bench.py --documents 5000 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.patient_import import PatientImporter, parse_patient_document
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "files")
+SAMPLE_NAMES = ("David Chen", "Layla Amin", "Sarah Patel")
+FIRST_NAMES = ["Amara", "Ben", "Chloe", "Diego", "Elif", "Farah", "Gus", "Hana", "Ivan", "Jia"]
+LAST_NAMES = ["Okafor", "Rossi", "Nakamura", "Silva", "Kowalski", "Haddad", "Larsen", "Mehta"]
+
+
+def make_documents(count: int) -> list:
+    rng = random.Random(3)
+    samples = []
+    for name in sorted(os.listdir(SAMPLES_DIR)):
+        with open(os.path.join(SAMPLES_DIR, name), encoding="utf-8") as f:
+            samples.append(f.read())
+    documents = []
+    for i in range(count):
+        content = samples[i % len(samples)]
+        for sample_name in SAMPLE_NAMES:
+            content = content.replace(sample_name, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+        documents.append((f"export-{i:06d}.md", content))
+    return documents
+
+
+async def pooled(documents: list, workers: int) -> float:
+    importer = PatientImporter(workers=workers)
+
+    async def stream():
+        for document in documents:
+            yield document
+
+    async def insert(records):
+        return len(records)
+
+    # Warm the pool up so process start-up isn't billed to the import
+    await importer.import_documents(stream(), insert)
+    report = await importer.import_documents(stream(), insert)
+    importer.shutdown()
+    assert report["failed"] == 0, report["errors"][:3]
+    return report["documents_per_second"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents)
+    started = time.perf_counter()
+    for filename, content in documents:
+        parse_patient_document(filename, content)
+    serial = args.documents / (time.perf_counter() - started)
+    print(f"cores available: {os.cpu_count()}")
+    print(f"serial (event loop): {serial:8.0f} docs/s")
+    for workers in args.workers:
+        rate = asyncio.run(pooled(documents, workers))
+        print(f"pool, {workers:2d} workers:  {rate:8.0f} docs/s  ({rate / serial:.1f}x)")
@@ -0,0 +1,128 @@
+"""Count Supabase round trips for profile reads and updates, with and without the profile cache.
+
+Runs a local aiohttp server standing in for PostgREST, then drives the
+profile routes with a refetch-heavy profile page and bursts of edits.
+
+    python benchmarks/profile_cache_bench.py --page-loads 200 --edit-bursts 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USER_ID = "demo-user-12345"
+
+
+async def start_stub_postgrest():
+    calls = Counter()
+    rows = {
+        USER_ID: {
+            "user_id": USER_ID,
+            "name": "Layla Amin",
+            "age": 34,
+            "gender": "female",
+            "date_of_birth": "1991-02-03",
+            "medical_history": {"conditions": ["Asthma"], "allergies": [], "medications": ["Albuterol"],
+                                "family_history": [], "surgeries": [], "notes": ""},
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "updated_at": "2025-01-01T00:00:00+00:00",
+        }
+    }
+
+    def matching(request):
+        user_id = request.query.get("user_id", "")[len("eq."):]
+        return [rows[user_id]] if user_id in rows else []
+
+    async def select(request):
+        calls["GET"] += 1
+        await asyncio.sleep(0.005)
+        found = matching(request)
+        columns = request.query.get("select")
+        if columns and columns != "*":
+            found = [{column: row.get(column) for column in columns.split(",")} for row in found]
+        return web.json_response(found)
+
+    async def update(request):
+        calls["PATCH"] += 1
+        await asyncio.sleep(0.005)
+        fields = await request.json()
+        found = matching(request)
+        for row in found:
+            row.update(fields)
+        if "return=representation" in request.headers.get("Prefer", ""):
+            return web.json_response(found)
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_get("/rest/v1/user_profiles", select)
+    app.router.add_patch("/rest/v1/user_profiles", update)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", calls
+
+
+async def workload(get_profile, update_profile, page_loads: int, edit_bursts: int) -> None:
+    # The profile page fires several reads for the same user per load
+    for _ in range(page_loads):
+        await asyncio.gather(*(get_profile() for _ in range(4)))
+    # Autosave: a few field edits in quick succession, then a reload
+    for burst in range(edit_bursts):
+        await asyncio.gather(*(update_profile({"age": 30 + burst + i}) for i in range(5)))
+        await get_profile()
+
+
+async def main(page_loads: int, edit_bursts: int) -> None:
+    runner, base_url, calls = await start_stub_postgrest()
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ["SUPABASE_SERVICE_KEY"] = "stub-key"
+    from api.routes import profile
+    from api.types.medical_types import UpdateUserProfileRequest
+    from services.http_client import http_client
+    from services.profile_cache import profile_cache
+
+    def stamp(fields):
+        return {"updated_at": datetime.now().isoformat(), **fields}
+
+    try:
+        started = time.perf_counter()
+        await workload(
+            lambda: profile.fetch_profile_row(USER_ID),
+            lambda fields: profile.patch_profile_row(USER_ID, stamp(fields)),
+            page_loads, edit_bursts
+        )
+        uncached = dict(calls), time.perf_counter() - started
+
+        calls.clear()
+        started = time.perf_counter()
+        await workload(
+            lambda: profile.get_user_profile(USER_ID),
+            lambda fields: profile.update_user_profile(USER_ID, UpdateUserProfileRequest(**fields)),
+            page_loads, edit_bursts
+        )
+        cached = dict(calls), time.perf_counter() - started
+
+        for label, (counts, elapsed) in (("direct", uncached), ("cached", cached)):
+            print(f"{label}: {sum(counts.values()):4d} upstream calls {counts} in {elapsed:.2f}s")
+        print(f"upstream calls reduced {sum(uncached[0].values()) / max(1, sum(cached[0].values())):.1f}x")
+        print(f"cache stats: {profile_cache.stats()}")
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-loads", type=int, default=200)
+    parser.add_argument("--edit-bursts", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.page_loads, args.edit_bursts))
@@ -0,0 +1,104 @@
+"""Measure profile listing at scale: full scan vs indexed cursor pages.
+
+    python benchmarks/profile_list_bench.py --profiles 100000 --page 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.profile_index import ProfileIndex
+
+FIRST_NAMES = ["Sarah", "David", "Layla", "Jordan", "Maria", "Samuel", "Priya", "Omar", "Chen", "Alex", "Noah", "Emma"]
+LAST_NAMES = ["Patel", "Chen", "Amin", "Smith", "Garcia", "Nguyen", "Okafor", "Kim", "Singh", "Brown"]
+GENDERS = ["female", "male", "non-binary"]
+
+QUERIES = {
+    "unfiltered": {},
+    "gender": {"gender": "female"},
+    "age 30-39": {"min_age": 30, "max_age": 39},
+    "name prefix": {"name_prefix": "sam"},
+    "name + gender + age": {"name_prefix": "la", "gender": "female", "min_age": 20, "max_age": 45},
+}
+
+
+def make_profiles(count: int) -> dict:
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    profiles = {}
+    for i in range(count):
+        user_id = f"user-{i:07d}"
+        profiles[user_id] = {
+            "user_id": user_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "age": rng.randint(1, 95),
+            "gender": rng.choice(GENDERS),
+            "created_at": (start + timedelta(seconds=rng.randint(0, 60 * 86400))).isoformat(),
+            "medical_history": {"conditions": [], "allergies": [], "medications": []},
+        }
+    return profiles
+
+
+def legacy_list(profiles: dict, limit: int, name_prefix=None, gender=None, min_age=None, max_age=None) -> list:
+    """Walk and materialize every profile, then filter, sort and slice"""
+    rows = []
+    for user_id, profile in profiles.items():
+        rows.append({
+            "user_id": profile["user_id"],
+            "name": profile["name"],
+            "age": profile.get("age"),
+            "gender": profile.get("gender"),
+            "created_at": profile.get("created_at"),
+        })
+    if name_prefix:
+        rows = [row for row in rows if row["name"].lower().startswith(name_prefix)]
+    if gender:
+        rows = [row for row in rows if row["gender"] == gender]
+    if min_age is not None:
+        rows = [row for row in rows if row["age"] >= min_age]
+    if max_age is not None:
+        rows = [row for row in rows if row["age"] <= max_age]
+    rows.sort(key=lambda row: (row["created_at"], row["user_id"]), reverse=True)
+    return rows[:limit]
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.profiles)
+    started = time.perf_counter()
+    index = ProfileIndex()
+    for user_id, profile in profiles.items():
+        index.add(user_id, profile)
+    print(f"indexed {args.profiles:,} profiles in {time.perf_counter() - started:.2f}s")
+
+    for label, filters in QUERIES.items():
+        expected = legacy_list(profiles, args.page, **filters)
+        rows, next_key = index.page(args.page, **filters)
+        assert rows == expected, label
+        # A deep page: follow the cursor a few pages in
+        for _ in range(3):
+            if next_key is None:
+                break
+            rows, next_key = index.page(args.page, cursor=next_key, **filters)
+
+        legacy = timed(lambda: legacy_list(profiles, args.page, **filters), args.repeat)
+        indexed = timed(lambda: index.page(args.page, **filters), args.repeat * 100)
+        print(
+            f"{label:>20}: full scan {legacy * 1e3:8.2f} ms   "
+            f"indexed {indexed * 1e6:8.1f} µs   ({legacy / indexed:,.0f}x)"
+        )
@@ -0,0 +1,91 @@
+"""Measure profile read and analysis response encoding: per-request validation and json vs cached bytes.
+
+    python benchmarks/profile_read_bench.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.responses import FastJSONResponse
+from api.types.medical_types import MedicalHistory, UserProfile
+from services.profile_view_cache import ProfileViewCache
+
+PROFILE = {
+    "user_id": "demo-user-12345",
+    "name": "Sarah Patel",
+    "age": 30,
+    "gender": "female",
+    "date_of_birth": "1996-03-08",
+    "medical_history": {
+        "conditions": ["Asthma: mild, well-controlled", "Seasonal Allergic Rhinitis", "Generalized Anxiety Disorder",
+                       "Iron-deficiency Anemia (resolved 2020)"],
+        "allergies": ["Penicillin (rash and swelling)", "Latex (contact dermatitis)"],
+        "medications": ["Ibuprofen 200mg as needed", "Cetirizine 10mg daily in season", "Melatonin 5mg occasionally"],
+        "family_history": ["Mother: Type 2 Diabetes, High Cholesterol", "Father: Hypertension",
+                           "Paternal Grandmother: Stroke at 68"],
+        "surgeries": ["Appendectomy (2014)", "Wisdom Teeth Extraction (2020)"],
+        "notes": "Recent Symptoms: Mild dizziness in mornings\nRecent Symptoms: Persistent fatigue"
+    },
+    "created_at": "2026-01-05T10:15:00.123456",
+    "updated_at": "2026-03-02T08:01:44.654321",
+    "version": 4
+}
+
+REPORT = {
+    "reportId": "RPT-20260316-101500",
+    "patientId": "PT-20260316101500",
+    "consultationDate": "2026-03-16",
+    "consultationTime": "10:15 AM",
+    "summary": "Patient reports persistent fatigue and morning dizziness over three months. " * 3,
+    "detectedSymptoms": [
+        {"name": f"Symptom {i}", "severity": "moderate", "duration": "3 months", "description": "Detail " * 12}
+        for i in range(8)
+    ],
+    "possibleDiagnoses": [
+        {"condition": f"Condition {i}", "likelihood": "possible", "confidence": 0.4, "reasoning": "Because " * 15}
+        for i in range(5)
+    ],
+    "recommendations": [f"Recommendation {i}: follow up with a specialist within two weeks." for i in range(8)],
+    "urgencyLevel": "medium",
+}
+
+
+def legacy_read() -> bytes:
+    """What get_user_profile did: build the model field by field, then FastAPI encodes it"""
+    profile = UserProfile(
+        user_id=PROFILE["user_id"],
+        name=PROFILE["name"],
+        age=PROFILE.get("age"),
+        gender=PROFILE.get("gender"),
+        date_of_birth=PROFILE.get("date_of_birth"),
+        medical_history=MedicalHistory(**PROFILE["medical_history"]),
+        created_at=PROFILE.get("created_at"),
+        updated_at=PROFILE.get("updated_at")
+    )
+    return JSONResponse(jsonable_encoder(profile)).body
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    views = ProfileViewCache()
+    _, cached_body = views.get(PROFILE["user_id"], PROFILE)
+    assert UserProfile.model_validate_json(cached_body) == UserProfile.model_validate_json(legacy_read())
+
+    n = args.iterations
+    legacy = timeit.timeit(legacy_read, number=n) / n
+    cached = timeit.timeit(lambda: views.get(PROFILE["user_id"], PROFILE), number=n) / n
+    print(f"profile read, validate + encode:  {legacy * 1e6:7.2f} µs")
+    print(f"profile read, cached bytes:       {cached * 1e6:7.2f} µs  ({legacy / cached:.0f}x)")
+
+    stdlib = timeit.timeit(lambda: JSONResponse(REPORT).body, number=n) / n
+    fast = timeit.timeit(lambda: FastJSONResponse(REPORT).body, number=n) / n
+    print(f"analysis report, JSONResponse:     {stdlib * 1e6:7.2f} µs")
+    print(f"analysis report, FastJSONResponse: {fast * 1e6:7.2f} µs  ({stdlib / fast:.1f}x)")
@@ -0,0 +1,67 @@
+"""Measure prompt assembly cost per finish: per-call rendering vs versioned cache.
+
+    python benchmarks/prompt_assembly_bench.py --iterations 20000 --turns 40
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.prompts import MEDICAL_ANALYSIS_PROMPT
+from services.medical_analysis import (
+    build_analysis_prompt,
+    build_profile_context,
+    render_profile_context,
+    report_timestamps,
+)
+
+PROFILE = {
+    "user_id": "demo-user-12345",
+    "name": "Jordan Smith",
+    "age": 42,
+    "gender": "female",
+    "date_of_birth": "1983-04-12",
+    "medical_history": {
+        "conditions": ["Type 2 diabetes", "Hypertension", "Asthma", "Hypothyroidism"],
+        "allergies": ["Penicillin", "Sulfa drugs", "Latex"],
+        "medications": ["Metformin 500mg", "Lisinopril 10mg", "Albuterol inhaler", "Levothyroxine 50mcg"],
+        "family_history": ["Father: coronary artery disease", "Mother: breast cancer"],
+        "surgeries": ["Appendectomy (2004)", "Knee arthroscopy (2016)"],
+        "notes": "Prefers morning appointments. Reports occasional dizziness."
+    },
+    "version": 3
+}
+
+
+def legacy_assembly(conversation_text: str, timestamps: dict) -> str:
+    profile_context = render_profile_context(PROFILE)
+    return MEDICAL_ANALYSIS_PROMPT.format(
+        profile_context=profile_context,
+        conversation_text=conversation_text,
+        **timestamps
+    )
+
+
+def cached_assembly(conversation_text: str, timestamps: dict) -> str:
+    return build_analysis_prompt(build_profile_context(PROFILE), conversation_text, timestamps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+
+    conversation_text = "".join(
+        f"{'Patient' if i % 2 == 0 else 'AI Assistant'}: I've had a headache for {i} days now.\n"
+        for i in range(args.turns)
+    )
+    timestamps = report_timestamps()
+    assert legacy_assembly(conversation_text, timestamps) == cached_assembly(conversation_text, timestamps)
+
+    legacy = timeit.timeit(lambda: legacy_assembly(conversation_text, timestamps), number=args.iterations)
+    cached = timeit.timeit(lambda: cached_assembly(conversation_text, timestamps), number=args.iterations)
+    print(f"per-call rendering:  {legacy / args.iterations * 1e6:.2f} µs/finish")
+    print(f"versioned cache:     {cached / args.iterations * 1e6:.2f} µs/finish")
+    print(f"speedup:             {legacy / cached:.1f}x")
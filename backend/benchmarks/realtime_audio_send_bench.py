@@ -0,0 +1,117 @@
+"""Measure CPU per second of audio sent to OpenAI: per-chunk json.dumps vs the batched send pipeline.
+
+Feeds PCM16 in WebRTC-sized chunks to a socket stand-in that does the
+str -> UTF-8 encode and frame copy websockets would, and checks the batched
+frames decode back to the same audio.
+
+    python benchmarks/realtime_audio_send_bench.py --seconds 300 --chunk-ms 20 --batch-ms 100
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.realtime_audio import AudioSendPipeline, pcm16_bytes
+
+# Production logs at INFO, which the per-chunk path paid for on every chunk
+logger = logging.getLogger("audio_send_bench")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+logger.propagate = False
+
+
+class SocketStandIn:
+    """Does what websockets does with a message before the kernel: encode text, copy into a frame"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.frames = []
+        self.keep = False
+
+    async def send(self, message, text=None):
+        payload = message.encode("utf-8") if isinstance(message, str) else bytes(message)
+        if self.keep:
+            self.frames.append(payload)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+
+class LegacySender:
+    """OpenAIRealtimeClient.send_audio before the pipeline"""
+
+    def __init__(self, websocket: SocketStandIn):
+        self.websocket = websocket
+        self._audio_bytes_sent = 0
+        self._audio_chunks_sent = 0
+
+    async def send_audio(self, audio_data: bytes):
+        self._audio_bytes_sent += len(audio_data)
+        self._audio_chunks_sent += 1
+        logger.info(f"🎵 Sending audio chunk {self._audio_chunks_sent}: {len(audio_data)} bytes (total: {self._audio_bytes_sent} bytes)")
+        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        logger.debug(f"🔄 Converted to base64: {len(audio_base64)} chars")
+        await self.websocket.send(json.dumps({"type": "input_audio_buffer.append", "audio": audio_base64}))
+
+
+def audio_chunks(seconds: float, chunk_ms: int):
+    chunk = os.urandom(pcm16_bytes(chunk_ms))
+    return [chunk] * int(seconds * 1000 / chunk_ms)
+
+
+async def run_legacy(chunks) -> float:
+    sender = LegacySender(SocketStandIn())
+    started = time.process_time()
+    for chunk in chunks:
+        await sender.send_audio(chunk)
+    return time.process_time() - started
+
+
+async def run_pipeline(chunks, batch_ms: int, socket: SocketStandIn):
+    pipeline = AudioSendPipeline(socket.send, batch_ms=batch_ms)
+    pipeline.start()
+    started = time.process_time()
+    for chunk in chunks:
+        await pipeline.write(chunk)
+    await pipeline.close()
+    return time.process_time() - started, pipeline
+
+
+async def main(args) -> None:
+    # Correctness: distinct chunks, odd sizes, wrap-around and a partial final batch
+    socket = SocketStandIn()
+    socket.keep = True
+    sent = [os.urandom(n) for n in (960, 1, 7, 4801, 96000, 33)] * 5
+    _, pipeline = await run_pipeline(sent, args.batch_ms, socket)
+    decoded = b"".join(base64.b64decode(json.loads(frame)["audio"]) for frame in socket.frames)
+    assert decoded == b"".join(sent), "batched frames don't reproduce the input audio"
+
+    chunks = audio_chunks(args.seconds, args.chunk_ms)
+    legacy = await run_legacy(chunks)
+    batched, pipeline = await run_pipeline(chunks, args.batch_ms, SocketStandIn())
+    per_second = lambda cpu: cpu / args.seconds * 1e6
+    print(f"{args.seconds:.0f} s of audio in {len(chunks)} chunks of {args.chunk_ms} ms")
+    print(f"per-chunk json.dumps:  {per_second(legacy):7.1f} µs CPU per audio-second ({len(chunks)} frames)")
+    print(f"batched pipeline:      {per_second(batched):7.1f} µs CPU per audio-second "
+          f"({pipeline.frames_sent} frames, {legacy / batched:.1f}x)")
+
+    # Slow socket: the producer is held back once the ring buffer is full
+    slow = SocketStandIn(delay=args.slow_send_ms / 1000)
+    _, pipeline = await run_pipeline(audio_chunks(args.slow_seconds, args.chunk_ms), args.batch_ms, slow)
+    stats = pipeline.stats()
+    print(f"slow socket ({args.slow_send_ms} ms per frame): {stats['backpressure_waits']} backpressure waits, "
+          f"{stats['backpressure_seconds']} s waited, buffer capped at {stats['capacity_bytes']} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    parser.add_argument("--batch-ms", type=int, default=100)
+    parser.add_argument("--slow-send-ms", type=float, default=5)
+    parser.add_argument("--slow-seconds", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""Measure Realtime listener CPU per session: parsing every server event vs peeking the type first.
+
+Replays a synthetic consultation (assistant audio deltas, transcript deltas
+and the occasional session/transcript event) through OpenAIRealtimeClient,
+with and without a subscribed audio consumer.
+
+    python benchmarks/realtime_listener_bench.py --turns 20 --turn-seconds 8
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.openai_realtime import OpenAIRealtimeClient, peek_event_type
+
+import logging
+logging.getLogger("services.openai_realtime").setLevel(logging.INFO)
+logging.getLogger("services.openai_realtime").addHandler(logging.StreamHandler(open(os.devnull, "w")))
+logging.getLogger("services.openai_realtime").propagate = False
+
+
+def event(event_type: str, **fields) -> str:
+    return json.dumps({"type": event_type, "event_id": f"event_{os.urandom(6).hex()}", **fields})
+
+
+def consultation(turns: int, turn_seconds: float, delta_ms: int):
+    """Server messages for a consultation; OpenAI streams assistant audio as base64 PCM16 deltas"""
+    delta = base64.b64encode(os.urandom(24000 * 2 * delta_ms // 1000)).decode("ascii")
+    messages = [event("session.created", session={"id": "sess_1"}), event("session.updated", session={})]
+    for turn in range(turns):
+        messages.append(event("input_audio_buffer.speech_started", audio_start_ms=turn * 1000))
+        messages.append(event("input_audio_buffer.speech_stopped", audio_end_ms=turn * 1000 + 900))
+        messages.append(event("conversation.item.input_audio_transcription.completed",
+                              item_id=f"item_{turn}", content_index=0, transcript="I have had a headache for days."))
+        messages.append(event("response.created", response={"id": f"resp_{turn}", "status": "in_progress"}))
+        for i in range(int(turn_seconds * 1000 / delta_ms)):
+            messages.append(event("response.audio.delta", response_id=f"resp_{turn}", item_id=f"item_{turn}",
+                                  output_index=0, content_index=0, delta=delta))
+            if i % 3 == 0:
+                messages.append(event("response.audio_transcript.delta", response_id=f"resp_{turn}",
+                                      item_id=f"item_{turn}", output_index=0, content_index=0, delta=" word"))
+        messages.append(event("response.audio_transcript.done", response_id=f"resp_{turn}", item_id=f"item_{turn}",
+                              output_index=0, content_index=0, transcript="Let's talk about that headache."))
+        messages.append(event("response.done", response={"id": f"resp_{turn}", "status": "completed"}))
+    return messages
+
+
+async def replay(client: OpenAIRealtimeClient, messages, full_parse: bool) -> float:
+    started = time.process_time()
+    for message in messages:
+        if full_parse:
+            await client._handle_event(json.loads(message))
+        else:
+            await client._dispatch(message)
+    return time.process_time() - started
+
+
+async def main(args) -> None:
+    messages = consultation(args.turns, args.turn_seconds, args.delta_ms)
+    assert all(peek_event_type(message) == json.loads(message)["type"] for message in messages)
+
+    async def on_transcript(session_id, role, transcript):
+        pass
+
+    received = []
+
+    async def on_audio(session_id, pcm):
+        received.append(len(pcm))
+
+    full = await replay(OpenAIRealtimeClient("bench", on_transcript), messages, full_parse=True)
+    lazy_client = OpenAIRealtimeClient("bench", on_transcript)
+    lazy = await replay(lazy_client, messages, full_parse=False)
+    audio_client = OpenAIRealtimeClient("bench", on_transcript)
+    audio_client.watch_audio(on_audio)
+    with_audio = await replay(audio_client, messages, full_parse=False)
+
+    print(f"{len(messages)} server events, {sum(len(m) for m in messages) / 1e6:.1f} MB "
+          f"({args.turns} turns x {args.turn_seconds:.0f} s of assistant audio)")
+    print(f"parse every event:            {full * 1000:7.1f} ms CPU")
+    print(f"peek type, no audio consumer: {lazy * 1000:7.1f} ms CPU  ({full / lazy:.0f}x, "
+          f"{lazy_client.events_parsed} of {lazy_client.events_received} parsed)")
+    print(f"peek type, audio consumer:    {with_audio * 1000:7.1f} ms CPU  ({len(received)} deltas decoded)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--turn-seconds", type=float, default=8)
+    parser.add_argument("--delta-ms", type=int, default=100, help="audio per response.audio.delta")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""Measure consultation start latency: minting the Realtime session on click vs the pre-minted pool.
+
+Runs a local aiohttp server standing in for POST /v1/realtime/sessions with
+a configurable mint latency and key lifetime, then starts consultations
+through the /session route.
+
+    python benchmarks/realtime_session_pool_bench.py --starts 20 --mint-ms 300 --ttl 6
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from itertools import count
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def start_stub_openai(mint_seconds: float, ttl_seconds: float):
+    minted = count(1)
+
+    async def realtime_sessions(request):
+        await asyncio.sleep(mint_seconds)
+        n = next(minted)
+        return web.json_response({
+            "id": f"sess_stub_{n}",
+            "client_secret": {"value": f"ek_stub_{n}", "expires_at": int(time.time() + ttl_seconds)},
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/realtime/sessions", realtime_sessions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1"
+
+
+async def start_consultations(stream, starts: int, gap_seconds: float) -> list:
+    latencies = []
+    for i in range(starts):
+        started = time.perf_counter()
+        await stream.create_session(stream.SessionRequest(session_id=f"bench-{i}"))
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(gap_seconds)
+    return latencies
+
+
+def summarize(label: str, latencies: list) -> None:
+    print(f"{label}: median {statistics.median(latencies):7.1f} ms   max {max(latencies):7.1f} ms")
+
+
+async def main(args) -> None:
+    runner, base_url = await start_stub_openai(args.mint_ms / 1000, args.ttl)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+    logging.disable(logging.INFO)
+
+    # Imported after the stub is up: the API base URL is read at import time
+    from api.routes import stream
+    from services.http_client import http_client
+    from services.realtime_sessions import RealtimeSessionPool
+    import services.realtime_sessions as realtime_sessions
+
+    await http_client.start()
+    try:
+        summarize("mint on click ", await start_consultations(stream, args.starts, args.gap))
+
+        pool = RealtimeSessionPool(size=args.pool_size, refresh_margin_seconds=args.margin)
+        stream.realtime_session_pool = realtime_sessions.realtime_session_pool = pool
+        pool.start()
+        await asyncio.sleep(args.mint_ms / 1000 * 2)
+        summarize("pre-minted pool", await start_consultations(stream, args.starts, args.gap))
+        # Idle long enough for keys to age out and be replaced
+        await asyncio.sleep(args.ttl)
+        print(f"pool stats: {pool.stats()}")
+        await pool.close()
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--starts", type=int, default=20)
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between consultation starts")
+    parser.add_argument("--mint-ms", type=float, default=300)
+    parser.add_argument("--ttl", type=float, default=6, help="ephemeral key lifetime in seconds")
+    parser.add_argument("--margin", type=float, default=2, help="refresh keys this many seconds before expiry")
+    parser.add_argument("--pool-size", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
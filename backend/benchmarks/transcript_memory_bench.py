@@ -0,0 +1,62 @@
+"""Measure bytes per transcript entry: legacy dicts vs TranscriptRecord.
+
+    python benchmarks/transcript_memory_bench.py --entries 100000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.transcript_record import TranscriptRecord
+
+CONTENTS = [
+    "I've had a headache for three days.",
+    "Can you describe where the pain is located?",
+]
+ROLES = ["user", "assistant"]
+
+
+def legacy_entries(session_id: str, n: int) -> list:
+    return [
+        {
+            "id": str(uuid4()),
+            "role": ROLES[i % 2],
+            "content": CONTENTS[i % 2],
+            "timestamp": datetime.now().isoformat(),
+            "session_id": session_id
+        }
+        for i in range(n)
+    ]
+
+
+def record_entries(session_id: str, n: int) -> list:
+    return [
+        TranscriptRecord.create(session_id, i + 1, ROLES[i % 2], CONTENTS[i % 2])
+        for i in range(n)
+    ]
+
+
+def measure(build, n: int) -> float:
+    session_id = "bench-session"
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = build(session_id, n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(entries) == n
+    return (after - before) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    legacy = measure(legacy_entries, args.entries)
+    compact = measure(record_entries, args.entries)
+    print(f"legacy dict entries: {legacy:.0f} bytes/transcript (excluding shared content)")
+    print(f"TranscriptRecord:    {compact:.0f} bytes/transcript (excluding shared content)")
+    print(f"saving:              {100 * (1 - compact / legacy):.0f}%")
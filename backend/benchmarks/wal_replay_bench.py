@@ -0,0 +1,83 @@
+"""Time ConversationStore recovery from a transcript WAL.
+
+Writes a WAL of N transcript records spread over a number of sessions, then
+replays it into a fresh store the same way startup does.
+
+    python benchmarks/wal_replay_bench.py --entries 1000000 --sessions 1000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.conversation_store import ConversationStore, RetentionPolicy
+from services.transcript_wal import (
+    TranscriptWAL,
+    OP_CREATE,
+    encode_json,
+    encode_transcript,
+    frame,
+)
+
+
+def write_wal(directory: str, entries: int, sessions: int, segment_bytes: int) -> int:
+    os.makedirs(directory, exist_ok=True)
+    index, size, total = 0, 0, 0
+    f = open(os.path.join(directory, f"wal-{index:08d}.log"), "wb")
+    now_ns = time.time_ns()
+    for session in range(sessions):
+        f.write(frame(encode_json(OP_CREATE, {"session_id": f"session-{session}", "start_time": "2024-01-01T00:00:00"})))
+    for i in range(entries):
+        if size >= segment_bytes:
+            f.close()
+            index += 1
+            size = 0
+            f = open(os.path.join(directory, f"wal-{index:08d}.log"), "wb")
+        record = frame(encode_transcript(
+            f"session-{i % sessions}",
+            i // sessions + 1,
+            "user" if i % 2 else "assistant",
+            "I've had a headache and some nausea for about three days now.",
+            now_ns + i
+        ))
+        f.write(record)
+        size += len(record)
+        total += len(record)
+    f.close()
+    return total
+
+
+def main(entries: int, sessions: int, segment_bytes: int) -> None:
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        wal_dir = os.path.join(directory, "wal")
+        started = time.perf_counter()
+        total = write_wal(wal_dir, entries, sessions, segment_bytes)
+        print(f"wrote {entries} records ({total / 1e6:.1f} MB, {len(os.listdir(wal_dir))} segments) "
+              f"in {time.perf_counter() - started:.2f}s")
+
+        store = ConversationStore(
+            retention=RetentionPolicy(max_sessions=sessions * 2, max_bytes=1 << 40),
+            wal=TranscriptWAL(wal_dir)
+        )
+        started = time.perf_counter()
+        count = 0
+        for op, body in store.wal.replay():
+            store.apply_record(op, body)
+            count += 1
+        elapsed = time.perf_counter() - started
+        transcripts = sum(len(c["transcripts"]) for c in store.conversations.values())
+        print(f"replayed {count} records into {len(store.conversations)} sessions "
+              f"({transcripts} transcripts) in {elapsed:.2f}s ({count / elapsed:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--segment-bytes", type=int, default=64 * 1024 * 1024)
+    args = parser.parse_args()
+    main(args.entries, args.sessions, args.segment_bytes)
@@ -65,4 +65,33 @@ MEDICAL_ANALYSIS_SYSTEM_PROMPT = """You are a medical AI assistant providing pre
 4. Provide actionable recommendations
 5. Always emphasize the importance of professional medical consultation
 
-You must output valid JSON that matches the specified format exactly."""
\ No newline at end of file
+You must output valid JSON that matches the specified format exactly."""
+
+MEDICAL_ANALYSIS_UPDATE_PROMPT = """
+You are a medical AI assistant. You already assessed the first part of this patient conversation. Update that assessment with the part of the conversation that happened since.
+
+Patient Profile:
+{profile_context}
+
+Previous assessment:
+{previous_analysis}
+
+New conversation since the previous assessment:
+{conversation_delta}
+
+Return the complete updated assessment as JSON in exactly the same format as the previous assessment, with these fields set as shown:
+{{
+    "reportId": "MEDIREP-{timestamp}",
+    "patientId": "P{timestamp_short}",
+    "consultationDate": "{date}",
+    "consultationTime": "{time}",
+    "videoAttachmentName": "Consultation_{timestamp}.mp4"
+}}
+
+Guidelines:
+- Keep findings from the previous assessment unless the new conversation contradicts or refines them
+- Merge newly mentioned symptoms into detectedSymptoms and re-score confidence where the new conversation adds evidence
+- The consultationSummary must cover the whole consultation, not only the new part
+- Revisit potentialDiagnoses and recommendations in light of the new information and the patient's medical background
+- If the new conversation adds nothing medically relevant, return the previous assessment unchanged apart from the fields above
+"""
@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import openai, stream, realtime
+from api.routes import openai, stream, realtime, metrics
 from api.routes import profile_memory as profile
+from services.http_client import http_client
+from services.conversation_store import conversation_store
+from services.analysis_jobs import analysis_jobs
+from services.speculative_analysis import speculative_analysis
+from services.medical_analysis import close_async_client
+from services.patient_import import patient_importer
+from services.realtime_sessions import realtime_session_pool
+from services.consultation_recorder import consultation_recorder
+from services.store_bus import StoreBus, store_bus_url
 import uvicorn
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -14,7 +25,39 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.info("🚀 Starting TerraHacks Backend API with comprehensive logging")
 
-app = FastAPI(title="TerraHacks Backend API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared outbound clients and shut down background workers"""
+    bus = None
+    if store_bus_url():
+        # Multi-worker mode: the store broker owns the WAL and orders writes
+        bus = StoreBus(store_bus_url())
+        # The broker spills to the same directory on this box
+        conversation_store.attach_bus(bus, spill_dir=os.getenv("CONVERSATION_SPILL_DIR", "data/conversations"))
+        for replicated in (stream.sessions, stream.ingest_cursors, profile.profiles_store, analysis_jobs.session_jobs):
+            replicated.attach(bus)
+        await bus.connect()
+    await conversation_store.open_wal()
+    await http_client.start()
+    realtime_session_pool.start()
+    consultation_recorder.start()
+    try:
+        yield
+    finally:
+        await analysis_jobs.shutdown()
+        await speculative_analysis.shutdown()
+        patient_importer.shutdown()
+        await close_async_client()
+        await realtime_session_pool.close()
+        await consultation_recorder.close()
+        await http_client.close()
+        await conversation_store.close_wal()
+        if bus is not None:
+            await bus.close()
+
+
+app = FastAPI(title="TerraHacks Backend API", lifespan=lifespan)
 
 # Add CORS middleware with more permissive settings
 app.add_middleware(
@@ -31,6 +74,7 @@ app.include_router(openai.router, prefix="/api/openai", tags=["OpenAI"])
 app.include_router(stream.router, prefix="/api/stream", tags=["Streaming"])
 app.include_router(realtime.router, prefix="/api/realtime", tags=["Realtime"])
 app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 @app.get("/")
 def read_root():
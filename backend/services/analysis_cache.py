@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Any, Tuple
+
+from config.prompts import (
+    MEDICAL_ANALYSIS_PROMPT,
+    MEDICAL_ANALYSIS_SYSTEM_PROMPT,
+    MEDICAL_ANALYSIS_UPDATE_PROMPT,
+)
+from services.transcript_record import TranscriptRecord
+
+logger = logging.getLogger(__name__)
+
+# Report fields derived from the report timestamps: never cached or reused, so
+# build_report fills them in for the request at hand
+TIMESTAMPED_FIELDS = ("reportId", "patientId", "consultationDate", "consultationTime", "videoAttachmentName")
+
+# Changes whenever the prompt templates do, so edited prompts never hit stale results
+PROMPT_VERSION = hashlib.sha256(
+    "\0".join((MEDICAL_ANALYSIS_SYSTEM_PROMPT, MEDICAL_ANALYSIS_PROMPT, MEDICAL_ANALYSIS_UPDATE_PROMPT)).encode("utf-8")
+).hexdigest()[:16]
+
+
+def without_timestamped_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in result.items() if key not in TIMESTAMPED_FIELDS}
+
+
+def analysis_cache_key(transcripts: Iterable[TranscriptRecord], profile_context: str, model: str) -> str:
+    """Digest of everything that determines an analysis result.
+
+    Transcript content is whitespace-normalized so retries that differ only in
+    spacing share an entry; seqs and timestamps are left out on purpose.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{PROMPT_VERSION}\0{model}\0".encode("utf-8"))
+    digest.update(profile_context.encode("utf-8"))
+    for transcript in transcripts:
+        digest.update(b"\x1e")
+        digest.update(transcript.role.value.encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(" ".join(transcript.content.split()).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed cache of LLM analysis results.
+
+    Entries are evicted least-recently-used once ``max_bytes`` is exceeded and
+    expire after ``ttl_seconds``. Concurrent misses for the same key share one
+    computation, so a double-clicked finish only pays for one LLM call.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 3600.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (result, size, expires_at), ordered least- to most-recently used
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.inflight_joins = 0
+        self.computed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a key without counting a hit or miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a key, or None; counts a hit or miss"""
+        result = self.peek(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        result = without_timestamped_fields(result)
+        size = len(json.dumps(result, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, size, time.monotonic() + self.ttl_seconds)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached result or compute it once for all concurrent callers.
+
+        ``compute`` may return None for a result that shouldn't be cached
+        (e.g. unparseable LLM output); callers then fall back themselves.
+        Hits and misses are counted by ``get``, which callers use up front.
+        """
+        result = self.peek(key)
+        if result is not None:
+            return result
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.inflight_joins += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.computed += 1
+        try:
+            result = await compute()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                e = RuntimeError("Analysis was cancelled")
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited isn't reported
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if result is not None:
+            self.put(key, result)
+        # Callers that joined get the result without this caller's report ID and date
+        future.set_result(without_timestamped_fields(result) if result is not None else None)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "prompt_version": PROMPT_VERSION,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "inflight": len(self._inflight),
+            "inflight_joins": self.inflight_joins,
+            "computed": self.computed,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Global instance
+analysis_cache = AnalysisCache(
+    max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "3600"))
+)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Any
+from uuid import uuid4
+
+from services.store_bus import ReplicatedDict
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class AnalysisJobQueue:
+    """Async worker pool that runs analysis jobs off the request path"""
+
+    def __init__(self, max_concurrency: int = 4, max_finished_jobs: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Latest job handle per session, replicated so any worker can report it
+        self.session_jobs = ReplicatedDict("analysis_jobs")
+        self._runners: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list = []
+
+    def _ensure_workers(self) -> None:
+        """Start the worker tasks on the running loop if needed"""
+        if self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_concurrency)
+        ]
+        # Re-queue anything submitted before the workers were (re)started
+        for job_id, job in self.jobs.items():
+            if job["status"] == JOB_PENDING:
+                self._queue.put_nowait(job_id)
+        logger.info(f"🧵 Started {self.max_concurrency} analysis workers")
+
+    def _new_job(
+        self,
+        session_id: str,
+        cache_key: Optional[str],
+        report_fields: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return {
+            "job_id": str(uuid4()),
+            "session_id": session_id,
+            "status": JOB_PENDING,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "cache_key": cache_key,
+            # Fixed at submit time so any worker can build the same report the job will
+            "report_fields": report_fields,
+        }
+
+    def submit(
+        self,
+        session_id: str,
+        runner: Callable[[], Awaitable[None]],
+        cache_key: Optional[str] = None,
+        report_fields: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Enqueue an analysis job for a session and return its handle"""
+        self._ensure_workers()
+
+        job = self._new_job(session_id, cache_key, report_fields)
+        job_id = job["job_id"]
+        self.jobs[job_id] = job
+        self._publish(job)
+        self._runners[job_id] = runner
+        self._queue.put_nowait(job_id)
+        logger.info(f"📥 Analysis job {job_id} queued for session {session_id} (queue depth: {self._queue.qsize()})")
+        return dict(job)
+
+    def _publish(self, job: Dict[str, Any]) -> None:
+        self.session_jobs[job["session_id"]] = dict(job)
+
+    def record_done(self, session_id: str, cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """Register an already-finished job, e.g. one answered from the analysis cache"""
+        return self._record_finished(session_id, cache_key, JOB_DONE)
+
+    def record_failed(self, session_id: str, error: str, cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """Register an analysis that failed outside the queue, e.g. a streamed one"""
+        return self._record_finished(session_id, cache_key, JOB_FAILED, error)
+
+    def _record_finished(
+        self,
+        session_id: str,
+        cache_key: Optional[str],
+        status: str,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        job = self._new_job(session_id, cache_key)
+        job["status"] = status
+        job["error"] = error
+        job["started_at"] = job["finished_at"] = job["created_at"]
+        self.jobs[job["job_id"]] = job
+        self._publish(job)
+        self._prune()
+        return dict(job)
+
+    async def _worker(self, index: int) -> None:
+        """Pull jobs off the queue and run them one at a time"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        """Run a single job and record its outcome"""
+        job = self.jobs.get(job_id)
+        runner = self._runners.pop(job_id, None)
+        if job is None or runner is None or job["status"] != JOB_PENDING:
+            return
+
+        job["status"] = JOB_RUNNING
+        job["started_at"] = datetime.now().isoformat()
+        self._publish(job)
+        logger.info(f"⚙️ Running analysis job {job_id} for session {job['session_id']}")
+        try:
+            await runner()
+            job["status"] = JOB_DONE
+            logger.info(f"✅ Analysis job {job_id} completed")
+        except asyncio.CancelledError:
+            job["status"] = JOB_FAILED
+            job["error"] = "cancelled"
+            raise
+        except Exception as e:
+            job["status"] = JOB_FAILED
+            job["error"] = str(e)
+            logger.error(f"❌ Analysis job {job_id} failed: {e}")
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            self._publish(job)
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the retention limit"""
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in (JOB_DONE, JOB_FAILED)
+        ]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            job = self.jobs.pop(job_id)
+            handle = self.session_jobs.get(job["session_id"])
+            if handle is not None and handle["job_id"] == job_id:
+                del self.session_jobs[job["session_id"]]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job handle by ID"""
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def get_session_job(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the most recent job handle for a session, whichever worker runs it"""
+        handle = self.session_jobs.get(session_id)
+        if handle is None:
+            return None
+        return self.get_job(handle["job_id"]) or dict(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and job counts by status"""
+        counts = {JOB_PENDING: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        for job in self.jobs.values():
+            counts[job["status"]] += 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "jobs": counts,
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel the worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+
+# Global instance
+analysis_jobs = AnalysisJobQueue(
+    max_concurrency=int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "4"))
+)
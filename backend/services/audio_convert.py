@@ -0,0 +1,138 @@
+import logging
+from math import gcd
+from typing import Dict, Union, Any
+
+import numpy as np
+
+from services.realtime_audio import PCM16_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_FORMATS = {
+    "f32": np.dtype("<f4"),
+    "s16": np.dtype("<i2"),
+}
+
+
+def lowpass_filter(up: int, down: int, taps_per_phase: int, beta: float = 8.6) -> np.ndarray:
+    """Kaiser-windowed sinc for resampling by up/down, laid out as (up phases, taps_per_phase)"""
+    length = taps_per_phase * up
+    # Cutoff just under the lower Nyquist, in cycles per upsampled sample
+    cutoff = 0.5 / max(up, down) * 0.92
+    m = np.arange(length) - (length - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, beta)
+    # Gain of `up` makes up for the zeros stuffed between input samples
+    h *= up / h.sum()
+    # Phase p holds taps p, p+up, p+2up, ...: the taps that land on real input samples
+    return h.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler; filter history is carried between chunks.
+
+    Each output sample is one dot product of ``taps_per_phase`` input samples
+    with the filter phase it falls on, computed for a whole chunk at once by
+    gathering the input windows into a matrix.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, half_taps: int = 16):
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        # Longer filters when decimating, to keep the transition band narrow
+        self.taps_per_phase = 2 * -(-half_taps * max(self.up, self.down) // self.up)
+        self.phases = lowpass_filter(self.up, self.down, self.taps_per_phase)
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        # Position of the next output, in upsampled samples from the start of history
+        self._position = (self.taps_per_phase - 1) * self.up
+        self._offsets = np.arange(self.taps_per_phase)[::-1]
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        buffer = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        available = len(buffer) * self.up
+        count = max(0, -(-(available - self._position) // self.down))
+        if count == 0:
+            # Too little input for an output sample yet (e.g. a chunk smaller than one frame)
+            out = np.empty(0, dtype=np.float32)
+        elif self.up == 1:
+            # Integer decimation (48 kHz -> 24 kHz): one phase, so a strided view and a matrix-vector product
+            first = self._position - (self.taps_per_phase - 1)
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps_per_phase)
+            out = windows[first:first + count * self.down:self.down] @ self.phases[0][::-1]
+        else:
+            positions = self._position + self.down * np.arange(count)
+            base = positions // self.up
+            # Window of taps_per_phase samples ending at each output's input sample
+            windows = buffer[(base - (self.taps_per_phase - 1))[:, None] + self._offsets[None, :]]
+            out = np.einsum("ij,ij->i", windows, self.phases[positions % self.up])
+
+        consumed = len(buffer) - (self.taps_per_phase - 1)
+        self._history = buffer[consumed:].copy()
+        self._position += count * self.down - consumed * self.up
+        return out
+
+
+class AudioConverter:
+    """Turns captured audio into the Realtime API's 24 kHz mono PCM16.
+
+    Accepts interleaved ``f32`` (-1.0..1.0) or ``s16`` samples at any rate
+    and channel count: channels are averaged, the rate is converted with a
+    streaming polyphase filter, and samples are scaled and clipped to int16.
+    Chunks may split a sample frame; the remainder waits for the next chunk.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        sample_format: str = "f32",
+        target_rate: int = PCM16_SAMPLE_RATE
+    ):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.dtype = SAMPLE_FORMATS[sample_format]
+        self.frame_bytes = self.dtype.itemsize * channels
+        self.resampler = PolyphaseResampler(sample_rate, target_rate) if sample_rate != target_rate else None
+        self._partial = b""
+
+        self.frames_in = 0
+        self.samples_out = 0
+        self.clipped = 0
+
+    def convert(self, data: Union[bytes, np.ndarray]) -> bytes:
+        """Convert one chunk of captured audio; returns PCM16 bytes (possibly empty)"""
+        if isinstance(data, np.ndarray):
+            samples = data.astype(self.dtype, copy=False).reshape(-1)
+        else:
+            if self._partial:
+                data = self._partial + data
+            usable = len(data) // self.frame_bytes * self.frame_bytes
+            self._partial = bytes(data[usable:])
+            samples = np.frombuffer(data, dtype=self.dtype, count=usable // self.dtype.itemsize)
+
+        frames = samples.reshape(-1, self.channels)
+        self.frames_in += len(frames)
+        mono = frames.mean(axis=1, dtype=np.float32) if self.channels > 1 else frames[:, 0].astype(np.float32)
+        if self.sample_format == "f32":
+            mono *= 32767.0
+        if self.resampler is not None:
+            mono = self.resampler.process(mono)
+
+        self.clipped += int(np.count_nonzero((mono > 32767.0) | (mono < -32768.0)))
+        pcm = np.clip(np.rint(mono), -32768, 32767).astype("<i2")
+        self.samples_out += len(pcm)
+        return pcm.tobytes()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "sample_format": self.sample_format,
+            "taps_per_phase": self.resampler.taps_per_phase if self.resampler else 0,
+            "frames_in": self.frames_in,
+            "samples_out": self.samples_out,
+            "clipped": self.clipped,
+        }
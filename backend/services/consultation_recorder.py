@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import struct
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Tuple
+
+from services.realtime_audio import PCM16_BYTES_PER_SAMPLE, PCM16_SAMPLE_RATE, pcm16_bytes
+
+logger = logging.getLogger(__name__)
+
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".wav"
+RECORDING_NAME = "consultation.wav"
+RECORDING_ID_RE = re.compile(r"^[0-9a-f]{16}-[0-9]+$")
+
+
+def wav_header(data_bytes: int, sample_rate: int = PCM16_SAMPLE_RATE, channels: int = 1) -> bytes:
+    block_align = channels * PCM16_BYTES_PER_SAMPLE
+    return WAV_HEADER.pack(
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, PCM16_BYTES_PER_SAMPLE * 8,
+        b"data", data_bytes
+    )
+
+
+class SessionRecording:
+    """One consultation's audio: a fixed set of buffers in memory, WAV segments on disk.
+
+    ``write`` fills the current buffer and hands full ones to the recorder's
+    writer; the writer returns them once they're on disk. If the disk falls
+    so far behind that every buffer is in flight, audio is dropped (and
+    counted) rather than letting memory grow.
+    """
+
+    def __init__(self, recorder: "ConsultationRecorder", session_id: str, recording_id: str):
+        self.recorder = recorder
+        self.session_id = session_id
+        self.recording_id = recording_id
+        self.directory = os.path.join(recorder.directory, recording_id)
+        self._free: Deque[bytearray] = deque(bytearray(recorder.buffer_bytes) for _ in range(recorder.buffers))
+        self._current = self._free.popleft()
+        self._filled = 0
+        self.closed = False
+
+        # Writer-thread state
+        self._file = None
+        self._segment_index = 0
+        self._segment_bytes = 0
+
+        self.bytes_recorded = 0
+        self.bytes_dropped = 0
+
+    def write(self, pcm: bytes) -> None:
+        if self.closed:
+            return
+        data = memoryview(pcm).cast("B")
+        while data:
+            if self._current is None:
+                if not self._free:
+                    self.bytes_dropped += len(data)
+                    return
+                self._current = self._free.popleft()
+            n = min(len(data), len(self._current) - self._filled)
+            self._current[self._filled:self._filled + n] = data[:n]
+            self._filled += n
+            self.bytes_recorded += n
+            data = data[n:]
+            if self._filled == len(self._current):
+                self._hand_off()
+
+    def _hand_off(self) -> None:
+        if self._current is not None and self._filled:
+            self.recorder._queue.put_nowait((self, self._current, self._filled))
+            self._current = None
+            self._filled = 0
+
+    # Writer thread
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{index:04d}{SEGMENT_SUFFIX}")
+
+    def _close_segment(self) -> None:
+        """Patch the sizes into the segment's header, so each closed segment is a playable WAV"""
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(wav_header(self._segment_bytes))
+        self._file.close()
+        self._file = None
+
+    def _write_buffer(self, buffer: bytearray, length: int) -> None:
+        view = memoryview(buffer)[:length]
+        while view:
+            if self._file is None or self._segment_bytes >= self.recorder.segment_bytes:
+                self._close_segment()
+                os.makedirs(self.directory, exist_ok=True)
+                self._segment_index += 1
+                self._file = open(self._segment_path(self._segment_index), "wb")
+                self._file.write(wav_header(0))
+                self._segment_bytes = 0
+            n = min(len(view), self.recorder.segment_bytes - self._segment_bytes)
+            self._file.write(view[:n])
+            self._segment_bytes += n
+            view = view[n:]
+
+    def _finalize(self) -> Optional[str]:
+        """Join the segments into one WAV, streaming file to file"""
+        self._close_segment()
+        segments = [self._segment_path(index) for index in range(1, self._segment_index + 1)]
+        if not segments:
+            return None
+        path = os.path.join(self.directory, RECORDING_NAME)
+        data_bytes = sum(os.path.getsize(segment) - WAV_HEADER.size for segment in segments)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(wav_header(data_bytes))
+            for segment in segments:
+                with open(segment, "rb") as f:
+                    f.seek(WAV_HEADER.size)
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+        os.replace(tmp_path, path)
+        for segment in segments:
+            os.remove(segment)
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bytes_recorded": self.bytes_recorded,
+            "bytes_dropped": self.bytes_dropped,
+            "seconds": round(self.bytes_recorded / pcm16_bytes(1000), 1),
+            "segments": self._segment_index,
+        }
+
+
+class ConsultationRecorder:
+    """Tees consultation audio into WAV segment files, one directory per recording.
+
+    Every session gets ``buffers`` buffers of ``buffer_ms`` audio, so memory
+    per session is constant however long the consultation runs. A single
+    background writer drains full buffers to disk in a worker thread, rolling
+    segments every ``segment_seconds``; ``finalize`` joins them into
+    ``consultation.wav``.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        enabled: bool = False,
+        buffer_ms: int = 1000,
+        buffers: int = 3,
+        segment_seconds: int = 60
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.buffer_bytes = pcm16_bytes(buffer_ms)
+        self.buffers = buffers
+        self.segment_bytes = pcm16_bytes(segment_seconds * 1000)
+        self.recordings: Dict[str, SessionRecording] = {}
+        # IDs of stopped recordings not yet claimed by a report, by session
+        self._finalized: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self.buffers_written = 0
+        self.bytes_written = 0
+        self.recordings_finalized = 0
+        # Audio dropped by finalized recordings; active ones are added in stats()
+        self.bytes_dropped = 0
+
+    def recording_path(self, recording_id: str) -> Optional[str]:
+        """Path of a finalized recording, or None for an unknown or malformed ID"""
+        if not RECORDING_ID_RE.match(recording_id):
+            return None
+        path = os.path.join(self.directory, recording_id, RECORDING_NAME)
+        return path if os.path.exists(path) else None
+
+    def start(self) -> None:
+        if not self.enabled or self._writer is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        logger.info(f"🎙️ Consultation recorder writing to {self.directory}")
+
+    async def close(self) -> None:
+        """Finalize every open recording and stop the writer"""
+        if self._writer is None:
+            return
+        for session_id in list(self.recordings):
+            await self.finalize(session_id)
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
+
+    def open(self, session_id: str) -> Optional[SessionRecording]:
+        """The session's recording, started on first use; None when recording is off"""
+        if self._writer is None:
+            return None
+        recording = self.recordings.get(session_id)
+        if recording is None:
+            # Session IDs get reused ("default"), so every recording gets its own directory;
+            # hashed, so arbitrary session IDs are safe in a path
+            digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:16]
+            recording = SessionRecording(self, session_id, f"{digest}-{time.time_ns()}")
+            self.recordings[session_id] = recording
+            self._finalized.pop(session_id, None)
+        return recording
+
+    def stop(self, session_id: str) -> Optional[asyncio.Future]:
+        """Stop recording the session and queue the join into one WAV.
+
+        The recording ID is claimable right away; the returned future resolves
+        once ``consultation.wav`` is on disk.
+        """
+        recording = self.recordings.pop(session_id, None)
+        if recording is None:
+            return None
+        recording._hand_off()
+        recording.closed = True
+        self.bytes_dropped += recording.bytes_dropped
+        if recording.bytes_recorded:
+            self._finalized[session_id] = recording.recording_id
+        done = asyncio.get_running_loop().create_future()
+        done.add_done_callback(lambda future: self._on_finalized(recording, future))
+        self._queue.put_nowait((recording, None, done))
+        return done
+
+    async def finalize(self, session_id: str) -> None:
+        """Stop recording the session and wait until its segments are joined"""
+        done = self.stop(session_id)
+        if done is not None:
+            await done
+
+    def _on_finalized(self, recording: SessionRecording, future: asyncio.Future) -> None:
+        self.recordings_finalized += 1
+        error = "cancelled" if future.cancelled() else future.exception()
+        if error is not None:
+            logger.error(f"❌ Could not finalize recording {recording.recording_id}: {error}")
+            return
+        logger.info(f"🎙️ Recording finalized for {recording.session_id}: {recording.stats()}")
+
+    def claim(self, session_id: str) -> Optional[str]:
+        """ID of the session's stopped recording, handed out once so a reused session ID can't inherit it"""
+        return self._finalized.pop(session_id, None)
+
+    async def _write_loop(self) -> None:
+        while True:
+            # Everything queued so far goes to the worker thread in one hop
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            results = await asyncio.to_thread(self._write_batch, batch)
+            for (recording, buffer, arg), result in zip(batch, results):
+                if buffer is not None:
+                    if not isinstance(result, Exception):
+                        self.buffers_written += 1
+                        self.bytes_written += arg
+                elif not arg.done():
+                    if isinstance(result, Exception):
+                        arg.set_exception(result)
+                    else:
+                        arg.set_result(result)
+
+    def _write_batch(self, batch: List[Tuple[SessionRecording, Optional[bytearray], Any]]) -> List[Any]:
+        """Worker thread: write buffers and finalize recordings in queue order"""
+        results: List[Any] = []
+        for recording, buffer, arg in batch:
+            try:
+                if buffer is None:
+                    results.append(recording._finalize())
+                else:
+                    results.append(recording._write_buffer(buffer, arg))
+            except Exception as e:
+                logger.error(f"❌ Recording write failed for {recording.session_id}: {e}")
+                results.append(e)
+            finally:
+                # Back in the session's pool right away (deque appends are thread-safe)
+                if buffer is not None:
+                    recording._free.append(buffer)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active_recordings": len(self.recordings),
+            "queued_buffers": self._queue.qsize() if self._queue else 0,
+            "buffer_bytes": self.buffer_bytes,
+            "buffers_per_session": self.buffers,
+            "buffers_written": self.buffers_written,
+            "bytes_written": self.bytes_written,
+            "bytes_dropped": self.bytes_dropped + sum(recording.bytes_dropped for recording in self.recordings.values()),
+            "recordings_finalized": self.recordings_finalized,
+        }
+
+
+# Global instance
+consultation_recorder = ConsultationRecorder(
+    os.getenv("CONSULTATION_RECORDING_DIR", "data/recordings"),
+    enabled=os.getenv("CONSULTATION_RECORDING", "0") == "1",
+    buffer_ms=int(os.getenv("CONSULTATION_RECORDING_BUFFER_MS", "1000")),
+    segment_seconds=int(os.getenv("CONSULTATION_RECORDING_SEGMENT_SECONDS", "60"))
+)
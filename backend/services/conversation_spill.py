@@ -0,0 +1,55 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSpillStore:
+    """On-disk home for conversations evicted from memory.
+
+    Each conversation is written as one JSON file named after a hash of its
+    session ID, so lookups need no in-memory index and arbitrary session IDs
+    are safe as file names.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, session_id: str) -> str:
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def exists(self, session_id: str) -> bool:
+        return os.path.exists(self.path(session_id))
+
+    def write(self, conversation: Dict[str, Any]) -> int:
+        """Atomically write a conversation to disk and return the bytes written"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(conversation["session_id"])
+        data = json.dumps(conversation, separators=(",", ":")).encode("utf-8")
+        # Per-process temp name: several workers may spill the same session
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def read(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a spilled conversation, or None if it isn't on disk"""
+        try:
+            with open(self.path(session_id), "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"❌ Failed to read spilled conversation {session_id}: {e}")
+            return None
+
+    def delete(self, session_id: str) -> None:
+        try:
+            os.remove(self.path(session_id))
+        except FileNotFoundError:
+            pass
@@ -1,90 +1,474 @@
+import asyncio
 import json
+from bisect import bisect_right
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from uuid import uuid4
-import asyncio
+from typing import Dict, List, Optional, Tuple, Any
+import os
+
+from services.conversation_spill import ConversationSpillStore
+from services.transcript_fanout import TranscriptSubscriber, POLICY_DROP_OLDEST
+from services.transcript_record import ROLE_BY_VALUE, TranscriptRecord
+from services.transcript_wal import (
+    TranscriptWAL,
+    OP_CREATE,
+    OP_TRANSCRIPT,
+    OP_END,
+    OP_ANALYSIS,
+    encode_json,
+    encode_transcript,
+)
 
 logger = logging.getLogger(__name__)
 
+# Rough per-entry cost of a TranscriptRecord (slots, seq, timestamp) on top of its content
+TRANSCRIPT_OVERHEAD_BYTES = 160
+SESSION_OVERHEAD_BYTES = 1000
+
+
+class RetentionPolicy:
+    """Limits on what the conversation store keeps resident in memory.
+
+    Only ended sessions are ever evicted; active sessions stay resident even
+    if that means exceeding the limits. Without a spill store nothing is
+    evicted, since an evicted session would be gone for good.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 256 * 1024 * 1024, idle_ttl_seconds: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+
 
 class ConversationStore:
     """In-memory storage for conversation transcripts"""
     
-    def __init__(self):
-        self.conversations: Dict[str, Dict[str, Any]] = {}
-        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+    def __init__(
+        self,
+        subscriber_policy: str = POLICY_DROP_OLDEST,
+        subscriber_buffer: int = 100,
+        retention: Optional[RetentionPolicy] = None,
+        spill_dir: Optional[str] = None,
+        wal: Optional[TranscriptWAL] = None
+    ):
+        # Ordered least- to most-recently used
+        self.conversations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.subscribers: Dict[str, List[TranscriptSubscriber]] = {}
+        self.subscriber_policy = subscriber_policy
+        self.subscriber_buffer = subscriber_buffer
+        self.retention = retention or RetentionPolicy()
+        self.spill = ConversationSpillStore(spill_dir) if spill_dir else None
+        self.wal = wal
+        self.bus = None
+        self._compaction: Optional[asyncio.Task] = None
+        self._last_access: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.reloads = 0
+        
+    def _touch(self, session_id: str) -> None:
+        """Mark a resident session as most recently used"""
+        self.conversations.move_to_end(session_id)
+        self._last_access[session_id] = time.monotonic()
+    
+    def _account(self, session_id: str, delta: int) -> None:
+        self._sizes[session_id] = self._sizes.get(session_id, 0) + delta
+        self.resident_bytes += delta
+    
+    def _estimate_size(self, conversation: Dict[str, Any]) -> int:
+        size = SESSION_OVERHEAD_BYTES
+        for transcript in conversation.get("transcripts", []):
+            size += TRANSCRIPT_OVERHEAD_BYTES + len(transcript.content)
+        if conversation.get("analysis"):
+            size += len(json.dumps(conversation["analysis"]))
+        return size
+    
+    def _resident(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a conversation, reloading it from disk if it was spilled"""
+        conversation = self.conversations.get(session_id)
+        if conversation is None and self.spill is not None:
+            conversation = self.spill.read(session_id)
+            if conversation is not None:
+                conversation["transcripts"] = [
+                    TranscriptRecord.from_row(session_id, row) for row in conversation["transcripts"]
+                ]
+                self.conversations[session_id] = conversation
+                self._account(session_id, self._estimate_size(conversation))
+                # The spill file stays as the durable copy once the WAL is compacted
+                self.reloads += 1
+                logger.info(f"📂 Reloaded spilled conversation: {session_id}")
+                self._touch(session_id)
+                self.enforce_retention(keep=session_id)
+                return conversation
+        if conversation is not None:
+            self._touch(session_id)
+        return conversation
+    
+    def _evict(self, session_id: str) -> None:
+        """Move an ended session out of memory, spilling it to disk if configured"""
+        conversation = self.conversations.pop(session_id)
+        if self.spill is not None:
+            self.spill.write(self._spill_row_form(conversation))
+        self.resident_bytes -= self._sizes.pop(session_id, 0)
+        self._last_access.pop(session_id, None)
+        if not self.subscribers.get(session_id):
+            self.subscribers.pop(session_id, None)
+        self.evictions += 1
+        logger.info(f"💾 Evicted ended conversation: {session_id}")
+    
+    def enforce_retention(self, keep: Optional[str] = None) -> int:
+        """Evict ended sessions that are idle past the TTL or over the size limits"""
+        # Nowhere to spill to, or a bus replica whose evictions only the broker could undo
+        if self.spill is None or self.bus is not None:
+            return 0
+        now = time.monotonic()
+        policy = self.retention
+        evicted = 0
+        # Walk from least recently used; once we're within limits and reach a
+        # session that isn't idle, nothing after it is idle either
+        for session_id in list(self.conversations.keys()):
+            over_limits = (
+                len(self.conversations) > policy.max_sessions
+                or self.resident_bytes > policy.max_bytes
+            )
+            idle = now - self._last_access.get(session_id, now) > policy.idle_ttl_seconds
+            if not over_limits and not idle:
+                break
+            if session_id == keep or self.conversations[session_id].get("is_active"):
+                continue
+            self._evict(session_id)
+            evicted += 1
+        return evicted
+    
+    def retention_stats(self) -> Dict[str, Any]:
+        """Resident size and eviction counters"""
+        active = sum(1 for c in self.conversations.values() if c.get("is_active"))
+        return {
+            "resident_sessions": len(self.conversations),
+            "active_sessions": active,
+            "resident_bytes": self.resident_bytes,
+            "max_sessions": self.retention.max_sessions,
+            "max_bytes": self.retention.max_bytes,
+            "idle_ttl_seconds": self.retention.idle_ttl_seconds,
+            "evictions": self.evictions,
+            "reloads": self.reloads,
+            "spill_dir": self.spill.directory if self.spill else None,
+        }
+        
+    def _log(self, payload: bytes) -> Optional[asyncio.Future]:
+        """Publish a record to the store bus, or append it to the WAL if one is configured"""
+        if self.bus is not None:
+            return self.bus.publish(payload)
+        if self.wal is None:
+            return None
+        return self.wal.append(payload)
+    
+    def _log_nowait(self, payload: bytes, session_id: str) -> None:
+        """Log a record from a sync caller; failures are logged rather than lost with the future"""
+        durable = self._log(payload)
+        if durable is None:
+            return
+        
+        def check(future: asyncio.Future) -> None:
+            error = "cancelled" if future.cancelled() else future.exception()
+            if error is not None:
+                logger.error(f"❌ Conversation record for {session_id} was not persisted: {error}")
+        
+        durable.add_done_callback(check)
+    
+    def _spill_row_form(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **conversation,
+            "transcripts": [transcript.to_row() for transcript in conversation["transcripts"]]
+        }
+    
+    def apply_record(self, op: int, body: Any) -> Optional[TranscriptRecord]:
+        """Apply one WAL or bus record to memory without logging or notifying.
+
+        Records are idempotent, so replaying one twice is harmless. A transcript
+        with seq 0 has not been ordered yet and gets the next seq. Returns the
+        transcript if one was appended.
+        """
+        if op == OP_TRANSCRIPT:
+            session_id, seq, role, content, timestamp_ns = body
+            conversation = self.conversations.get(session_id) or self._resident(session_id)
+            if conversation is None:
+                conversation = self._new_conversation(session_id, datetime.fromtimestamp(timestamp_ns / 1e9).isoformat())
+            if seq == 0:
+                seq = conversation["last_seq"] + 1
+            elif seq <= conversation["last_seq"]:
+                return None
+            transcript = TranscriptRecord(conversation["session_id"], seq, ROLE_BY_VALUE[role], content, timestamp_ns)
+            conversation["transcripts"].append(transcript)
+            conversation["last_seq"] = seq
+            self._account(session_id, TRANSCRIPT_OVERHEAD_BYTES + len(content))
+            return transcript
+        
+        session_id = body["session_id"]
+        conversation = self.conversations.get(session_id) or self._resident(session_id)
+        if op == OP_CREATE:
+            if conversation is None:
+                self._new_conversation(session_id, body["start_time"])
+        elif conversation is None:
+            logger.warning(f"⚠️ WAL record for unknown session {session_id}, skipping")
+        elif op == OP_END:
+            conversation["end_time"] = body["end_time"]
+            conversation["is_active"] = False
+            conversation["duration_seconds"] = body["duration_seconds"]
+        elif op == OP_ANALYSIS:
+            previous = conversation.get("analysis")
+            conversation["analysis"] = body["analysis"]
+            delta = len(json.dumps(body["analysis"])) - (len(json.dumps(previous)) if previous else 0)
+            self._account(session_id, delta)
+        return None
+    
+    def on_bus_record(self, op: int, body: Any) -> None:
+        """Apply a record ordered by the store broker and fan out new transcripts"""
+        transcript = self.apply_record(op, body)
+        if transcript is not None:
+            self._notify_subscribers(transcript.session_id, transcript)
+        self.enforce_retention()
+    
+    def attach_bus(self, bus, spill_dir: Optional[str] = None) -> None:
+        """Replicate this store through a StoreBus; the broker then owns the WAL and eviction.
+
+        Replicas never evict. Sessions the broker has spilled are not in its
+        snapshot, so they are read from its ``spill_dir`` on a local miss.
+        """
+        self.bus = bus
+        self.wal = None
+        if spill_dir:
+            self.spill = ConversationSpillStore(spill_dir)
+        bus.register_store(self)
+    
+    def snapshot_records(self, spill_ended: bool = True) -> List[bytes]:
+        """Records that rebuild the resident store.
+
+        With ``spill_ended`` ended sessions are written to the spill store
+        instead of being emitted, which is what WAL compaction wants.
+        """
+        records = []
+        for session_id, conversation in self.conversations.items():
+            if spill_ended and not conversation.get("is_active") and self.spill is not None:
+                self.spill.write(self._spill_row_form(conversation))
+                continue
+            records.append(encode_json(OP_CREATE, {
+                "session_id": session_id,
+                "start_time": conversation["start_time"]
+            }))
+            for transcript in conversation["transcripts"]:
+                records.append(encode_transcript(
+                    session_id, transcript.seq, transcript.role.value, transcript.content, transcript.timestamp_ns
+                ))
+            if not conversation.get("is_active"):
+                records.append(encode_json(OP_END, {
+                    "session_id": session_id,
+                    "end_time": conversation["end_time"],
+                    "duration_seconds": conversation.get("duration_seconds")
+                }))
+            if conversation.get("analysis") is not None:
+                records.append(encode_json(OP_ANALYSIS, {
+                    "session_id": session_id,
+                    "analysis": conversation["analysis"]
+                }))
+        return records
+    
+    async def open_wal(self) -> None:
+        """Rebuild the store from the WAL, compact it and start logging"""
+        if self.wal is None:
+            return
+        started = time.perf_counter()
+        count = 0
+        for op, body in self.wal.replay():
+            self.apply_record(op, body)
+            count += 1
+        self.enforce_retention()
+        logger.info(f"📝 Replayed {count} WAL records into {len(self.conversations)} sessions in {time.perf_counter() - started:.2f}s")
+        await self.wal.start()
+        if count:
+            await self.wal.compact(self.snapshot_records)
+    
+    async def close_wal(self) -> None:
+        """Flush and close the WAL"""
+        if self.wal is None:
+            return
+        if self._compaction is not None:
+            await asyncio.gather(self._compaction, return_exceptions=True)
+        await self.wal.close()
+    
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once enough segments have rolled over"""
+        if self.wal is None or not self.wal.needs_compaction:
+            return
+        if self._compaction is not None and not self._compaction.done():
+            return
+        self._compaction = asyncio.create_task(self.wal.compact(self.snapshot_records))
+    
+    def wal_stats(self) -> Optional[Dict[str, Any]]:
+        return self.wal.stats() if self.wal else None
+    
+    def _new_conversation(self, session_id: str, start_time: str) -> Dict[str, Any]:
+        conversation = {
+            "session_id": session_id,
+            "start_time": start_time,
+            "end_time": None,
+            "transcripts": [],
+            "last_seq": 0,
+            "is_active": True
+        }
+        self.conversations[session_id] = conversation
+        self.subscribers.setdefault(session_id, [])
+        self._last_access[session_id] = time.monotonic()
+        self._account(session_id, SESSION_OVERHEAD_BYTES)
+        return conversation
         
     def create_session(self, session_id: str) -> None:
         """Initialize a new conversation session"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = {
+        if self._resident(session_id) is None:
+            conversation = self._new_conversation(session_id, datetime.now().isoformat())
+            self._log_nowait(encode_json(OP_CREATE, {
                 "session_id": session_id,
-                "start_time": datetime.now().isoformat(),
-                "end_time": None,
-                "transcripts": [],
-                "is_active": True
-            }
-            self.subscribers[session_id] = []
+                "start_time": conversation["start_time"]
+            }), session_id)
             logger.info(f"Created new conversation session: {session_id}")
+            self.enforce_retention()
             
     async def add_transcript(self, session_id: str, role: str, content: str) -> None:
         """Add a transcript entry to the conversation"""
         logger.info(f"📋 Adding transcript for session {session_id}: [{role.upper()}] {content}")
         
-        if session_id not in self.conversations:
+        if self._resident(session_id) is None:
             logger.info(f"📋 Session {session_id} not found, creating new session")
             self.create_session(session_id)
+        
+        if self.bus is not None:
+            # The broker assigns the seq; our copy is appended and fanned out
+            # when its echo comes back through on_bus_record
+            await self.bus.publish(encode_transcript(session_id, 0, role, content, time.time_ns()))
+            logger.info(f"✅ Transcript saved via store bus: [{role.upper()}] {content}")
+            return
             
-        transcript_entry = {
-            "id": str(uuid4()),
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "session_id": session_id
-        }
+        conversation = self.conversations[session_id]
+        conversation["last_seq"] += 1
+        transcript_entry = TranscriptRecord.create(
+            conversation["session_id"], conversation["last_seq"], role, content
+        )
+        
+        conversation["transcripts"].append(transcript_entry)
+        self._account(session_id, TRANSCRIPT_OVERHEAD_BYTES + len(content))
+        transcript_count = len(conversation["transcripts"])
         
-        self.conversations[session_id]["transcripts"].append(transcript_entry)
-        transcript_count = len(self.conversations[session_id]["transcripts"])
+        # Wait for the group commit so the transcript survives a crash
+        durable = self._log(encode_transcript(
+            session_id, transcript_entry.seq, role, content, transcript_entry.timestamp_ns
+        ))
+        if durable is not None:
+            await durable
         
         # Log to console for debugging
         logger.info(f"✅ Transcript saved (#{transcript_count}): [{role.upper()}] {content}")
         
         # Notify all subscribers
-        await self._notify_subscribers(session_id, transcript_entry)
+        self._notify_subscribers(session_id, transcript_entry)
         logger.debug(f"📡 Notified subscribers for session {session_id}")
         
-    async def _notify_subscribers(self, session_id: str, transcript: Dict[str, Any]) -> None:
-        """Notify all WebSocket subscribers of new transcript"""
-        if session_id in self.subscribers:
-            subscriber_count = len(self.subscribers[session_id])
-            logger.debug(f"📡 Notifying {subscriber_count} subscribers for session {session_id}")
-            for i, queue in enumerate(self.subscribers[session_id]):
-                try:
-                    await queue.put(transcript)
-                    logger.debug(f"📡 Notified subscriber {i+1}/{subscriber_count}")
-                except asyncio.QueueFull:
-                    logger.warning(f"⚠️ Subscriber queue full for session {session_id}, subscriber {i+1}")
-        else:
-            logger.warning(f"⚠️ No subscribers found for session {session_id}")
+        self.enforce_retention()
+        self._maybe_compact()
+        
+    async def add_transcripts(self, session_id: str, entries: List[Tuple[str, str]]) -> int:
+        """Add (role, content) entries in order with one durability wait and one
+        subscriber notification for the whole batch; returns the number added"""
+        if not entries:
+            return 0
+        
+        if self._resident(session_id) is None:
+            logger.info(f"📋 Session {session_id} not found, creating new session")
+            self.create_session(session_id)
+        
+        if self.bus is not None:
+            # The broker orders and echoes each record; they fan out as they arrive
+            await asyncio.gather(*(
+                self.bus.publish(encode_transcript(session_id, 0, role, content, time.time_ns()))
+                for role, content in entries
+            ))
+            logger.info(f"✅ Saved batch of {len(entries)} transcripts via store bus for session {session_id}")
+            return len(entries)
+        
+        conversation = self.conversations[session_id]
+        batch = []
+        durable = None
+        for role, content in entries:
+            conversation["last_seq"] += 1
+            transcript_entry = TranscriptRecord.create(
+                conversation["session_id"], conversation["last_seq"], role, content
+            )
+            conversation["transcripts"].append(transcript_entry)
+            self._account(session_id, TRANSCRIPT_OVERHEAD_BYTES + len(content))
+            durable = self._log(encode_transcript(
+                session_id, transcript_entry.seq, role, content, transcript_entry.timestamp_ns
+            )) or durable
+            batch.append(transcript_entry)
+        
+        # WAL batches flush in order, so the last record being durable covers the rest
+        if durable is not None:
+            await durable
+        
+        logger.info(f"✅ Saved batch of {len(batch)} transcripts for session {session_id} (#{batch[0].seq}-#{batch[-1].seq})")
+        self._notify_subscribers(session_id, batch)
+        
+        self.enforce_retention()
+        self._maybe_compact()
+        return len(batch)
+        
+    def _notify_subscribers(self, session_id: str, transcript: Any) -> None:
+        """Fan a transcript, or a list of transcripts from one batch, out to all
+        WebSocket subscribers without blocking"""
+        subscribers = self.subscribers.get(session_id)
+        if not subscribers:
+            logger.debug(f"📡 No subscribers for session {session_id}")
+            return
+        
+        logger.debug(f"📡 Notifying {len(subscribers)} subscribers for session {session_id}")
+        for subscriber in list(subscribers):
+            if not subscriber.offer(transcript):
+                # Slow consumer was disconnected by its policy
+                self.unsubscribe(session_id, subscriber)
                     
-    def subscribe(self, session_id: str) -> asyncio.Queue:
+    def subscribe(self, session_id: str, policy: Optional[str] = None, maxsize: Optional[int] = None) -> TranscriptSubscriber:
         """Subscribe to transcript updates for a session"""
         if session_id not in self.subscribers:
             self.subscribers[session_id] = []
             
-        queue = asyncio.Queue(maxsize=100)
-        self.subscribers[session_id].append(queue)
-        return queue
+        subscriber = TranscriptSubscriber(
+            session_id,
+            policy=policy or self.subscriber_policy,
+            maxsize=maxsize or self.subscriber_buffer
+        )
+        self.subscribers[session_id].append(subscriber)
+        return subscriber
         
-    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+    def unsubscribe(self, session_id: str, subscriber: TranscriptSubscriber) -> None:
         """Unsubscribe from transcript updates"""
-        if session_id in self.subscribers and queue in self.subscribers[session_id]:
-            self.subscribers[session_id].remove(queue)
+        if session_id in self.subscribers and subscriber in self.subscribers[session_id]:
+            self.subscribers[session_id].remove(subscriber)
+        subscriber.close()
+    
+    def subscriber_stats(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-subscriber lag counters, optionally for one session"""
+        if session_id is not None:
+            return [subscriber.stats() for subscriber in self.subscribers.get(session_id, [])]
+        return [
+            subscriber.stats()
+            for subscribers in self.subscribers.values()
+            for subscriber in subscribers
+        ]
             
     def end_session(self, session_id: str) -> None:
         """Mark a conversation session as ended"""
-        if session_id in self.conversations:
+        if self._resident(session_id) is not None:
             self.conversations[session_id]["end_time"] = datetime.now().isoformat()
             self.conversations[session_id]["is_active"] = False
             
@@ -93,28 +477,69 @@ class ConversationStore:
             end = datetime.fromisoformat(self.conversations[session_id]["end_time"])
             duration = (end - start).total_seconds()
             self.conversations[session_id]["duration_seconds"] = duration
+            self._log_nowait(encode_json(OP_END, {
+                "session_id": session_id,
+                "end_time": self.conversations[session_id]["end_time"],
+                "duration_seconds": duration
+            }), session_id)
             
             logger.info(f"Ended conversation session: {session_id} (duration: {duration}s)")
+            self.enforce_retention()
             
     def get_conversation(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get a complete conversation by session ID"""
-        return self.conversations.get(session_id)
+        return self._resident(session_id)
+    
+    def transcripts_since(self, session_id: str, since: int = 0) -> List[TranscriptRecord]:
+        """Transcripts with seq greater than ``since``, oldest first"""
+        conversation = self._resident(session_id)
+        if conversation is None:
+            return []
+        transcripts = conversation["transcripts"]
+        return transcripts[bisect_right(transcripts, since, key=lambda transcript: transcript.seq):]
     
     def store_analysis(self, session_id: str, analysis_result: Dict[str, Any]) -> None:
         """Store analysis results for a session"""
-        if session_id in self.conversations:
-            self.conversations[session_id]["analysis"] = analysis_result
+        conversation = self._resident(session_id)
+        if conversation is not None:
+            previous = conversation.get("analysis")
+            conversation["analysis"] = analysis_result
+            self._log_nowait(encode_json(OP_ANALYSIS, {
+                "session_id": session_id,
+                "analysis": analysis_result
+            }), session_id)
+            delta = len(json.dumps(analysis_result)) - (len(json.dumps(previous)) if previous else 0)
+            self._account(session_id, delta)
             logger.info(f"Analysis stored for session: {session_id}")
+            self.enforce_retention()
     
     def get_analysis(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis results for a session"""
-        conversation = self.conversations.get(session_id)
+        conversation = self._resident(session_id)
         if conversation:
             return conversation.get("analysis")
         return None
-        
-            
 
 
 # Global instance
-conversation_store = ConversationStore()
\ No newline at end of file
+conversation_store = ConversationStore(
+    subscriber_policy=os.getenv("TRANSCRIPT_SUBSCRIBER_POLICY", POLICY_DROP_OLDEST),
+    subscriber_buffer=int(os.getenv("TRANSCRIPT_SUBSCRIBER_BUFFER", "100")),
+    retention=RetentionPolicy(
+        max_sessions=int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000")),
+        max_bytes=int(os.getenv("CONVERSATION_MAX_BYTES", str(256 * 1024 * 1024))),
+        idle_ttl_seconds=float(os.getenv("CONVERSATION_IDLE_TTL_SECONDS", "3600"))
+    ),
+    # Spilling to disk and the WAL are opt-in; retention eviction only runs with spilling on
+    spill_dir=(
+        os.getenv("CONVERSATION_SPILL_DIR", "data/conversations")
+        if os.getenv("CONVERSATION_SPILL", "0") == "1" else None
+    ),
+    wal=TranscriptWAL(
+        os.getenv("CONVERSATION_WAL_DIR", "data/wal"),
+        segment_bytes=int(os.getenv("WAL_SEGMENT_BYTES", str(64 * 1024 * 1024))),
+        flush_interval=float(os.getenv("WAL_FLUSH_INTERVAL_MS", "2")) / 1000,
+        sync=os.getenv("WAL_FSYNC", "1") == "1",
+        compact_every_segments=int(os.getenv("WAL_COMPACT_EVERY_SEGMENTS", "8"))
+    ) if os.getenv("CONVERSATION_WAL", "0") == "1" else None
+)
\ No newline at end of file
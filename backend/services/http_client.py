@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Any, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent traffic so retries can't snowball.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one, with
+    a small floor of ``min_retries_per_second`` so a quiet process can still
+    retry the odd failure.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens * ratio
+        self._last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_retries_per_second)
+
+    def deposit(self) -> None:
+        """Record a request"""
+        self._refill()
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Take a retry token if one is available"""
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+class HTTPClient:
+    """Shared outbound HTTP client with per-host keep-alive pools.
+
+    One ``aiohttp.ClientSession`` is opened for the app's lifetime so calls to
+    OpenAI and Supabase reuse pooled connections and cached DNS lookups instead
+    of paying a fresh TCP + TLS handshake per request.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        retry_budget: Optional[RetryBudget] = None
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout or aiohttp.ClientTimeout(total=30, connect=5)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.retry_budget = retry_budget or RetryBudget()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, int] = defaultdict(int)
+        self._host_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._in_flight = 0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Trace hooks feeding the connection/DNS counters"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._in_flight += 1
+
+        async def on_request_finished(session, ctx, params):
+            self._in_flight -= 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self._stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._stats["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self._stats["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self._stats["dns_cache_misses"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_finished)
+        trace_config.on_request_exception.append(on_request_finished)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    async def start(self) -> None:
+        """Open the pooled session"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            trace_configs=[self._trace_config()]
+        )
+        logger.info(f"🌐 HTTP client pool started (limit={self.limit}, per host={self.limit_per_host})")
+
+    async def close(self) -> None:
+        """Close the pooled session and its connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.info("🌐 HTTP client pool closed")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("HTTP client not started")
+        return self._session
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        timeout: Union[aiohttp.ClientTimeout, float, None] = None,
+        retries: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request over the shared pool, retrying transient failures.
+
+        Connection failures are retried for any method (nothing reached the
+        server); 502/503/504 responses and mid-request disconnects only for
+        idempotent methods. Retries are bounded by ``retries`` and the shared
+        retry budget.
+        """
+        if self._session is None or self._session.closed:
+            await self.start()
+
+        method = method.upper()
+        if isinstance(timeout, (int, float)):
+            timeout = aiohttp.ClientTimeout(total=timeout)
+        max_retries = self.max_retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS
+        host = urlsplit(url).netloc
+        host_stats = self._host_stats[host]
+
+        attempt = 0
+        while True:
+            self.retry_budget.deposit()
+            self._stats["requests"] += 1
+            host_stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                response = await self._session.request(
+                    method, url, timeout=timeout or self.timeout, **kwargs
+                )
+            except (aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError, asyncio.TimeoutError) as e:
+                host_stats["errors"] += 1
+                retryable = isinstance(e, aiohttp.ClientConnectorError) or idempotent
+                if retryable and await self._should_retry(attempt, max_retries, host_stats):
+                    logger.warning(f"⚠️ {method} {host} failed ({e!r}), retrying")
+                    attempt += 1
+                    continue
+                raise
+
+            host_stats["latency_ms_total"] += int((time.perf_counter() - started) * 1000)
+            if response.status in RETRY_STATUSES and idempotent:
+                if await self._should_retry(attempt, max_retries, host_stats):
+                    logger.warning(f"⚠️ {method} {host} returned {response.status}, retrying")
+                    response.release()
+                    attempt += 1
+                    continue
+            break
+
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def _should_retry(self, attempt: int, max_retries: int, host_stats: Dict[str, int]) -> bool:
+        """Check retry limits and back off before the next attempt"""
+        if attempt >= max_retries:
+            return False
+        if not self.retry_budget.try_withdraw():
+            self._stats["retries_denied"] += 1
+            return False
+        self._stats["retries"] += 1
+        host_stats["retries"] += 1
+        await asyncio.sleep(self.backoff_base * (2 ** attempt))
+        return True
+
+    def get(self, url: str, **kwargs: Any):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs: Any):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any):
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool and request statistics; pool figures come from the trace hooks"""
+        created = self._stats["connections_created"]
+        reused = self._stats["connections_reused"]
+        pool = {
+            "in_flight": self._in_flight,
+            "connections_created": created,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / (created + reused), 3) if created + reused else 0.0
+        }
+        return {
+            "started": self._session is not None and not self._session.closed,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "pool": pool,
+            "totals": dict(self._stats),
+            "hosts": {host: dict(stats) for host, stats in self._host_stats.items()},
+        }
+
+
+# Global instance
+http_client = HTTPClient(
+    limit=int(os.getenv("HTTP_POOL_LIMIT", "100")),
+    limit_per_host=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+)
@@ -0,0 +1,148 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+# Emitted events: ("field", key, None, value) for a completed top-level field, and
+# ("item", key, index, value) for each completed element of a top-level array
+JSONEvent = Tuple[str, str, Optional[int], Any]
+
+WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "key", "expect_key", "index")
+
+    def __init__(self, kind: str, start: int, key: Optional[str]):
+        self.kind = kind
+        self.start = start
+        # Key of this container in its parent object, if any
+        self.key = key
+        self.expect_key = kind == "object"
+        self.index = 0
+
+
+class IncrementalJSONParser:
+    """Streaming scanner for a JSON object arriving in arbitrary chunks.
+
+    Reports each top-level field and each element of a top-level array as
+    soon as its closing character has arrived, without waiting for the rest
+    of the document. Anything before the first ``{`` (e.g. a Markdown code
+    fence) is ignored. Values are decoded with ``json.loads`` on their exact
+    slice, so only structure is tracked here.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._scalar_start: Optional[int] = None
+        self._pending_key: Optional[str] = None
+        self._document_start = 0
+        self._document_end = 0
+        self.done = False
+
+    def document(self) -> Optional[Any]:
+        """Decode the complete top-level object, or None if it hasn't closed yet"""
+        if not self.done:
+            return None
+        return json.loads(self.buffer[self._document_start:self._document_end])
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """Consume a chunk and return the events it completed"""
+        self.buffer += chunk
+        events: List[JSONEvent] = []
+        buffer = self.buffer
+        i = self._pos
+        end = len(buffer)
+        while i < end and not self.done:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._string_done(self._string_start, i + 1, events)
+                i += 1
+                continue
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._document_start = i
+                    self._stack.append(_Frame("object", i, None))
+                i += 1
+                continue
+
+            if self._scalar_start is not None:
+                if ch in ",}]" or ch in WHITESPACE:
+                    self._value_done(self._scalar_start, i, events)
+                    self._scalar_start = None
+                else:
+                    i += 1
+                    continue
+
+            if ch in WHITESPACE:
+                pass
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                pass
+            elif ch == ",":
+                frame = self._stack[-1]
+                if frame.kind == "object":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif ch in "{[":
+                self._stack.append(_Frame("object" if ch == "{" else "array", i, self._take_key()))
+            elif ch in "}]":
+                frame = self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    self._document_end = i + 1
+                else:
+                    self._value_done(frame.start, i + 1, events, frame.key)
+            else:
+                self._scalar_start = i
+            i += 1
+        self._pos = i
+        return events
+
+    def _take_key(self) -> Optional[str]:
+        key, self._pending_key = self._pending_key, None
+        return key
+
+    def _string_done(self, start: int, end: int, events: List[JSONEvent]) -> None:
+        frame = self._stack[-1]
+        if frame.kind == "object" and frame.expect_key:
+            self._pending_key = json.loads(self.buffer[start:end])
+            frame.expect_key = False
+            return
+        self._value_done(start, end, events)
+
+    def _value_done(self, start: int, end: int, events: List[JSONEvent], key: Optional[str] = None) -> None:
+        """A value ending at ``end`` is complete; emit it if it sits at an interesting depth"""
+        if key is None:
+            key = self._take_key()
+        depth = len(self._stack)
+        parent = self._stack[-1]
+        if depth == 1:
+            # Field of the top-level object
+            kind, index = "field", None
+        elif depth == 2 and parent.kind == "array" and parent.key is not None:
+            # Element of a top-level array
+            kind, index, key = "item", parent.index, parent.key
+        else:
+            return
+        try:
+            value = json.loads(self.buffer[start:end])
+        except ValueError:
+            # Malformed value (e.g. a literal "0.0-1.0"); the final document parse decides
+            return
+        events.append((kind, key, index, value))
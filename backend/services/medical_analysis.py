@@ -0,0 +1,406 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from string import Formatter
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Any
+
+import openai
+
+from api.types.medical_types import FinishConversationResponse, Symptom
+from services.analysis_cache import analysis_cache, analysis_cache_key
+from services.incremental_json import IncrementalJSONParser
+from services.transcript_record import Role, TranscriptRecord
+from config.prompts import (
+    MEDICAL_ANALYSIS_PROMPT,
+    MEDICAL_ANALYSIS_SYSTEM_PROMPT,
+    MEDICAL_ANALYSIS_UPDATE_PROMPT,
+)
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODEL = os.getenv("ANALYSIS_MODEL", "gpt-4")
+ANALYSIS_TEMPERATURE = 0.3
+ANALYSIS_MAX_TOKENS = 2000
+
+NO_PROFILE_CONTEXT = "No patient profile information available."
+PROFILE_CONTEXT_CACHE_SIZE = 1024
+
+_async_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """Get the shared AsyncOpenAI client used for analysis calls"""
+    global _async_client
+    if _async_client is None:
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise RuntimeError("OpenAI API key not configured")
+        _async_client = openai.AsyncOpenAI(api_key=openai_api_key)
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared AsyncOpenAI client"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+class CompiledPrompt:
+    """A ``str.format`` template split once into literal and field segments.
+
+    Rendering joins the segments with the field values instead of re-parsing
+    the template on every call.
+    """
+
+    def __init__(self, template: str):
+        self.segments: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in Formatter().parse(template):
+            if format_spec or conversion:
+                raise ValueError(f"Unsupported format spec in prompt field: {field}")
+            self.segments.append((literal, field))
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = []
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(values[field])
+        return "".join(parts)
+
+
+ANALYSIS_PROMPT = CompiledPrompt(MEDICAL_ANALYSIS_PROMPT)
+UPDATE_PROMPT = CompiledPrompt(MEDICAL_ANALYSIS_UPDATE_PROMPT)
+
+# Rendered profile contexts keyed on (user_id, version), least recently used first
+_profile_contexts: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+
+def build_profile_context(user_profile: Optional[Dict[str, Any]]) -> str:
+    """Render a stored user profile into the prompt's patient context block.
+
+    Versioned profiles (see profile_memory) are rendered once per version.
+    """
+    if not user_profile:
+        return NO_PROFILE_CONTEXT
+
+    version = user_profile.get("version")
+    if version is None:
+        return render_profile_context(user_profile)
+    key = (user_profile.get("user_id"), version)
+    context = _profile_contexts.get(key)
+    if context is None:
+        context = render_profile_context(user_profile)
+        _profile_contexts[key] = context
+        if len(_profile_contexts) > PROFILE_CONTEXT_CACHE_SIZE:
+            _profile_contexts.popitem(last=False)
+    else:
+        _profile_contexts.move_to_end(key)
+    return context
+
+
+def on_profile_change(user_id: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+    """Profile store watcher: drop the user's rendered contexts unless the write kept their version.
+
+    Versions restart after a delete, so a recreated profile must not hit the old rendering.
+    """
+    keep = new.get("version") if new is not None else None
+    for key in [key for key in _profile_contexts if key[0] == user_id and key[1] != keep]:
+        del _profile_contexts[key]
+
+
+def render_profile_context(user_profile: Dict[str, Any]) -> str:
+    """Format the patient context block for a profile"""
+    medical_history = user_profile.get('medical_history', {})
+    return f"""
+Patient Information:
+- Name: {user_profile.get('name', 'Unknown')}
+- Age: {user_profile.get('age', 'Not provided')}
+- Gender: {user_profile.get('gender', 'Not provided')}
+- Date of Birth: {user_profile.get('date_of_birth', 'Not provided')}
+
+Medical History:
+- Medical Conditions: {', '.join(medical_history.get('conditions', [])) or 'None reported'}
+- Allergies: {', '.join(medical_history.get('allergies', [])) or 'None reported'}
+- Current Medications: {', '.join(medical_history.get('medications', [])) or 'None reported'}
+- Family History: {', '.join(medical_history.get('family_history', [])) or 'None reported'}
+- Previous Surgeries: {', '.join(medical_history.get('surgeries', [])) or 'None reported'}
+- Additional Notes: {medical_history.get('notes', 'None')}
+"""
+
+
+def render_transcript(transcript: TranscriptRecord) -> str:
+    """Render one transcript entry as a line of the prompt's conversation block"""
+    role = "Patient" if transcript.role is Role.USER else "AI Assistant"
+    return f"{role}: {transcript.content}\n"
+
+
+def build_conversation_text(transcripts: List[TranscriptRecord]) -> str:
+    """Render transcript entries into the prompt's conversation block"""
+    return "".join(render_transcript(transcript) for transcript in transcripts)
+
+
+def report_timestamps(now: Optional[datetime] = None) -> Dict[str, str]:
+    """Generate the timestamp fields used by the analysis prompt and report"""
+    now = now or datetime.now()
+    return {
+        "timestamp": now.strftime("%Y%m%d-%H%M%S"),
+        "timestamp_short": now.strftime("%Y%m%d%H%M"),
+        "date": now.strftime("%Y-%m-%d"),
+        "time": now.strftime("%I:%M %p %Z"),
+    }
+
+
+def build_analysis_prompt(profile_context: str, conversation_text: str, timestamps: Dict[str, str]) -> str:
+    """Format the medical analysis prompt"""
+    return ANALYSIS_PROMPT.render({
+        "profile_context": profile_context,
+        "conversation_text": conversation_text,
+        **timestamps
+    })
+
+
+def build_update_prompt(
+    profile_context: str,
+    previous_analysis: Dict[str, Any],
+    conversation_delta: str,
+    timestamps: Dict[str, str]
+) -> str:
+    """Format the prompt that folds new conversation into a previous analysis"""
+    return UPDATE_PROMPT.render({
+        "profile_context": profile_context,
+        "previous_analysis": json.dumps(previous_analysis, indent=2),
+        "conversation_delta": conversation_delta,
+        **timestamps
+    })
+
+
+def build_fallback_analysis(user_profile: Optional[Dict[str, Any]], timestamps: Dict[str, str]) -> Dict[str, Any]:
+    """Fallback analysis with full report structure when the LLM output is unusable"""
+    patient_name = user_profile.get('name', 'Patient Name') if user_profile else "Patient Name"
+    patient_dob = user_profile.get('date_of_birth', 'Not Provided') if user_profile else "Not Provided"
+
+    return {
+        "reportId": f"MEDIREP-{timestamps['timestamp']}",
+        "patientName": patient_name,
+        "patientId": f"P{timestamps['timestamp_short']}",
+        "dateOfBirth": patient_dob,
+        "providerName": "AI Medical Assistant",
+        "providerSpecialty": "General Practice AI",
+        "consultationDate": timestamps["date"],
+        "consultationTime": timestamps["time"],
+        "consultationType": "AI Voice Consultation",
+        "mainComplaint": "Analysis unavailable",
+        "detectedSymptoms": [{
+            "name": "Analysis unavailable",
+            "confidence": 0.0,
+            "timestamp": "",
+            "labelColor": "red"
+        }],
+        "consultationSummary": "Failed to analyze conversation. Please consult with a healthcare professional for proper evaluation.",
+        "potentialDiagnoses": ["Requires manual review"],
+        "recommendations": ["Please consult with a healthcare professional for proper evaluation."],
+        "videoAttachmentUrl": "",
+        "videoAttachmentName": f"Consultation_{timestamps['timestamp']}.mp4"
+    }
+
+
+def try_parse_analysis(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse the LLM response, or return None if it isn't usable JSON"""
+    try:
+        if content is None:
+            raise ValueError("Empty response from LLM")
+        return json.loads(content)
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Failed to parse LLM response as JSON: {e}")
+        return None
+
+
+def parse_analysis_content(content: Optional[str], user_profile: Optional[Dict[str, Any]], timestamps: Dict[str, str]) -> Dict[str, Any]:
+    """Parse the LLM response, falling back to a placeholder report on bad JSON"""
+    analysis_result = try_parse_analysis(content)
+    if analysis_result is None:
+        return build_fallback_analysis(user_profile, timestamps)
+    return analysis_result
+
+
+def session_cache_key(transcripts: List[TranscriptRecord], user_profile: Optional[Dict[str, Any]]) -> str:
+    """Analysis cache key for a session's transcripts and profile"""
+    return analysis_cache_key(transcripts, build_profile_context(user_profile), ANALYSIS_MODEL)
+
+
+async def request_analysis(analysis_prompt: str) -> Optional[str]:
+    """Send the analysis prompt to the LLM and return the raw message content"""
+    client = get_async_client()
+    response = await client.chat.completions.create(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": MEDICAL_ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": analysis_prompt}
+        ],
+        temperature=ANALYSIS_TEMPERATURE,
+        max_tokens=ANALYSIS_MAX_TOKENS
+    )
+    return response.choices[0].message.content
+
+
+async def request_analysis_stream(analysis_prompt: str) -> AsyncIterator[str]:
+    """Send the analysis prompt to the LLM and yield the content as it streams in"""
+    client = get_async_client()
+    stream = await client.chat.completions.create(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": MEDICAL_ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": analysis_prompt}
+        ],
+        temperature=ANALYSIS_TEMPERATURE,
+        max_tokens=ANALYSIS_MAX_TOKENS,
+        stream=True
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def normalize_symptom(symptom: Any) -> Symptom:
+    """Coerce an LLM symptom entry into a Symptom"""
+    if isinstance(symptom, dict):
+        return Symptom(**symptom)
+    # Fallback for string symptoms
+    return Symptom(
+        name=str(symptom),
+        confidence=0.5,
+        timestamp="",
+        labelColor="yellow"
+    )
+
+
+def build_report(
+    session_id: str,
+    analysis_result: Dict[str, Any],
+    duration_seconds: float,
+    transcript_count: int,
+    timestamps: Dict[str, str]
+) -> FinishConversationResponse:
+    """Merge the analysis result with session metadata into a validated report"""
+    # Convert detected symptoms to proper format
+    detected_symptoms = [normalize_symptom(symptom) for symptom in analysis_result.get("detectedSymptoms", [])]
+
+    timestamp = timestamps["timestamp"]
+    return FinishConversationResponse(
+        # Session metadata
+        session_id=session_id,
+        status="analyzed",
+        duration_seconds=duration_seconds,
+        transcript_count=transcript_count,
+        # Report data
+        reportId=analysis_result.get("reportId", f"MEDIREP-{timestamp}"),
+        patientName=analysis_result.get("patientName", "Patient Name"),
+        patientId=analysis_result.get("patientId", f"P{timestamps['timestamp_short']}"),
+        dateOfBirth=analysis_result.get("dateOfBirth", "Not Provided"),
+        providerName=analysis_result.get("providerName", "AI Medical Assistant"),
+        providerSpecialty=analysis_result.get("providerSpecialty", "General Practice AI"),
+        consultationDate=analysis_result.get("consultationDate", timestamps["date"]),
+        consultationTime=analysis_result.get("consultationTime", timestamps["time"]),
+        consultationType=analysis_result.get("consultationType", "AI Voice Consultation"),
+        mainComplaint=analysis_result.get("mainComplaint", ""),
+        detectedSymptoms=detected_symptoms,
+        consultationSummary=analysis_result.get("consultationSummary", ""),
+        potentialDiagnoses=analysis_result.get("potentialDiagnoses", []),
+        recommendations=analysis_result.get("recommendations", []),
+        videoAttachmentUrl=analysis_result.get("videoAttachmentUrl", ""),
+        videoAttachmentName=analysis_result.get("videoAttachmentName", f"Consultation_{timestamp}.mp4")
+    )
+
+
+async def analyze_session(
+    session_id: str,
+    transcripts: List[TranscriptRecord],
+    user_profile: Optional[Dict[str, Any]],
+    duration_seconds: float,
+    timestamps: Dict[str, str]
+) -> FinishConversationResponse:
+    """Run the full LLM analysis for a finished session, reusing a cached result for identical input"""
+    profile_context = build_profile_context(user_profile)
+
+    async def compute() -> Optional[Dict[str, Any]]:
+        conversation_text = build_conversation_text(transcripts)
+        analysis_prompt = build_analysis_prompt(profile_context, conversation_text, timestamps)
+        logger.info(f"📋 Analyzing conversation with {len(transcripts)} transcript entries")
+        return try_parse_analysis(await request_analysis(analysis_prompt))
+
+    cache_key = analysis_cache_key(transcripts, profile_context, ANALYSIS_MODEL)
+    analysis_result = await analysis_cache.get_or_compute(cache_key, compute)
+    if analysis_result is None:
+        # Unusable LLM output is never cached
+        analysis_result = build_fallback_analysis(user_profile, timestamps)
+    logger.info(f"📊 Found {len(analysis_result.get('detectedSymptoms', []))} symptoms")
+
+    return build_report(session_id, analysis_result, duration_seconds, len(transcripts), timestamps)
+
+
+def field_event(field: str, index: Optional[int], value: Any) -> Dict[str, Any]:
+    """Payload for one streamed report field or array entry"""
+    if field == "detectedSymptoms" and index is not None:
+        value = normalize_symptom(value).model_dump()
+    event = {"field": field, "value": value}
+    if index is not None:
+        event["index"] = index
+    return event
+
+
+async def stream_session_analysis(
+    session_id: str,
+    transcripts: List[TranscriptRecord],
+    user_profile: Optional[Dict[str, Any]],
+    duration_seconds: float,
+    timestamps: Dict[str, str],
+    emit: Callable[[str, Dict[str, Any]], None]
+) -> FinishConversationResponse:
+    """Run the analysis on a streamed completion, emitting report fields as they complete.
+
+    ``emit(event, payload)`` receives a "field" event for each finished
+    top-level scalar and an "item" event for each finished entry of a
+    top-level array (symptoms, diagnoses, recommendations).
+    """
+    profile_context = build_profile_context(user_profile)
+    cache_key = analysis_cache_key(transcripts, profile_context, ANALYSIS_MODEL)
+    analysis_result = analysis_cache.get(cache_key)
+
+    if analysis_result is not None:
+        for field, value in analysis_result.items():
+            if isinstance(value, list):
+                for index, entry in enumerate(value):
+                    emit("item", field_event(field, index, entry))
+            else:
+                emit("field", field_event(field, None, value))
+    else:
+        conversation_text = build_conversation_text(transcripts)
+        analysis_prompt = build_analysis_prompt(profile_context, conversation_text, timestamps)
+        logger.info(f"📋 Streaming analysis of conversation with {len(transcripts)} transcript entries")
+
+        parser = IncrementalJSONParser()
+        async for chunk in request_analysis_stream(analysis_prompt):
+            for kind, field, index, value in parser.feed(chunk):
+                if kind == "item":
+                    emit("item", field_event(field, index, value))
+                elif not isinstance(value, list):
+                    # Arrays were already sent entry by entry
+                    emit("field", field_event(field, None, value))
+
+        try:
+            analysis_result = parser.document()
+        except ValueError as e:
+            logger.error(f"Failed to parse streamed LLM response as JSON: {e}")
+            analysis_result = None
+        if analysis_result is None:
+            logger.error("Streamed LLM response did not contain a complete JSON object")
+            analysis_result = build_fallback_analysis(user_profile, timestamps)
+        else:
+            analysis_cache.put(cache_key, analysis_result)
+
+    logger.info(f"📊 Found {len(analysis_result.get('detectedSymptoms', []))} symptoms")
+    return build_report(session_id, analysis_result, duration_seconds, len(transcripts), timestamps)
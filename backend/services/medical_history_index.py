@@ -0,0 +1,186 @@
+import re
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+HISTORY_FIELDS = ("conditions", "allergies", "medications", "family_history", "surgeries")
+
+FIELD_ALIASES = {
+    "condition": "conditions",
+    "conditions": "conditions",
+    "allergy": "allergies",
+    "allergies": "allergies",
+    "medication": "medications",
+    "medications": "medications",
+    "meds": "medications",
+    "family": "family_history",
+    "family_history": "family_history",
+    "surgery": "surgeries",
+    "surgeries": "surgeries",
+}
+
+# Postings for a term in any field are kept under this pseudo-field
+ANY_FIELD = "*"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+QUERY_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+
+
+def normalize_terms(text: str) -> List[str]:
+    """Lowercased alphanumeric words of a history entry ("Metformin 500mg" -> metformin, 500mg)"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class QueryError(ValueError):
+    pass
+
+
+class MedicalHistoryIndex:
+    """Inverted index from normalized medical history terms to user IDs.
+
+    Postings are sets keyed by (field, term), plus an any-field entry per
+    term, and are updated incrementally by the profile store's watcher.
+    Queries combine terms with AND, OR, NOT and parentheses; adjacent terms
+    are ANDed, ``field:term`` restricts a term to one history field, and a
+    quoted phrase matches profiles with all of its words (in that field, if
+    one is given). Intersections start from the smallest posting set, so
+    cost follows the rarest term rather than the number of profiles.
+    """
+
+    def __init__(self):
+        self.postings: Dict[Tuple[str, str], Set[str]] = {}
+        self.user_ids: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    @staticmethod
+    def _terms(profile: Dict[str, Any]) -> Set[Tuple[str, str]]:
+        history = profile.get("medical_history") or {}
+        terms = set()
+        for field in HISTORY_FIELDS:
+            for entry in history.get(field) or []:
+                for term in normalize_terms(entry):
+                    terms.add((field, term))
+                    terms.add((ANY_FIELD, term))
+        return terms
+
+    def on_change(self, user_id: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Store watcher: only the terms that changed touch the postings"""
+        old_terms = self._terms(old) if old is not None else set()
+        new_terms = self._terms(new) if new is not None else set()
+        for key in old_terms - new_terms:
+            posting = self.postings.get(key)
+            if posting is not None:
+                posting.discard(user_id)
+                if not posting:
+                    del self.postings[key]
+        for key in new_terms - old_terms:
+            self.postings.setdefault(key, set()).add(user_id)
+        if new is None:
+            self.user_ids.discard(user_id)
+        else:
+            self.user_ids.add(user_id)
+
+    def search(self, query: str) -> Set[str]:
+        """User IDs matching a boolean query; raises QueryError if it doesn't parse"""
+        tokens = self._tokenize(query)
+        if not tokens:
+            raise QueryError("Empty query")
+        result, position = self._parse_or(tokens, 0)
+        if position != len(tokens):
+            raise QueryError(f"Unexpected {tokens[position][1]!r} in query")
+        return result
+
+    @staticmethod
+    def _tokenize(query: str) -> List[Tuple[str, str]]:
+        tokens = []
+        position = 0
+        query = query.rstrip()
+        while position < len(query):
+            match = QUERY_TOKEN_RE.match(query, position)
+            if match is None:
+                raise QueryError(f"Unbalanced quote in query: {query[position:]!r}")
+            position = match.end()
+            if match.group(1):
+                tokens.append(("(", "("))
+            elif match.group(2):
+                tokens.append((")", ")"))
+            elif match.group(3) is not None:
+                tokens.append(("phrase", match.group(3)))
+            else:
+                word = match.group(4)
+                operator = word.upper()
+                if operator in ("AND", "OR", "NOT"):
+                    tokens.append((operator, word))
+                elif word.endswith(":") and query[position:position + 1] == '"':
+                    # field:"a phrase"
+                    phrase = QUERY_TOKEN_RE.match(query, position)
+                    if phrase is None or phrase.group(3) is None:
+                        raise QueryError(f"Unbalanced quote in query: {query[position:]!r}")
+                    position = phrase.end()
+                    tokens.append(("phrase", f"{word}{phrase.group(3)}"))
+                else:
+                    tokens.append(("term", word))
+        return tokens
+
+    def _parse_or(self, tokens: List[Tuple[str, str]], position: int) -> Tuple[Set[str], int]:
+        result, position = self._parse_and(tokens, position)
+        while position < len(tokens) and tokens[position][0] == "OR":
+            right, position = self._parse_and(tokens, position + 1)
+            result = result | right
+        return result, position
+
+    def _parse_and(self, tokens: List[Tuple[str, str]], position: int) -> Tuple[Set[str], int]:
+        """Collect ANDed operands first so NOTs become set differences, not complements"""
+        included: List[Set[str]] = []
+        excluded: List[Set[str]] = []
+        while True:
+            negate = False
+            while position < len(tokens) and tokens[position][0] == "NOT":
+                negate = not negate
+                position += 1
+            operand, position = self._parse_atom(tokens, position)
+            (excluded if negate else included).append(operand)
+            if position < len(tokens) and tokens[position][0] == "AND":
+                position += 1
+            elif position >= len(tokens) or tokens[position][0] in ("OR", ")"):
+                break
+
+        if included:
+            included.sort(key=len)
+            result = included[0].intersection(*included[1:])
+        else:
+            result = self.user_ids
+        if excluded:
+            result = result.difference(*excluded)
+        return result, position
+
+    def _parse_atom(self, tokens: List[Tuple[str, str]], position: int) -> Tuple[Set[str], int]:
+        if position >= len(tokens):
+            raise QueryError("Query ends where a term was expected")
+        kind, value = tokens[position]
+        if kind == "(":
+            result, position = self._parse_or(tokens, position + 1)
+            if position >= len(tokens) or tokens[position][0] != ")":
+                raise QueryError("Missing closing parenthesis")
+            return result, position + 1
+        if kind not in ("term", "phrase"):
+            raise QueryError(f"Unexpected {value!r} in query")
+        return self._lookup(value), position + 1
+
+    def _lookup(self, value: str) -> Set[str]:
+        field = ANY_FIELD
+        name, separator, rest = value.partition(":")
+        if separator and name.lower() in FIELD_ALIASES:
+            field, value = FIELD_ALIASES[name.lower()], rest
+        terms = normalize_terms(value)
+        if not terms:
+            raise QueryError(f"No searchable words in {value!r}")
+        postings = sorted((self.postings.get((field, term), set()) for term in terms), key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profiles": len(self.user_ids),
+            "terms": sum(1 for field, _ in self.postings if field == ANY_FIELD),
+            "postings": sum(len(posting) for posting in self.postings.values()),
+        }
@@ -1,20 +1,68 @@
 import asyncio
-import json
 import base64
+import json
 import logging
-from typing import Optional, Callable, Dict, Any
+from typing import Awaitable, Optional, Callable, Dict, Any, List
 import websockets
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from services.audio_convert import AudioConverter
+from services.consultation_recorder import SessionRecording, consultation_recorder
+from services.realtime_audio import AudioSendPipeline
+from services.voice_activity import SilenceTrimmer
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+TYPE_KEY = '"type"'
+
+# Server-side turn detection; the local silence trimmer pads speech the same way
+TURN_DETECTION = {
+    "type": "server_vad",
+    "threshold": 0.5,
+    "prefix_padding_ms": 300,
+    "silence_duration_ms": 500
+}
+
+# High-rate events that are only logged at DEBUG; not parsed otherwise
+DEBUG_ONLY_EVENTS = frozenset({"response.audio_transcript.delta"})
+
+# Called with (session_id, pcm16 bytes) for each assistant audio delta
+AudioConsumer = Callable[[str, bytes], Awaitable[None]]
+
+
+def peek_event_type(message: str) -> Optional[str]:
+    """Read the top-level "type" of a server event without parsing the rest.
+
+    Realtime events put "type" first; anything that might hide a nested
+    "type" before the top-level one returns None so the caller falls back
+    to a full parse.
+    """
+    index = message.find(TYPE_KEY)
+    if index < 0 or "{" in message[1:index] or "[" in message[:index]:
+        return None
+    start = index + len(TYPE_KEY)
+    # Tolerate '"type" : "..."' spacing from other encoders
+    while start < len(message) and message[start] in " \t\r\n:":
+        start += 1
+    if message.startswith('"', start):
+        end = message.find('"', start + 1)
+        if end > 0:
+            return message[start + 1:end]
+    return None
+
 
 class OpenAIRealtimeClient:
-    """WebSocket client for OpenAI Realtime API"""
+    """WebSocket client for OpenAI Realtime API.
+
+    No route creates one yet: the browser talks to OpenAI over WebRTC
+    (/api/stream/connect), so consultation audio never passes through the
+    backend. The audio stages behind ``send_audio`` are covered by the tests
+    in tests/ until a server-side audio path uses them.
+    """
     
     def __init__(self, session_id: str, on_transcript: Optional[Callable] = None):
         self.session_id = session_id
@@ -24,6 +72,41 @@ class OpenAIRealtimeClient:
         self.websocket = None
         self.on_transcript = on_transcript
         self.is_connected = False
+        self.audio_batch_ms = int(os.getenv("REALTIME_AUDIO_BATCH_MS", "100"))
+        self.audio_buffer_ms = int(os.getenv("REALTIME_AUDIO_BUFFER_MS", "2000"))
+        self.audio: Optional[AudioSendPipeline] = None
+        self.audio_consumers: List[AudioConsumer] = []
+        self.recording: Optional[SessionRecording] = None
+        
+        # Set when the capture source isn't already 24 kHz mono PCM16
+        self.capture_converter: Optional[AudioConverter] = None
+        
+        # Drop open-mic silence before it's encoded and sent (opt-in)
+        self.silence_trimmer: Optional[SilenceTrimmer] = None
+        if os.getenv("REALTIME_VAD", "0") == "1":
+            self.silence_trimmer = SilenceTrimmer(
+                threshold_db=float(os.getenv("REALTIME_VAD_THRESHOLD_DB", "-45")),
+                zcr_threshold=float(os.getenv("REALTIME_VAD_ZCR_THRESHOLD", "0.25")),
+                prefix_padding_ms=TURN_DETECTION["prefix_padding_ms"],
+                silence_duration_ms=TURN_DETECTION["silence_duration_ms"]
+            )
+        
+        # Listener counters
+        self.events_received = 0
+        self.events_parsed = 0
+        self.audio_deltas_skipped = 0
+        
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+            "session.created": self._on_session_created,
+            "session.updated": self._on_session_updated,
+            "input_audio_buffer.speech_started": self._on_speech_started,
+            "input_audio_buffer.speech_stopped": self._on_speech_stopped,
+            "conversation.item.input_audio_transcription.completed": self._on_user_transcript,
+            "response.audio_transcript.delta": self._on_transcript_delta,
+            "response.audio_transcript.done": self._on_assistant_transcript,
+            "response.audio.delta": self._on_audio_delta,
+            "error": self._on_error,
+        }
         
     async def connect(self):
         """Establish WebSocket connection to OpenAI Realtime API"""
@@ -41,6 +124,16 @@ class OpenAIRealtimeClient:
             self.is_connected = True
             logger.info(f"Connected to OpenAI Realtime API for session {self.session_id}")
             
+            # Frames are prebuilt UTF-8 JSON; send them as text without re-encoding
+            self.audio = AudioSendPipeline(
+                lambda frame: self.websocket.send(frame, text=True),
+                batch_ms=self.audio_batch_ms,
+                buffer_ms=self.audio_buffer_ms
+            )
+            self.audio.start()
+            # Tee the patient's audio to disk when recording is enabled
+            self.recording = consultation_recorder.open(self.session_id)
+            
             # Start listening for messages
             asyncio.create_task(self._listen())
             
@@ -66,12 +159,7 @@ class OpenAIRealtimeClient:
                 "input_audio_transcription": {
                     "model": "whisper-1"
                 },
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": 0.5,
-                    "prefix_padding_ms": 300,
-                    "silence_duration_ms": 500
-                },
+                "turn_detection": TURN_DETECTION,
                 "temperature": 0.8,
                 "max_response_output_tokens": 4096
             }
@@ -86,35 +174,59 @@ class OpenAIRealtimeClient:
             await self.websocket.send(json.dumps(event))
             
     async def send_audio(self, audio_data: bytes):
-        """Send audio data to OpenAI"""
-        # Track audio data sent
-        if not hasattr(self, '_audio_bytes_sent'):
-            self._audio_bytes_sent = 0
-            self._audio_chunks_sent = 0
+        """Queue PCM16 audio for OpenAI; sent in batches of REALTIME_AUDIO_BATCH_MS"""
+        if not self.audio:
+            return
+        if self.recording:
+            self.recording.write(audio_data)
+        if self.silence_trimmer is None:
+            await self.audio.write(audio_data)
+            return
+        for segment in self.silence_trimmer.process(audio_data):
+            await self.audio.write(segment)
+            
+    def set_capture_format(self, sample_rate: int, channels: int = 1, sample_format: str = "f32"):
+        """Describe what send_capture_audio receives, e.g. 48 kHz stereo float32 from a browser"""
+        self.capture_converter = AudioConverter(sample_rate, channels, sample_format)
+        logger.info(f"🎚️ Converting {sample_rate} Hz x{channels} {sample_format} capture audio to 24 kHz PCM16")
         
-        self._audio_bytes_sent += len(audio_data)
-        self._audio_chunks_sent += 1
+    async def send_capture_audio(self, data):
+        """Queue audio in the capture format, converted to the session's pcm16"""
+        if self.capture_converter is None:
+            await self.send_audio(data)
+            return
+        pcm = self.capture_converter.convert(data)
+        if pcm:
+            await self.send_audio(pcm)
+            
+    async def flush_audio(self):
+        """Send any buffered audio now, e.g. before committing the input buffer"""
+        if self.audio:
+            await self.audio.flush()
         
-        logger.info(f"🎵 Sending audio chunk {self._audio_chunks_sent}: {len(audio_data)} bytes (total: {self._audio_bytes_sent} bytes)")
+    def audio_stats(self) -> Dict[str, Any]:
+        """Outgoing audio counters, including bytes the silence trimmer kept off the wire"""
+        return {
+            "send": self.audio.stats() if self.audio else None,
+            "silence_trimming": self.silence_trimmer.stats() if self.silence_trimmer else None,
+            "capture": self.capture_converter.stats() if self.capture_converter else None,
+            "recording": self.recording.stats() if self.recording else None,
+        }
         
-        # Convert PCM16 audio to base64
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        logger.debug(f"🔄 Converted to base64: {len(audio_base64)} chars")
+    def watch_audio(self, consumer: AudioConsumer):
+        """Receive the assistant's audio; deltas are only decoded while someone is watching"""
+        self.audio_consumers.append(consumer)
         
-        event = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_base64
-        }
-        await self.send_event(event)
-        logger.debug(f"✅ Audio event sent to OpenAI")
+    def unwatch_audio(self, consumer: AudioConsumer):
+        if consumer in self.audio_consumers:
+            self.audio_consumers.remove(consumer)
         
     async def _listen(self):
         """Listen for messages from OpenAI Realtime API"""
         try:
             while self.is_connected and self.websocket:
                 message = await self.websocket.recv()
-                event = json.loads(message)
-                await self._handle_event(event)
+                await self._dispatch(message)
                 
         except websockets.exceptions.ConnectionClosed:
             logger.info("WebSocket connection closed")
@@ -123,67 +235,95 @@ class OpenAIRealtimeClient:
             logger.error(f"Error in WebSocket listener: {e}")
             self.is_connected = False
             
+    async def _dispatch(self, message: str):
+        """Route a raw server message, parsing it only if a handler will use it"""
+        self.events_received += 1
+        event_type = peek_event_type(message)
+        if event_type is not None and not logger.isEnabledFor(logging.DEBUG):
+            if event_type == "response.audio.delta" and not self.audio_consumers:
+                # Base64 audio nobody is listening to: the bulk of the traffic
+                self.audio_deltas_skipped += 1
+                return
+            if event_type in DEBUG_ONLY_EVENTS or event_type not in self._handlers:
+                return
+        self.events_parsed += 1
+        await self._handle_event(json.loads(message))
+            
     async def _handle_event(self, event: Dict[str, Any]):
         """Handle events from OpenAI Realtime API"""
         event_type = event.get("type")
         
         logger.debug(f"🤖 Received OpenAI event: {event_type}")
         
-        if event_type == "session.created":
-            session_info = event.get('session', {})
-            logger.info(f"✅ OpenAI session created: {session_info.get('id')}")
+        handler = self._handlers.get(event_type)
+        if handler:
+            await handler(event)
+        else:
+            logger.debug(f"❓ Unhandled OpenAI event type: {event_type}")
             
-        elif event_type == "session.updated":
-            logger.info("✅ OpenAI session updated successfully")
+    async def _on_session_created(self, event: Dict[str, Any]):
+        session_info = event.get('session', {})
+        logger.info(f"✅ OpenAI session created: {session_info.get('id')}")
+        
+    async def _on_session_updated(self, event: Dict[str, Any]):
+        logger.info("✅ OpenAI session updated successfully")
+        
+    async def _on_speech_started(self, event: Dict[str, Any]):
+        logger.info("🗣️ Speech started detected by OpenAI")
+        
+    async def _on_speech_stopped(self, event: Dict[str, Any]):
+        logger.info("🤐 Speech stopped detected by OpenAI")
+        
+    async def _on_user_transcript(self, event: Dict[str, Any]):
+        # User's speech transcribed
+        transcript = event.get("transcript", "")
+        logger.info(f"📝 User transcription completed: '{transcript}'")
+        if transcript and self.on_transcript:
+            await self.on_transcript(self.session_id, "user", transcript)
+            logger.info(f"✅ User transcript saved: {transcript}")
+        else:
+            logger.warning("⚠️ Empty user transcript received")
             
-        elif event_type == "input_audio_buffer.speech_started":
-            logger.info("🗣️ Speech started detected by OpenAI")
+    async def _on_transcript_delta(self, event: Dict[str, Any]):
+        # Assistant's response transcript (streaming)
+        delta = event.get("delta", "")
+        if delta:
+            logger.debug(f"📝 Assistant transcript delta: '{delta}'")
             
-        elif event_type == "input_audio_buffer.speech_stopped":
-            logger.info("🤐 Speech stopped detected by OpenAI")
+    async def _on_assistant_transcript(self, event: Dict[str, Any]):
+        # Assistant's complete response transcript
+        transcript = event.get("transcript", "")
+        logger.info(f"📝 Assistant transcription completed: '{transcript}'")
+        if transcript and self.on_transcript:
+            await self.on_transcript(self.session_id, "assistant", transcript)
+            logger.info(f"✅ Assistant transcript saved: {transcript}")
+        else:
+            logger.warning("⚠️ Empty assistant transcript received")
             
-        elif event_type == "conversation.item.input_audio_transcription.completed":
-            # User's speech transcribed
-            transcript = event.get("transcript", "")
-            logger.info(f"📝 User transcription completed: '{transcript}'")
-            if transcript and self.on_transcript:
-                await self.on_transcript(self.session_id, "user", transcript)
-                logger.info(f"✅ User transcript saved: {transcript}")
-            else:
-                logger.warning("⚠️ Empty user transcript received")
-                
-        elif event_type == "response.audio_transcript.delta":
-            # Assistant's response transcript (streaming)
-            delta = event.get("delta", "")
-            if delta:
-                logger.debug(f"📝 Assistant transcript delta: '{delta}'")
-                
-        elif event_type == "response.audio_transcript.done":
-            # Assistant's complete response transcript
-            transcript = event.get("transcript", "")
-            logger.info(f"📝 Assistant transcription completed: '{transcript}'")
-            if transcript and self.on_transcript:
-                await self.on_transcript(self.session_id, "assistant", transcript)
-                logger.info(f"✅ Assistant transcript saved: {transcript}")
-            else:
-                logger.warning("⚠️ Empty assistant transcript received")
+    async def _on_audio_delta(self, event: Dict[str, Any]):
+        audio_data = event.get("delta", "")
+        if not audio_data:
+            return
+        logger.debug(f"🔊 Received audio delta: {len(audio_data)} chars")
+        if self.audio_consumers:
+            pcm = base64.b64decode(audio_data)
+            for consumer in list(self.audio_consumers):
+                await consumer(self.session_id, pcm)
                 
-        elif event_type == "response.audio.delta":
-            # Audio response chunk - we'll handle this later for playback
-            audio_data = event.get("delta", "")
-            if audio_data:
-                logger.debug(f"🔊 Received audio delta: {len(audio_data)} chars")
-            
-        elif event_type == "error":
-            error = event.get("error", {})
-            logger.error(f"❌ OpenAI API error: {error}")
-            
-        else:
-            logger.debug(f"❓ Unhandled OpenAI event type: {event_type}")
+    async def _on_error(self, event: Dict[str, Any]):
+        error = event.get("error", {})
+        logger.error(f"❌ OpenAI API error: {error}")
             
     async def disconnect(self):
         """Close the WebSocket connection"""
         self.is_connected = False
+        if self.audio:
+            try:
+                await self.audio.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Buffered audio not sent before disconnect: {e}")
+            logger.info(f"🎵 Audio sent: {self.audio_stats()}")
+            self.audio = None
         if self.websocket:
             await self.websocket.close()
             logger.info(f"Disconnected from OpenAI Realtime API for session {self.session_id}")
\ No newline at end of file
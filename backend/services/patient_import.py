@@ -0,0 +1,300 @@
+"""Bulk import of patient chart exports (files/*.md format) into profiles.
+
+Parse locally to check a batch of exports, or stream them to a running API:
+
+    python -m services.patient_import files/*.md --workers 4
+    python -m services.patient_import exports/*.md --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Any, Tuple
+
+from pydantic import ValidationError
+
+from api.types.medical_types import CreateUserProfileRequest
+
+logger = logging.getLogger(__name__)
+
+# Stable IDs, so re-importing the same patient updates their profile
+PATIENT_NAMESPACE = uuid.UUID("6f1c2b0e-3d4a-4c59-9b8e-2a7d5e1f0c34")
+
+SECTION_RE = re.compile(r"^-{3}\s*(.+?)\s*-{3}$")
+# Commas that aren't inside parentheses
+LIST_SPLIT_RE = re.compile(r",\s*(?![^()]*\))")
+
+# First matching keyword in a section title decides the MedicalHistory field
+SECTION_FIELDS = (
+    ("medication", "medications"),
+    ("allerg", "allergies"),
+    ("family", "family_history"),
+    ("surg", "surgeries"),
+    ("condition", "conditions"),
+    ("diagnos", "conditions"),
+)
+
+HEADER_FIELDS = {
+    "patient name": "name",
+    "name": "name",
+    "dob": "date_of_birth",
+    "date of birth": "date_of_birth",
+    "sex": "gender",
+    "gender": "gender",
+    "allergies": "allergies",
+}
+
+DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%Y-%m-%d", "%m/%d/%Y", "%d %B %Y")
+
+# (filename, profile record or None, error or None)
+ParseResult = Tuple[str, Optional[Dict[str, Any]], Optional[str]]
+
+
+def parse_date(value: str) -> Optional[date]:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def age_on(born: date, today: date) -> int:
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def parse_patient_lines(lines: Iterable[str]) -> Dict[str, Any]:
+    """Parse a chart export line by line into CreateUserProfileRequest fields.
+
+    Header ``Key: Value`` lines fill the demographics; ``--- Title ---``
+    sections fill the matching MedicalHistory list, and every other section
+    is kept in the notes.
+    """
+    record: Dict[str, Any] = {}
+    history: Dict[str, List[str]] = {field: [] for _, field in SECTION_FIELDS}
+    notes: List[str] = []
+    field: Optional[str] = None
+    title: Optional[str] = None
+    in_header = True
+
+    for raw in lines:
+        line = raw.strip().replace("**", "")
+        if not line:
+            continue
+        section = SECTION_RE.match(line)
+        if section:
+            in_header = False
+            title = section.group(1)
+            lowered = title.lower()
+            field = next((name for keyword, name in SECTION_FIELDS if keyword in lowered), None)
+            continue
+        if in_header:
+            key, separator, value = line.partition(":")
+            target = HEADER_FIELDS.get(key.strip().lower())
+            if separator and target == "allergies":
+                history["allergies"].extend(item.strip() for item in LIST_SPLIT_RE.split(value) if item.strip())
+            elif separator and target:
+                record[target] = value.strip()
+            continue
+        item = line[2:].strip() if line.startswith("- ") else line
+        if field is not None:
+            history[field].append(item)
+        else:
+            notes.append(f"{title}: {item}")
+
+    if not record.get("name"):
+        raise ValueError("Missing 'Patient Name' header")
+    if record.get("gender"):
+        record["gender"] = record["gender"].lower()
+    if record.get("date_of_birth"):
+        born = parse_date(record["date_of_birth"])
+        if born is None:
+            raise ValueError(f"Unrecognized date of birth: {record['date_of_birth']!r}")
+        record["date_of_birth"] = born.isoformat()
+        record["age"] = age_on(born, date.today())
+    record["medical_history"] = {**history, "notes": "\n".join(notes)}
+    return record
+
+
+def patient_user_id(record: Dict[str, Any]) -> str:
+    return str(uuid.uuid5(PATIENT_NAMESPACE, f"{record['name'].lower()}|{record.get('date_of_birth') or ''}"))
+
+
+def parse_patient_document(filename: str, content: str) -> ParseResult:
+    """Parse and validate one document; failures are returned, not raised"""
+    try:
+        request = CreateUserProfileRequest(**parse_patient_lines(content.splitlines()))
+    except ValidationError as e:
+        return filename, None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        )
+    except ValueError as e:
+        return filename, None, str(e)
+    record = request.model_dump()
+    record["user_id"] = patient_user_id(record)
+    return filename, record, None
+
+
+def parse_documents(documents: List[Tuple[str, str]]) -> List[ParseResult]:
+    """Process pool entry point: one chunk of documents per task keeps IPC overhead low"""
+    return [parse_patient_document(filename, content) for filename, content in documents]
+
+
+class PatientImporter:
+    """Parses uploaded chart exports in a process pool and inserts them in batches.
+
+    Documents are grouped into chunks of ``chunk_size`` as they arrive and
+    each chunk is parsed in a worker process, so parsing uses every core
+    while the request body is still streaming in. Each parsed chunk is
+    handed to ``insert`` as one batch.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 64):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.imports = 0
+        self.documents = 0
+        self.failed = 0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: a fork of the server would copy its event loop, threads and open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def import_documents(
+        self,
+        documents: AsyncIterator[Tuple[str, str]],
+        insert: Callable[[List[Dict[str, Any]]], Awaitable[int]]
+    ) -> Dict[str, Any]:
+        """Parse and insert a stream of (filename, content) documents; returns an import report"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        parsing: List[asyncio.Future] = []
+        chunk: List[Tuple[str, str]] = []
+        async for document in documents:
+            chunk.append(document)
+            if len(chunk) >= self.chunk_size:
+                parsing.append(loop.run_in_executor(self.pool, parse_documents, chunk))
+                chunk = []
+        if chunk:
+            parsing.append(loop.run_in_executor(self.pool, parse_documents, chunk))
+
+        received = imported = 0
+        errors: List[Dict[str, str]] = []
+        for next_chunk in asyncio.as_completed(parsing):
+            results = await next_chunk
+            received += len(results)
+            records = [record for _, record, _ in results if record is not None]
+            errors.extend({"filename": filename, "error": error} for filename, _, error in results if error is not None)
+            if records:
+                imported += await insert(records)
+
+        elapsed = time.perf_counter() - started
+        self.imports += 1
+        self.documents += received
+        self.failed += len(errors)
+        return {
+            "received": received,
+            "imported": imported,
+            "failed": len(errors),
+            "errors": errors,
+            "workers": self.workers,
+            "elapsed_seconds": round(elapsed, 3),
+            "documents_per_second": round(received / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "chunk_size": self.chunk_size,
+            "imports": self.imports,
+            "documents": self.documents,
+            "failed": self.failed,
+        }
+
+
+# Global instance
+patient_importer = PatientImporter(
+    workers=int(os.getenv("PATIENT_IMPORT_WORKERS", "0")) or None,
+    chunk_size=int(os.getenv("PATIENT_IMPORT_CHUNK_SIZE", "64"))
+)
+
+
+def read_documents(paths: Iterable[str]) -> Iterable[Tuple[str, str]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield os.path.basename(path), f.read()
+
+
+def parse_locally(paths: List[str], workers: int, chunk_size: int) -> List[ParseResult]:
+    chunks: List[List[Tuple[str, str]]] = []
+    documents = list(read_documents(paths))
+    for i in range(0, len(documents), chunk_size):
+        chunks.append(documents[i:i + chunk_size])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for results in pool.map(parse_documents, chunks) for result in results]
+
+
+async def upload(paths: List[str], url: str) -> Dict[str, Any]:
+    """Stream the documents as NDJSON to the API's import endpoint"""
+    import aiohttp
+
+    async def body():
+        for filename, content in read_documents(paths):
+            yield (json.dumps({"filename": filename, "content": content}) + "\n").encode("utf-8")
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{url.rstrip('/')}/api/profile/import",
+            data=body(),
+            headers={"Content-Type": "application/x-ndjson"}
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--url", help="API base URL; without it documents are only parsed and checked")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.url:
+        report = asyncio.run(upload(args.paths, args.url))
+        errors = report["errors"]
+        print(f"imported {report['imported']} of {report['received']} documents "
+              f"({report['documents_per_second']} docs/s on {report['workers']} server workers)")
+    else:
+        results = parse_locally(args.paths, args.workers, args.chunk_size)
+        errors = [{"filename": filename, "error": error} for filename, _, error in results if error is not None]
+        elapsed = time.perf_counter() - started
+        print(f"parsed {len(results) - len(errors)} of {len(results)} documents in {elapsed:.2f}s "
+              f"({len(results) / elapsed:.0f} docs/s on {args.workers} workers)")
+    for error in errors:
+        print(f"  {error['filename']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
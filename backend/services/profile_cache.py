@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProfileRow = Dict[str, Any]
+
+
+class _PendingUpdate:
+    """Field updates for one user waiting to go out as a single PATCH"""
+
+    def __init__(self, patch: Callable[[Dict[str, Any]], Awaitable[Optional[ProfileRow]]]):
+        self.patch = patch
+        self.fields: Dict[str, Any] = {}
+        self.waiters: List[asyncio.Future] = []
+
+
+class ProfileCache:
+    """Read-through cache and write coalescer in front of the profiles table.
+
+    Rows are served from memory for ``ttl_seconds``; after that the next read
+    asks upstream only for ``updated_at`` and keeps the cached row if it
+    hasn't changed. Concurrent misses for a user share one fetch. Updates to
+    the same user arriving within ``coalesce_seconds`` are merged (later
+    fields win) into one PATCH whose returned row refreshes the cache.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, coalesce_seconds: float = 0.05):
+        self.ttl_seconds = ttl_seconds
+        self.coalesce_seconds = coalesce_seconds
+        # user_id -> (row, expires_at)
+        self._entries: Dict[str, Tuple[ProfileRow, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every write so a read that raced it isn't cached
+        self._generations: Dict[str, int] = {}
+        self._pending: Dict[str, _PendingUpdate] = {}
+        self._flushing: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.inflight_joins = 0
+        self.revalidated = 0
+        self.upstream_reads = 0
+        self.updates = 0
+        self.patches = 0
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def _store(self, user_id: str, row: ProfileRow) -> None:
+        self._entries[user_id] = (row, time.monotonic() + self.ttl_seconds)
+
+    async def get(
+        self,
+        user_id: str,
+        fetch: Callable[[], Awaitable[Optional[ProfileRow]]],
+        fetch_updated_at: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[ProfileRow]:
+        """Cached row for a user, loading or revalidating it upstream when needed"""
+        flushing = self._flushing.get(user_id)
+        if flushing is not None:
+            # Read your own writes: let queued updates land first
+            await asyncio.gather(asyncio.shield(flushing), return_exceptions=True)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] >= time.monotonic():
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+
+        inflight = self._inflight.get(user_id)
+        if inflight is not None:
+            self.inflight_joins += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        generation = self._generations.get(user_id, 0)
+        try:
+            row = await self._load(user_id, entry, fetch, fetch_updated_at)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                e = RuntimeError("Profile fetch was cancelled")
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited isn't reported
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(user_id, None)
+        if self._generations.get(user_id, 0) == generation:
+            if row is None:
+                self._entries.pop(user_id, None)
+            else:
+                self._store(user_id, row)
+        future.set_result(row)
+        return row
+
+    async def _load(
+        self,
+        user_id: str,
+        entry: Optional[Tuple[ProfileRow, float]],
+        fetch: Callable[[], Awaitable[Optional[ProfileRow]]],
+        fetch_updated_at: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[ProfileRow]:
+        self.upstream_reads += 1
+        if entry is not None:
+            # Expired: a tiny updated_at probe usually saves transferring the row
+            updated_at = await fetch_updated_at()
+            if updated_at is not None and updated_at == entry[0].get("updated_at"):
+                self.revalidated += 1
+                return entry[0]
+            if updated_at is None:
+                return None
+            self.upstream_reads += 1
+        return await fetch()
+
+    async def update(
+        self,
+        user_id: str,
+        fields: Dict[str, Any],
+        patch: Callable[[Dict[str, Any]], Awaitable[Optional[ProfileRow]]]
+    ) -> Optional[ProfileRow]:
+        """Queue a partial update; resolves with the updated row once its coalesced PATCH lands"""
+        self.updates += 1
+        self.invalidate(user_id)
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = _PendingUpdate(patch)
+            self._pending[user_id] = pending
+            previous = self._flushing.get(user_id)
+            self._flushing[user_id] = asyncio.create_task(self._flush(user_id, pending, previous))
+        pending.fields.update(fields)
+        waiter = asyncio.get_running_loop().create_future()
+        pending.waiters.append(waiter)
+        return await waiter
+
+    async def _flush(self, user_id: str, pending: _PendingUpdate, previous: Optional[asyncio.Task]) -> None:
+        await asyncio.sleep(self.coalesce_seconds)
+        # Writes to one user go out in order
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        if self._pending.get(user_id) is pending:
+            del self._pending[user_id]
+
+        self.patches += 1
+        if len(pending.waiters) > 1:
+            logger.info(f"🧩 Coalesced {len(pending.waiters)} profile updates for {user_id} into one PATCH")
+        try:
+            row = await pending.patch(pending.fields)
+        except BaseException as e:
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            self.invalidate(user_id)
+            if row is not None and user_id not in self._pending:
+                self._store(user_id, row)
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_result(row)
+        finally:
+            if self._flushing.get(user_id) is asyncio.current_task():
+                del self._flushing[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "coalesce_seconds": self.coalesce_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "inflight_joins": self.inflight_joins,
+            "revalidated": self.revalidated,
+            "upstream_reads": self.upstream_reads,
+            "updates": self.updates,
+            "patches": self.patches,
+            "pending_updates": len(self._pending),
+        }
+
+
+# Global instance
+profile_cache = ProfileCache(
+    ttl_seconds=float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "30")),
+    coalesce_seconds=float(os.getenv("PROFILE_UPDATE_COALESCE_MS", "50")) / 1000
+)
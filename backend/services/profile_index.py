@@ -0,0 +1,207 @@
+import base64
+import bisect
+import heapq
+import json
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+# Every index orders profiles by (created_at, user_id); listings walk it newest first
+IndexKey = Tuple[str, str]
+
+AGE_BUCKET_SIZE = 10
+# Name trie nodes deeper than this aren't created; longer prefixes are checked per profile
+MAX_PREFIX_DEPTH = 6
+
+SUMMARY_FIELDS = ("user_id", "name", "age", "gender", "created_at")
+
+
+def encode_cursor(key: IndexKey) -> str:
+    """Opaque page cursor for the last profile of a page"""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> IndexKey:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        created_at, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(created_at, str) or not isinstance(user_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, user_id
+
+
+def _insert(keys: List[IndexKey], key: IndexKey) -> None:
+    i = bisect.bisect_left(keys, key)
+    if i == len(keys) or keys[i] != key:
+        keys.insert(i, key)
+
+
+def _discard(keys: List[IndexKey], key: IndexKey) -> None:
+    i = bisect.bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+def _newest_first(keys: List[IndexKey], before: Optional[IndexKey]) -> Iterator[IndexKey]:
+    """Walk a sorted key list backwards, starting just below ``before``"""
+    i = len(keys) if before is None else bisect.bisect_left(keys, before)
+    for j in range(i - 1, -1, -1):
+        yield keys[j]
+
+
+class _TrieNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Keys of every profile whose name starts with this node's prefix
+        self.keys: List[IndexKey] = []
+
+
+class ProfileIndex:
+    """Secondary indexes over the profile store for paginated, filtered listings.
+
+    Each index (all profiles, per gender, per age bucket and per name prefix)
+    is a list of (created_at, user_id) keys kept sorted, so a page is a bisect
+    to the cursor plus a walk of the page's entries. A query reads from the
+    smallest index among its filters and checks the remaining filters per
+    profile. Fed by the store's watcher, so replicated writes are indexed too.
+    """
+
+    def __init__(self):
+        self.by_created: List[IndexKey] = []
+        self.by_gender: Dict[str, List[IndexKey]] = {}
+        self.by_age_bucket: Dict[int, List[IndexKey]] = {}
+        self.name_trie = _TrieNode()
+        # Listing rows by user_id, so pages never touch the full profiles
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    @staticmethod
+    def _key(user_id: str, profile: Dict[str, Any]) -> IndexKey:
+        return profile.get("created_at") or "", user_id
+
+    @staticmethod
+    def _gender(profile: Dict[str, Any]) -> Optional[str]:
+        gender = profile.get("gender")
+        return gender.strip().lower() if gender else None
+
+    @staticmethod
+    def _name(profile: Dict[str, Any]) -> str:
+        return (profile.get("name") or "").strip().lower()
+
+    def on_change(self, user_id: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Store watcher: re-index a created, updated or deleted profile"""
+        if old is not None:
+            self.remove(user_id, old)
+        if new is not None:
+            self.add(user_id, new)
+
+    def add(self, user_id: str, profile: Dict[str, Any]) -> None:
+        key = self._key(user_id, profile)
+        _insert(self.by_created, key)
+        gender = self._gender(profile)
+        if gender:
+            _insert(self.by_gender.setdefault(gender, []), key)
+        age = profile.get("age")
+        if age is not None:
+            _insert(self.by_age_bucket.setdefault(age // AGE_BUCKET_SIZE, []), key)
+        node = self.name_trie
+        for ch in self._name(profile)[:MAX_PREFIX_DEPTH]:
+            node = node.children.setdefault(ch, _TrieNode())
+            _insert(node.keys, key)
+        self.summaries[user_id] = {field: profile.get(field) for field in SUMMARY_FIELDS}
+
+    def remove(self, user_id: str, profile: Dict[str, Any]) -> None:
+        key = self._key(user_id, profile)
+        _discard(self.by_created, key)
+        gender = self._gender(profile)
+        if gender in self.by_gender:
+            _discard(self.by_gender[gender], key)
+            if not self.by_gender[gender]:
+                del self.by_gender[gender]
+        age = profile.get("age")
+        if age is not None:
+            bucket = age // AGE_BUCKET_SIZE
+            if bucket in self.by_age_bucket:
+                _discard(self.by_age_bucket[bucket], key)
+                if not self.by_age_bucket[bucket]:
+                    del self.by_age_bucket[bucket]
+        node = self.name_trie
+        for ch in self._name(profile)[:MAX_PREFIX_DEPTH]:
+            child = node.children.get(ch)
+            if child is None:
+                break
+            _discard(child.keys, key)
+            if not child.keys:
+                # Nothing below an empty node either
+                del node.children[ch]
+                break
+            node = child
+        self.summaries.pop(user_id, None)
+
+    def _age_sources(self, min_age: Optional[int], max_age: Optional[int]) -> List[List[IndexKey]]:
+        low = None if min_age is None else min_age // AGE_BUCKET_SIZE
+        high = None if max_age is None else max_age // AGE_BUCKET_SIZE
+        return [
+            keys for bucket, keys in self.by_age_bucket.items()
+            if (low is None or bucket >= low) and (high is None or bucket <= high)
+        ]
+
+    def _name_source(self, prefix: str) -> List[IndexKey]:
+        node = self.name_trie
+        for ch in prefix[:MAX_PREFIX_DEPTH]:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.keys
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[IndexKey] = None,
+        name_prefix: Optional[str] = None,
+        gender: Optional[str] = None,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[IndexKey]]:
+        """Newest-first page of profile summaries after ``cursor``, plus the cursor for the next page"""
+        prefix = name_prefix.strip().lower() if name_prefix else ""
+        gender = gender.strip().lower() if gender else None
+
+        # Candidate sources per filter; the query walks whichever is smallest
+        options: List[List[List[IndexKey]]] = [[self.by_created]]
+        if gender:
+            options.append([self.by_gender.get(gender, [])])
+        if min_age is not None or max_age is not None:
+            options.append(self._age_sources(min_age, max_age))
+        if prefix:
+            options.append([self._name_source(prefix)])
+        sources = min(options, key=lambda lists: sum(len(keys) for keys in lists))
+
+        if len(sources) == 1:
+            walk = _newest_first(sources[0], cursor)
+        else:
+            walk = heapq.merge(*(_newest_first(keys, cursor) for keys in sources), reverse=True)
+
+        rows: List[Dict[str, Any]] = []
+        last_key: Optional[IndexKey] = None
+        for key in walk:
+            summary = self.summaries[key[1]]
+            if prefix and not (summary["name"] or "").strip().lower().startswith(prefix):
+                continue
+            if gender and (summary["gender"] or "").strip().lower() != gender:
+                continue
+            age = summary["age"]
+            if min_age is not None and (age is None or age < min_age):
+                continue
+            if max_age is not None and (age is None or age > max_age):
+                continue
+            if len(rows) == limit:
+                # There is at least one more match
+                return rows, last_key
+            rows.append(summary)
+            last_key = key
+        return rows, None
@@ -0,0 +1,48 @@
+from typing import Dict, Optional, Any, Tuple
+
+from api.types.medical_types import UserProfile
+
+
+class ProfileViewCache:
+    """Validated UserProfile models and their JSON bytes, per profile version.
+
+    The replicated profile store has to hold plain dicts, so reads would
+    otherwise validate a model from the dict and encode it again every time.
+    Entries are keyed by the profile's version and dropped by the store
+    watcher when a write changes it.
+    """
+
+    def __init__(self):
+        # user_id -> (version, model, JSON body)
+        self._entries: Dict[str, Tuple[int, UserProfile, bytes]] = {}
+        self.hits = 0
+        self.builds = 0
+
+    def put(self, user_id: str, version: int, profile: UserProfile) -> Tuple[UserProfile, bytes]:
+        body = profile.model_dump_json().encode("utf-8")
+        self._entries[user_id] = (version, profile, body)
+        return profile, body
+
+    def get(self, user_id: str, profile_data: Dict[str, Any]) -> Tuple[UserProfile, bytes]:
+        """Model and JSON body for a stored profile, built once per version"""
+        version = profile_data.get("version", 0)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1], entry[2]
+        self.builds += 1
+        return self.put(user_id, version, UserProfile.model_validate(profile_data))
+
+    def on_change(self, user_id: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Store watcher: drop the entry unless the write left its version in place (e.g. our own echo)"""
+        entry = self._entries.get(user_id)
+        if entry is not None and (new is None or new.get("version", 0) != entry[0]):
+            del self._entries[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": sum(len(entry[2]) for entry in self._entries.values()),
+            "hits": self.hits,
+            "builds": self.builds,
+        }
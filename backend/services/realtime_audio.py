@@ -0,0 +1,193 @@
+import asyncio
+import binascii
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# The Realtime API's pcm16 format: 24 kHz, 16-bit, mono
+PCM16_SAMPLE_RATE = 24000
+PCM16_BYTES_PER_SAMPLE = 2
+
+# input_audio_buffer.append written by hand around the base64 payload;
+# base64 needs no JSON escaping
+APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+APPEND_SUFFIX = b'"}'
+
+
+def pcm16_bytes(duration_ms: int, sample_rate: int = PCM16_SAMPLE_RATE) -> int:
+    return sample_rate * PCM16_BYTES_PER_SAMPLE * duration_ms // 1000
+
+
+class AudioSendPipeline:
+    """Batches small PCM16 chunks into ``input_audio_buffer.append`` frames.
+
+    ``write`` copies each chunk into a preallocated ring buffer and returns;
+    a sender task drains it one ``batch_ms`` batch at a time, base64-encoding
+    from a memoryview of the ring and assembling the event in a reused frame
+    buffer. When the socket falls behind and the ring fills up (``buffer_ms``
+    of audio), ``write`` waits for room instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[memoryview], Awaitable[None]],
+        batch_ms: int = 100,
+        buffer_ms: int = 2000,
+        sample_rate: int = PCM16_SAMPLE_RATE
+    ):
+        self._send = send
+        self.batch_ms = batch_ms
+        # Whole samples and whole base64 quanta, so batches split cleanly
+        self.batch_bytes = max(6, pcm16_bytes(batch_ms, sample_rate) // 6 * 6)
+        slots = max(2, -(-buffer_ms // max(1, batch_ms)))
+        self.capacity = self.batch_bytes * slots
+
+        self._ring = bytearray(self.capacity)
+        self._ring_view = memoryview(self._ring)
+        self._read = 0
+        self._size = 0
+        # A batch that wraps around the end of the ring is joined here
+        self._scratch = bytearray(self.batch_bytes)
+        self._frame = bytearray(len(APPEND_PREFIX) + 4 * (self.batch_bytes // 3) + len(APPEND_SUFFIX))
+        self._frame[:len(APPEND_PREFIX)] = APPEND_PREFIX
+        self._frame_view = memoryview(self._frame)
+
+        self._data = asyncio.Event()
+        self._space = asyncio.Event()
+        self._flushed = asyncio.Event()
+        self._flush_requested = False
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.bytes_in = 0
+        self.bytes_sent = 0
+        self.chunks_in = 0
+        self.frames_sent = 0
+        self.backpressure_waits = 0
+        self.backpressure_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def close(self) -> None:
+        """Send whatever is buffered, then stop the sender task"""
+        if self._task is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def write(self, data: bytes) -> None:
+        """Queue PCM16 audio; waits only while the ring buffer is full"""
+        chunk = memoryview(data).cast("B")
+        self.chunks_in += 1
+        self.bytes_in += len(chunk)
+        while chunk:
+            if self._error is not None:
+                raise self._error
+            free = self.capacity - self._size
+            if free == 0:
+                self.backpressure_waits += 1
+                started = time.perf_counter()
+                self._space.clear()
+                await self._space.wait()
+                self.backpressure_seconds += time.perf_counter() - started
+                continue
+            n = min(free, len(chunk))
+            start = (self._read + self._size) % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first] = chunk[:first]
+            if n > first:
+                self._ring[:n - first] = chunk[first:n]
+            self._size += n
+            chunk = chunk[n:]
+            if self._size >= self.batch_bytes:
+                self._data.set()
+
+    async def flush(self) -> None:
+        """Send the buffered audio, including a partial batch, and wait until it's out"""
+        if self._task is None:
+            return
+        if self._task.done():
+            if self._error is not None:
+                raise self._error
+            return
+        # Even with nothing buffered the last batch may still be in _send, so always hand-shake
+        self._flushed.clear()
+        self._flush_requested = True
+        self._data.set()
+        await self._flushed.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _take(self, n: int) -> memoryview:
+        """View of the next n buffered bytes; only copies when they wrap around the ring"""
+        end = self._read + n
+        if end <= self.capacity:
+            batch = self._ring_view[self._read:end]
+        else:
+            first = self.capacity - self._read
+            self._scratch[:first] = self._ring_view[self._read:]
+            self._scratch[first:n] = self._ring_view[:n - first]
+            batch = memoryview(self._scratch)[:n]
+        self._read = end % self.capacity
+        self._size -= n
+        return batch
+
+    def _encode(self, batch: memoryview) -> memoryview:
+        """Fill the reused frame buffer with an append event for this batch"""
+        # binascii can't encode into a caller's buffer, so each batch still costs one
+        # short-lived bytes object (about 6 KB at 100 ms) and a copy into the frame
+        encoded = binascii.b2a_base64(batch, newline=False)
+        start = len(APPEND_PREFIX)
+        end = start + len(encoded)
+        self._frame[start:end] = encoded
+        self._frame[end:end + len(APPEND_SUFFIX)] = APPEND_SUFFIX
+        return self._frame_view[:end + len(APPEND_SUFFIX)]
+
+    async def _drain(self) -> None:
+        try:
+            while True:
+                if self._size < self.batch_bytes and not self._flush_requested:
+                    self._data.clear()
+                    await self._data.wait()
+                    continue
+                n = min(self._size, self.batch_bytes)
+                if n:
+                    # Encoded before sending, so the ring space is free while the socket drains
+                    frame = self._encode(self._take(n))
+                    self._space.set()
+                    await self._send(frame)
+                    self.frames_sent += 1
+                    self.bytes_sent += n
+                if self._flush_requested and self._size == 0:
+                    self._flush_requested = False
+                    self._flushed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Audio send failed: {e}")
+            self._error = e
+            # Release anyone waiting on the pipeline
+            self._space.set()
+            self._flushed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batch_ms": self.batch_ms,
+            "batch_bytes": self.batch_bytes,
+            "capacity_bytes": self.capacity,
+            "buffered_bytes": self._size,
+            "chunks_in": self.chunks_in,
+            "bytes_in": self.bytes_in,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_seconds": round(self.backpressure_seconds, 3),
+        }
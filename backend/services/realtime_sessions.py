@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Any, Tuple
+
+from services.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+OPENAI_API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_SESSION_TIMEOUT = 15.0
+REALTIME_MODEL = "gpt-4o-realtime-preview"
+
+# Ephemeral keys live about a minute; used when a response carries no expires_at
+DEFAULT_SESSION_TTL_SECONDS = 60.0
+
+REALTIME_SESSION_CONFIG = {
+    "model": REALTIME_MODEL,
+    "modalities": ["text", "audio"],
+    "instructions": "You are Dr. AI, a witty and knowledgeable medical expert with a great sense of humor. You have years of experience in general practice and love making patients feel comfortable with your friendly banter and medical dad jokes. Always respond in English only, regardless of what language the patient speaks to you. Keep your responses conversational, warm, and reassuring while maintaining medical professionalism. Feel free to use light humor to put patients at ease, but always take their concerns seriously. Ask relevant follow-up questions about symptoms, medical history, and current concerns. Always respond with audio.",
+    "voice": "alloy",
+    "input_audio_format": "pcm16",
+    "output_audio_format": "pcm16",
+    "input_audio_transcription": {
+        "model": "whisper-1",
+        "language": "en"
+    },
+    "turn_detection": {
+        "type": "server_vad",
+        "threshold": 0.5,
+        "prefix_padding_ms": 300,
+        "silence_duration_ms": 500
+    },
+    "temperature": 0.8,
+    "max_response_output_tokens": 4096
+}
+
+
+class RealtimeSessionError(Exception):
+    """OpenAI refused to create an ephemeral session"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+async def mint_realtime_session() -> Dict[str, Any]:
+    """Create an ephemeral Realtime session; raises RealtimeSessionError on a non-200 response"""
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise RealtimeSessionError(500, "OpenAI API key not configured")
+
+    async with http_client.post(
+        f"{OPENAI_API_BASE}/realtime/sessions",
+        headers={
+            "Authorization": f"Bearer {openai_api_key}",
+            "Content-Type": "application/json"
+        },
+        json=REALTIME_SESSION_CONFIG,
+        timeout=OPENAI_SESSION_TIMEOUT
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"❌ OpenAI session creation failed: {response.status} - {error_text}")
+            raise RealtimeSessionError(response.status, f"OpenAI API error: {error_text}")
+        session_data = await response.json()
+    session_data.setdefault("client_secret", {}).setdefault("expires_at", time.time() + DEFAULT_SESSION_TTL_SECONDS)
+    return session_data
+
+
+def session_expires_at(session_data: Dict[str, Any]) -> float:
+    return float(session_data["client_secret"]["expires_at"])
+
+
+class RealtimeSessionPool:
+    """Ephemeral Realtime sessions minted ahead of time so a consultation starts instantly.
+
+    A background task keeps ``size`` sessions ready and drops any within
+    ``refresh_margin_seconds`` of expiring, minting replacements, so a handed
+    out key always has time left for the SDP exchange. When the pool is
+    empty (or disabled with size 0) sessions are minted on demand.
+    """
+
+    def __init__(self, size: int = 0, refresh_margin_seconds: float = 20.0, retry_delay: float = 1.0):
+        self.size = size
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_delay = retry_delay
+        # Oldest first, so keys are handed out before they lapse
+        self._ready: Deque[Dict[str, Any]] = deque()
+        self._minting = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.minted = 0
+        self.mint_failures = 0
+
+    def start(self) -> None:
+        if self.size <= 0 or self._task is not None:
+            return
+        if not os.getenv("OPENAI_API_KEY"):
+            logger.warning("⚠️ Realtime session pool disabled: OpenAI API key not configured")
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._maintain())
+        logger.info(f"🔑 Realtime session pool keeping {self.size} sessions ready")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._ready.clear()
+
+    def _usable(self, session_data: Dict[str, Any], now: float) -> bool:
+        return session_expires_at(session_data) - self.refresh_margin_seconds > now
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        while self._ready and not self._usable(self._ready[0], now):
+            self._ready.popleft()
+            self.expired += 1
+
+    async def _mint_one(self) -> None:
+        self._minting += 1
+        try:
+            session_data = await mint_realtime_session()
+        finally:
+            self._minting -= 1
+        self.minted += 1
+        if not self._usable(session_data, time.time()):
+            raise ValueError("Minted session expires within the refresh margin; lower REALTIME_SESSION_REFRESH_MARGIN_SECONDS")
+        self._ready.append(session_data)
+
+    async def _maintain(self) -> None:
+        failures = 0
+        while True:
+            self._wake.clear()
+            self._evict_expired()
+            deficit = self.size - len(self._ready) - self._minting
+            if deficit > 0:
+                results = await asyncio.gather(*(self._mint_one() for _ in range(deficit)), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    self.mint_failures += len(errors)
+                    failures += 1
+                    logger.warning(f"⚠️ Realtime session pool refill failed: {errors[0]}")
+                    await asyncio.sleep(min(30.0, self.retry_delay * (2 ** (failures - 1))))
+                    continue
+                failures = 0
+                # Minted in parallel, so keep the deque ordered by expiry
+                self._ready = deque(sorted(self._ready, key=session_expires_at))
+
+            # Sleep until the oldest key needs replacing or a session is handed out
+            timeout = None
+            if self._ready:
+                timeout = max(0.0, session_expires_at(self._ready[0]) - self.refresh_margin_seconds - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self) -> Tuple[Dict[str, Any], bool]:
+        """A ready session (and True), or a freshly minted one (and False) if none is ready"""
+        self._evict_expired()
+        if self._wake is not None:
+            self._wake.set()
+        if self._ready:
+            self.hits += 1
+            return self._ready.popleft(), True
+        self.misses += 1
+        return await mint_realtime_session(), False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        now = time.time()
+        return {
+            "size": self.size,
+            "running": self._task is not None,
+            "ready": len(self._ready),
+            "minting": self._minting,
+            "refresh_margin_seconds": self.refresh_margin_seconds,
+            "oldest_expires_in": round(session_expires_at(self._ready[0]) - now, 1) if self._ready else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "minted": self.minted,
+            "mint_failures": self.mint_failures,
+        }
+
+
+# Global instance
+realtime_session_pool = RealtimeSessionPool(
+    size=int(os.getenv("REALTIME_SESSION_POOL_SIZE", "0")),
+    refresh_margin_seconds=float(os.getenv("REALTIME_SESSION_REFRESH_MARGIN_SECONDS", "20"))
+)
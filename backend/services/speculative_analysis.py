@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Any
+
+from api.types.medical_types import FinishConversationResponse
+from services.analysis_cache import analysis_cache, without_timestamped_fields
+from services.conversation_store import conversation_store
+from services.medical_analysis import (
+    build_analysis_prompt,
+    build_fallback_analysis,
+    build_profile_context,
+    build_report,
+    build_update_prompt,
+    try_parse_analysis,
+    render_transcript,
+    report_timestamps,
+    request_analysis,
+)
+from services.transcript_fanout import POLICY_COALESCE, SlowConsumerError
+
+logger = logging.getLogger(__name__)
+
+
+class SessionDraft:
+    """Running conversation buffer and rolling partial report for one live session"""
+
+    def __init__(self, session_id: str, profile_context: str):
+        self.session_id = session_id
+        self.profile_context = profile_context
+        # Rendered conversation lines, appended as transcripts arrive
+        self.lines: List[str] = []
+        self.cursor = 0
+        # How many lines the partial report covers
+        self.analyzed_lines = 0
+        self.partial: Optional[Dict[str, Any]] = None
+        self.subscriber = None
+        self.follower: Optional[asyncio.Task] = None
+        self.run: Optional[asyncio.Task] = None
+
+    @property
+    def pending_lines(self) -> int:
+        return len(self.lines) - self.analyzed_lines
+
+
+class SpeculativeAnalyzer:
+    """Opt-in background analysis of live sessions.
+
+    Follows each tracked session's transcripts and keeps a partial report up
+    to date, re-analyzing every ``every_turns`` new turns or once the
+    conversation goes quiet for ``idle_seconds``. Each run only sends the new
+    part of the conversation along with the previous partial report, so at
+    finish only the last delta is left to analyze.
+    """
+
+    def __init__(self, enabled: bool = False, every_turns: int = 6, idle_seconds: float = 8.0, max_concurrency: int = 2):
+        self.enabled = enabled
+        self.every_turns = every_turns
+        self.idle_seconds = idle_seconds
+        self.drafts: Dict[str, SessionDraft] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.runs = 0
+        self.failed_runs = 0
+        self.reused = 0
+        self.finalized_with_delta = 0
+
+    def is_tracking(self, session_id: str) -> bool:
+        return session_id in self.drafts
+
+    def track(self, session_id: str, user_profile: Optional[Dict[str, Any]] = None) -> None:
+        """Start following a live session, if speculative analysis is enabled"""
+        if not self.enabled or session_id in self.drafts:
+            return
+        draft = SessionDraft(session_id, build_profile_context(user_profile))
+        # Coalescing: when it falls behind the follower re-reads from the store anyway
+        draft.subscriber = conversation_store.subscribe(session_id, policy=POLICY_COALESCE)
+        draft.follower = asyncio.create_task(self._follow(draft))
+        self.drafts[session_id] = draft
+        logger.info(f"🔮 Speculative analysis tracking session: {session_id}")
+
+    def _buffer(self, draft: SessionDraft) -> None:
+        """Append transcripts that arrived since the last call to the draft's buffer"""
+        for transcript in conversation_store.transcripts_since(draft.session_id, draft.cursor):
+            draft.lines.append(render_transcript(transcript))
+            draft.cursor = transcript.seq
+
+    async def _follow(self, draft: SessionDraft) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(draft.subscriber.get(), timeout=self.idle_seconds)
+                self._buffer(draft)
+                if draft.pending_lines >= self.every_turns:
+                    self._schedule(draft)
+            except asyncio.TimeoutError:
+                # Idle gap in the conversation: a good time to catch up
+                if draft.pending_lines:
+                    self._schedule(draft)
+            except SlowConsumerError:
+                return
+
+    def _schedule(self, draft: SessionDraft) -> None:
+        if draft.run is not None and not draft.run.done():
+            return
+        draft.run = asyncio.create_task(self._analyze(draft))
+
+    async def _request(self, draft: SessionDraft, upto: int, profile_context: str, timestamps: Dict[str, str]) -> Optional[str]:
+        """Ask the LLM for a report covering ``lines[:upto]``, building on the partial report if there is one"""
+        if draft.partial is None:
+            prompt = build_analysis_prompt(profile_context, "".join(draft.lines[:upto]), timestamps)
+        else:
+            delta = "".join(draft.lines[draft.analyzed_lines:upto])
+            prompt = build_update_prompt(profile_context, draft.partial, delta, timestamps)
+        return await request_analysis(prompt)
+
+    async def _analyze(self, draft: SessionDraft) -> None:
+        """Fold the pending turns into the partial report"""
+        upto = len(draft.lines)
+        try:
+            async with self._semaphore:
+                content = await self._request(draft, upto, draft.profile_context, report_timestamps())
+            if content is None:
+                raise ValueError("Empty response from LLM")
+            draft.partial = json.loads(content)
+            draft.analyzed_lines = upto
+            self.runs += 1
+            logger.info(f"🔮 Partial report for session {draft.session_id} now covers {upto} turns")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep the previous partial; the turns stay pending for the next run
+            self.failed_runs += 1
+            logger.warning(f"⚠️ Speculative analysis failed for session {draft.session_id}: {e}")
+
+    async def _stop(self, draft: SessionDraft) -> None:
+        tasks = [task for task in (draft.follower, draft.run) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        conversation_store.unsubscribe(draft.session_id, draft.subscriber)
+
+    async def finalize(
+        self,
+        session_id: str,
+        user_profile: Optional[Dict[str, Any]],
+        duration_seconds: float,
+        timestamps: Dict[str, str],
+        cache_key: Optional[str] = None
+    ) -> FinishConversationResponse:
+        """Produce the final report for a tracked session, analyzing only what the partial report misses.
+
+        A usable result is stored in the analysis cache under ``cache_key``.
+        """
+        draft = self.drafts.pop(session_id)
+        # An in-flight run would only shrink the delta; one call on the full delta is faster
+        await self._stop(draft)
+        self._buffer(draft)
+
+        profile_context = build_profile_context(user_profile)
+        if draft.partial is not None and not draft.pending_lines and profile_context == draft.profile_context:
+            logger.info(f"🔮 Reusing partial report for session {session_id} ({len(draft.lines)} turns)")
+            self.reused += 1
+            # A reused draft gets its report ID and date from finish time
+            analysis_result = without_timestamped_fields(draft.partial)
+        else:
+            logger.info(
+                f"🔮 Finalizing session {session_id}: {draft.pending_lines} of {len(draft.lines)} turns left to analyze"
+            )
+            self.finalized_with_delta += 1
+            content = await self._request(draft, len(draft.lines), profile_context, timestamps)
+            analysis_result = try_parse_analysis(content)
+            if analysis_result is None:
+                analysis_result = build_fallback_analysis(user_profile, timestamps)
+                cache_key = None
+
+        if cache_key is not None:
+            analysis_cache.put(cache_key, analysis_result)
+
+        return build_report(session_id, analysis_result, duration_seconds, len(draft.lines), timestamps)
+
+    async def discard(self, session_id: str) -> None:
+        """Stop following a session without producing a report"""
+        draft = self.drafts.pop(session_id, None)
+        if draft is not None:
+            await self._stop(draft)
+
+    async def shutdown(self) -> None:
+        for session_id in list(self.drafts):
+            await self.discard(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "every_turns": self.every_turns,
+            "idle_seconds": self.idle_seconds,
+            "tracked_sessions": len(self.drafts),
+            "pending_turns": sum(draft.pending_lines for draft in self.drafts.values()),
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "reused": self.reused,
+            "finalized_with_delta": self.finalized_with_delta,
+        }
+
+
+# Global instance
+speculative_analysis = SpeculativeAnalyzer(
+    enabled=os.getenv("SPECULATIVE_ANALYSIS", "0") == "1",
+    every_turns=int(os.getenv("SPECULATIVE_ANALYSIS_EVERY_TURNS", "6")),
+    idle_seconds=float(os.getenv("SPECULATIVE_ANALYSIS_IDLE_SECONDS", "8")),
+    max_concurrency=int(os.getenv("SPECULATIVE_ANALYSIS_MAX_CONCURRENCY", "2"))
+)
@@ -0,0 +1,271 @@
+"""Store broker: orders conversation-store writes from every API worker.
+
+Run one broker per host and point each worker at it with STORE_BUS_URL:
+
+    python -m services.store_broker --socket data/store.sock
+    STORE_BUS_URL=data/store.sock uvicorn main:app --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Any
+
+from services.conversation_store import ConversationStore, RetentionPolicy
+from services.store_bus import (
+    BROKER_ORIGIN,
+    CONVERSATION_OPS,
+    encode_envelope,
+    read_frame,
+    split_envelope,
+)
+from services.transcript_wal import (
+    TranscriptWAL,
+    OP_TRANSCRIPT,
+    OP_KV_SET,
+    OP_KV_DELETE,
+    OP_SYNCED,
+    decode,
+    encode_json,
+    encode_transcript,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StoreBroker:
+    """Single writer for the multi-worker conversation store.
+
+    Workers send writes over a Unix socket. The broker applies them one at a
+    time to its own store replica, assigns transcript seqs, appends them to
+    the WAL and, once they are durable, broadcasts them in that same order to
+    every worker (including the one that sent it). New workers first receive
+    a snapshot of the current state. Replicated dict namespaces are held in
+    ``kv`` and logged alongside conversation records.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        store: ConversationStore,
+        wal: Optional[TranscriptWAL] = None,
+        max_client_buffer: int = 8 * 1024 * 1024
+    ):
+        self.socket_path = socket_path
+        self.store = store
+        self.wal = wal
+        self.max_client_buffer = max_client_buffer
+        self.kv: Dict[str, Dict[str, Any]] = {}
+        self.clients: List[asyncio.StreamWriter] = []
+        self._inbox: Optional[asyncio.Queue] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._compaction: Optional[asyncio.Task] = None
+
+        self.records_applied = 0
+        self.clients_dropped = 0
+
+    # State
+
+    def _apply(self, op: int, body: Any) -> Optional[bytes]:
+        """Apply a record and return the payload to log and broadcast"""
+        if op in CONVERSATION_OPS:
+            transcript = self.store.apply_record(op, body)
+            self.store.enforce_retention()
+            if op == OP_TRANSCRIPT:
+                if transcript is None:
+                    return None
+                # Re-encode with the seq we just assigned
+                return encode_transcript(
+                    transcript.session_id, transcript.seq, transcript.role.value,
+                    transcript.content, transcript.timestamp_ns
+                )
+            return encode_json(op, body)
+        if op == OP_KV_SET:
+            self.kv.setdefault(body["namespace"], {})[body["key"]] = body["value"]
+        elif op == OP_KV_DELETE:
+            self.kv.get(body["namespace"], {}).pop(body["key"], None)
+        else:
+            logger.warning(f"⚠️ Unknown store bus op {op}, ignoring")
+            return None
+        return encode_json(op, body)
+
+    def snapshot_records(self, spill_ended: bool = True) -> List[bytes]:
+        """Conversation and replicated dict records that rebuild the current state"""
+        records = self.store.snapshot_records(spill_ended=spill_ended)
+        for namespace, values in self.kv.items():
+            for key, value in values.items():
+                records.append(encode_json(OP_KV_SET, {"namespace": namespace, "key": key, "value": value}))
+        return records
+
+    # Ordering
+
+    async def _sequence(self) -> None:
+        """Apply incoming writes in arrival order and queue them for broadcast"""
+        while True:
+            origin, nonce, payload = await self._inbox.get()
+            try:
+                op, body = decode(payload)
+                applied = self._apply(op, body)
+            except Exception as e:
+                logger.error(f"❌ Rejected store bus record: {e}")
+                applied = None
+            self.records_applied += 1
+            if applied is None:
+                # Nothing to replicate, but the sender still waits for an ack
+                self._outbox.put_nowait((None, encode_envelope(origin, nonce, bytes((OP_SYNCED,)))))
+                continue
+            durable = self.wal.append(applied) if self.wal is not None else None
+            self._outbox.put_nowait((durable, encode_envelope(origin, nonce, applied)))
+            self._maybe_compact()
+
+    async def _broadcast(self) -> None:
+        """Send applied records to every client once they are durable"""
+        while True:
+            durable, message = await self._outbox.get()
+            if durable is not None:
+                try:
+                    await durable
+                except Exception as e:
+                    logger.error(f"❌ Store broker WAL write failed: {e}")
+            for writer in list(self.clients):
+                self._send(writer, message)
+
+    def _send(self, writer: asyncio.StreamWriter, message: bytes) -> None:
+        if writer.is_closing():
+            self._drop(writer)
+            return
+        if writer.transport.get_write_buffer_size() > self.max_client_buffer:
+            # A worker that can't keep up reconnects and resyncs from a snapshot
+            logger.warning("⚠️ Dropping slow store bus client")
+            writer.close()
+            self._drop(writer)
+            return
+        writer.write(message)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        if writer in self.clients:
+            self.clients.remove(writer)
+            self.clients_dropped += 1
+
+    # Connections
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Snapshot and registration happen without yielding, so the client
+        # sees every record applied after the snapshot. Records that are in
+        # both are applied twice, which is idempotent.
+        records = self.snapshot_records(spill_ended=False)
+        for payload in records:
+            writer.write(encode_envelope(BROKER_ORIGIN, 0, payload))
+        writer.write(encode_envelope(BROKER_ORIGIN, 0, bytes((OP_SYNCED,))))
+        self.clients.append(writer)
+        logger.info(f"🔌 Store bus client connected ({len(self.clients)} total), sent {len(records)} snapshot records")
+        try:
+            while True:
+                origin, nonce, payload = split_envelope(await read_frame(reader))
+                self._inbox.put_nowait((origin, nonce, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._drop(writer)
+            writer.close()
+            logger.info(f"🔌 Store bus client disconnected ({len(self.clients)} remaining)")
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        """Replay the WAL and start accepting workers"""
+        count = 0
+        if self.wal is not None:
+            for op, body in self.wal.replay():
+                self._apply(op, body)
+                count += 1
+            await self.wal.start()
+            if count:
+                await self.wal.compact(self.snapshot_records)
+        logger.info(f"📝 Store broker replayed {count} records into {len(self.store.conversations)} sessions")
+
+        self._inbox = asyncio.Queue()
+        self._outbox = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._sequence()), asyncio.create_task(self._broadcast())]
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        socket_dir = os.path.dirname(self.socket_path)
+        if socket_dir:
+            os.makedirs(socket_dir, exist_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        logger.info(f"🚀 Store broker listening on {self.socket_path}")
+
+    def _maybe_compact(self) -> None:
+        if self.wal is None or not self.wal.needs_compaction:
+            return
+        if self._compaction is not None and not self._compaction.done():
+            return
+        self._compaction = asyncio.create_task(self.wal.compact(self.snapshot_records))
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.clients):
+            writer.close()
+        self.clients = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._compaction is not None:
+            await asyncio.gather(self._compaction, return_exceptions=True)
+        if self.wal is not None:
+            await self.wal.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "socket_path": self.socket_path,
+            "clients": len(self.clients),
+            "clients_dropped": self.clients_dropped,
+            "records_applied": self.records_applied,
+            "kv_namespaces": {namespace: len(values) for namespace, values in self.kv.items()},
+            "wal": self.wal.stats() if self.wal else None,
+        }
+
+
+async def serve(args: argparse.Namespace) -> None:
+    store = ConversationStore(
+        retention=RetentionPolicy(
+            max_sessions=int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000")),
+            max_bytes=int(os.getenv("CONVERSATION_MAX_BYTES", str(256 * 1024 * 1024))),
+            idle_ttl_seconds=float(os.getenv("CONVERSATION_IDLE_TTL_SECONDS", "3600"))
+        ),
+        spill_dir=args.spill_dir
+    )
+    wal = TranscriptWAL(
+        args.wal_dir,
+        segment_bytes=int(os.getenv("WAL_SEGMENT_BYTES", str(64 * 1024 * 1024))),
+        flush_interval=float(os.getenv("WAL_FLUSH_INTERVAL_MS", "2")) / 1000,
+        sync=os.getenv("WAL_FSYNC", "1") == "1",
+        compact_every_segments=int(os.getenv("WAL_COMPACT_EVERY_SEGMENTS", "8"))
+    ) if args.wal_dir else None
+    broker = StoreBroker(args.socket, store, wal)
+    await broker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=os.getenv("STORE_BUS_URL", "data/store.sock"))
+    parser.add_argument("--wal-dir", default=os.getenv("CONVERSATION_WAL_DIR", "data/wal"))
+    parser.add_argument("--spill-dir", default=os.getenv("CONVERSATION_SPILL_DIR", "data/conversations"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
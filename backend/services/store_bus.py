@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import struct
+from collections import UserDict
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from uuid import uuid4
+
+from services.transcript_wal import (
+    FRAME_HEADER,
+    OP_CREATE,
+    OP_TRANSCRIPT,
+    OP_END,
+    OP_ANALYSIS,
+    OP_KV_SET,
+    OP_KV_DELETE,
+    OP_SYNCED,
+    decode,
+    encode_json,
+    frame,
+)
+
+logger = logging.getLogger(__name__)
+
+# Every bus message carries the publishing worker's ID and a per-worker nonce
+# so a worker can tell when the broker has ordered one of its own writes.
+ENVELOPE = struct.Struct("<16sQ")
+BROKER_ORIGIN = bytes(16)
+
+CONVERSATION_OPS = (OP_CREATE, OP_TRANSCRIPT, OP_END, OP_ANALYSIS)
+
+
+def store_bus_url() -> str:
+    """Broker socket path from STORE_BUS_URL (``unix:`` prefix optional); empty means single-process"""
+    url = os.getenv("STORE_BUS_URL", "")
+    return url[len("unix:"):] if url.startswith("unix:") else url
+
+
+def encode_envelope(origin: bytes, nonce: int, payload: bytes) -> bytes:
+    return frame(ENVELOPE.pack(origin, nonce) + payload)
+
+
+def split_envelope(message: bytes) -> Tuple[bytes, int, bytes]:
+    origin, nonce = ENVELOPE.unpack_from(message, 0)
+    return origin, nonce, message[ENVELOPE.size:]
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one length-prefixed frame; raises IncompleteReadError on EOF"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    length, _ = FRAME_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+class ReplicatedDict(UserDict):
+    """A dict whose writes are replicated to every worker through the store bus.
+
+    Without a bus it behaves like a plain dict. Values must be JSON-serializable,
+    and nested values must be replaced rather than mutated in place for the
+    change to reach other workers. Watchers are called with
+    ``(key, old, new)`` after every local or replicated write (None for a
+    missing value), so derived indexes stay in step on every worker.
+    """
+
+    def __init__(self, namespace: str):
+        super().__init__()
+        self.namespace = namespace
+        self.bus: Optional["StoreBus"] = None
+        self.watchers: List[Callable[[str, Optional[Any], Optional[Any]], None]] = []
+
+    def attach(self, bus: "StoreBus") -> None:
+        self.bus = bus
+        bus.register_namespace(self)
+
+    def watch(self, watcher: Callable[[str, Optional[Any], Optional[Any]], None]) -> None:
+        self.watchers.append(watcher)
+
+    def _changed(self, key: str, old: Optional[Any], new: Optional[Any]) -> None:
+        for watcher in self.watchers:
+            watcher(key, old, new)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        old = self.data.get(key)
+        self.data[key] = value
+        self._changed(key, old, value)
+        if self.bus is not None:
+            self.bus.publish(encode_json(OP_KV_SET, {
+                "namespace": self.namespace, "key": key, "value": value
+            }))
+
+    def __delitem__(self, key: str) -> None:
+        old = self.data.pop(key)
+        self._changed(key, old, None)
+        if self.bus is not None:
+            self.bus.publish(encode_json(OP_KV_DELETE, {
+                "namespace": self.namespace, "key": key
+            }))
+
+    def apply(self, op: int, body: Dict[str, Any]) -> None:
+        """Apply a replicated write from the bus"""
+        key = body["key"]
+        old = self.data.get(key)
+        if op == OP_KV_SET:
+            self.data[key] = body["value"]
+            self._changed(key, old, body["value"])
+        elif key in self.data:
+            del self.data[key]
+            self._changed(key, old, None)
+
+
+class StoreBus:
+    """Worker-side connection to the store broker over a Unix socket.
+
+    The broker puts every write from every worker into one order and streams
+    it back to all of them; each worker applies that stream to its local
+    ConversationStore replica and replicated dicts. Reads stay local.
+    """
+
+    def __init__(self, socket_path: str, reconnect_delay: float = 0.5):
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid4().bytes
+        self._nonce = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._store = None
+        self._namespaces: Dict[str, ReplicatedDict] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    def register_store(self, store) -> None:
+        self._store = store
+
+    def register_namespace(self, replicated: ReplicatedDict) -> None:
+        self._namespaces[replicated.namespace] = replicated
+
+    async def connect(self) -> None:
+        """Connect, apply the broker's snapshot and start following its stream"""
+        await self._open()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _open(self) -> None:
+        self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+        count = 0
+        while True:
+            _, _, payload = split_envelope(await read_frame(self._reader))
+            op, body = decode(payload)
+            if op == OP_SYNCED:
+                break
+            self._dispatch(op, body)
+            count += 1
+        logger.info(f"🔌 Connected to store broker at {self.socket_path}, applied {count} snapshot records")
+
+    async def _listen(self) -> None:
+        while not self._closing:
+            try:
+                message = await read_frame(self._reader)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                if self._closing:
+                    return
+                logger.error(f"❌ Lost store broker connection: {e!r}, reconnecting")
+                await self._reconnect()
+                continue
+            origin, nonce, payload = split_envelope(message)
+            self.received += 1
+            try:
+                op, body = decode(payload)
+                self._dispatch(op, body)
+            except Exception as e:
+                logger.error(f"❌ Failed to apply bus record: {e}")
+            if origin == self.origin:
+                waiter = self._pending.pop(nonce, None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(None)
+
+    async def _reconnect(self) -> None:
+        error = ConnectionError("store broker connection lost")
+        for waiter in self._pending.values():
+            if not waiter.done():
+                waiter.set_exception(error)
+        self._pending.clear()
+        while not self._closing:
+            try:
+                await self._open()
+                self.reconnects += 1
+                return
+            except OSError as e:
+                logger.warning(f"⚠️ Store broker reconnect failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    def _dispatch(self, op: int, body: Any) -> None:
+        if op in CONVERSATION_OPS:
+            if self._store is not None:
+                self._store.on_bus_record(op, body)
+        elif op in (OP_KV_SET, OP_KV_DELETE):
+            replicated = self._namespaces.get(body["namespace"])
+            if replicated is not None:
+                replicated.apply(op, body)
+
+    def publish(self, payload: bytes) -> asyncio.Future:
+        """Send a write to the broker.
+
+        Returns a future resolved once the broker has ordered the write and this
+        worker has applied it.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._writer is None or self._writer.is_closing():
+            future.set_exception(ConnectionError("Not connected to store broker"))
+            future.add_done_callback(self._log_failure)
+            return future
+        self._nonce += 1
+        self._pending[self._nonce] = future
+        self._writer.write(encode_envelope(self.origin, self._nonce, payload))
+        self.published += 1
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future) -> None:
+        # Fire-and-forget publishes (replicated dict writes) have no awaiter
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"❌ Store bus publish failed: {future.exception()}")
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "socket_path": self.socket_path,
+            "connected": self._writer is not None and not self._writer.is_closing(),
+            "published": self.published,
+            "received": self.received,
+            "pending": len(self._pending),
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Any
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+# Backpressure policies applied when a subscriber's buffer is full
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_COALESCE = "coalesce"
+POLICY_DISCONNECT = "disconnect"
+POLICIES = (POLICY_DROP_OLDEST, POLICY_COALESCE, POLICY_DISCONNECT)
+
+
+class ResyncEvent:
+    """Delivered in place of the backlog after a coalescing subscriber overflows"""
+
+    __slots__ = ("missed",)
+
+    def __init__(self, missed: int):
+        self.missed = missed
+
+
+class SlowConsumerError(Exception):
+    """Raised to a subscriber that was disconnected for falling too far behind"""
+
+
+class TranscriptSubscriber:
+    """Bounded, non-blocking buffer between the store and one consumer.
+
+    ``offer`` never awaits, so a stalled consumer can't hold up the producer;
+    what happens on overflow is decided by the subscriber's policy:
+
+    - drop_oldest: discard the oldest buffered event to make room
+    - coalesce: discard the whole backlog and deliver a single resync event
+      so the consumer can re-read what it missed from the store
+    - disconnect: close the subscriber; ``get`` raises SlowConsumerError
+    """
+
+    def __init__(self, session_id: str, policy: str = POLICY_DROP_OLDEST, maxsize: int = 100):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown subscriber policy: {policy}")
+        self.id = str(uuid4())
+        self.session_id = session_id
+        self.policy = policy
+        self.maxsize = maxsize
+        self.closed = False
+        self._buffer: Deque[Any] = deque()
+        self._wakeup = asyncio.Event()
+        self._missed = 0
+
+        # Lag counters
+        self.offered = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0
+
+    @property
+    def lag(self) -> int:
+        """Events buffered but not yet consumed"""
+        return len(self._buffer)
+
+    def offer(self, event: Any) -> bool:
+        """Buffer an event without blocking; returns False if the subscriber is closed"""
+        if self.closed:
+            return False
+        self.offered += 1
+
+        if len(self._buffer) >= self.maxsize:
+            if self.policy == POLICY_DISCONNECT:
+                logger.warning(f"⚠️ Disconnecting slow subscriber {self.id} for session {self.session_id} (lag: {self.lag})")
+                self.close()
+                return False
+            if self.policy == POLICY_COALESCE:
+                self._missed += len(self._buffer) + 1
+                self.coalesced += len(self._buffer) + 1
+                self._buffer.clear()
+                self._buffer.append(ResyncEvent(self._missed))
+                self._wakeup.set()
+                return True
+            self._buffer.popleft()
+            self.dropped += 1
+
+        if self._missed and self._buffer and isinstance(self._buffer[-1], ResyncEvent):
+            # Already resyncing: the consumer will pick this event up from the store
+            self._missed += 1
+            self.coalesced += 1
+            self._buffer[-1].missed = self._missed
+            return True
+
+        self._buffer.append(event)
+        self.max_lag = max(self.max_lag, len(self._buffer))
+        self._wakeup.set()
+        return True
+
+    def get_nowait(self) -> Optional[Any]:
+        """Pop the next buffered event, or None if empty"""
+        if not self._buffer:
+            if self.closed:
+                raise SlowConsumerError(f"Subscriber {self.id} disconnected")
+            return None
+        event = self._buffer.popleft()
+        if isinstance(event, ResyncEvent):
+            self._missed = 0
+        self.delivered += 1
+        return event
+
+    async def get(self) -> Any:
+        """Wait for the next event"""
+        while True:
+            event = self.get_nowait()
+            if event is not None:
+                return event
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def close(self) -> None:
+        """Close the subscriber and wake any waiting consumer"""
+        self.closed = True
+        self._buffer.clear()
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscriber_id": self.id,
+            "session_id": self.session_id,
+            "policy": self.policy,
+            "closed": self.closed,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "offered": self.offered,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
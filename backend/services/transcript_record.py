@@ -0,0 +1,68 @@
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Any
+
+
+class Role(str, Enum):
+    """Transcript speaker; members are singletons so records share them"""
+    USER = "user"
+    ASSISTANT = "assistant"
+
+
+# Plain dict lookup; much cheaper than Role(value) on hot decode paths
+ROLE_BY_VALUE = {role.value: role for role in Role}
+
+
+class TranscriptRecord:
+    """Compact transcript entry.
+
+    Stores an interned role, a per-session sequence number, an epoch-ns
+    timestamp and a reference to the session's ID string instead of a dict of
+    formatted strings. The API dict shape is only built by ``to_dict`` when a
+    WebSocket or HTTP response actually needs it.
+    """
+
+    __slots__ = ("seq", "role", "content", "timestamp_ns", "session_id")
+
+    def __init__(self, session_id: str, seq: int, role: Role, content: str, timestamp_ns: int):
+        self.session_id = session_id
+        self.seq = seq
+        self.role = role
+        self.content = content
+        self.timestamp_ns = timestamp_ns
+
+    @classmethod
+    def create(cls, session_id: str, seq: int, role: str, content: str) -> "TranscriptRecord":
+        return cls(session_id, seq, ROLE_BY_VALUE[role], content, time.time_ns())
+
+    @property
+    def id(self) -> str:
+        return f"{self.session_id}:{self.seq}"
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the API representation"""
+        return {
+            "id": self.id,
+            "seq": self.seq,
+            "role": self.role.value,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "session_id": self.session_id
+        }
+
+    def to_row(self) -> List[Any]:
+        """Compact positional form used for on-disk storage"""
+        return [self.seq, self.role.value, self.content, self.timestamp_ns]
+
+    @classmethod
+    def from_row(cls, session_id: str, row: List[Any]) -> "TranscriptRecord":
+        seq, role, content, timestamp_ns = row
+        return cls(session_id, seq, ROLE_BY_VALUE[role], content, timestamp_ns)
+
+    def __repr__(self) -> str:
+        return f"TranscriptRecord(session_id={self.session_id!r}, seq={self.seq}, role={self.role.value!r})"
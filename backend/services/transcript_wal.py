@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# Record ops
+OP_CREATE = 1
+OP_TRANSCRIPT = 2
+OP_END = 3
+OP_ANALYSIS = 4
+# Replicated key/value writes and the end-of-snapshot marker, used by the store bus
+OP_KV_SET = 5
+OP_KV_DELETE = 6
+OP_SYNCED = 7
+
+# Frame: payload length, crc32(payload); payload starts with the op byte
+FRAME_HEADER = struct.Struct("<II")
+# Transcript payload after the op byte: seq, timestamp_ns, role, session_id length
+TRANSCRIPT_HEADER = struct.Struct("<QqBH")
+
+ROLE_CODES = {"user": 0, "assistant": 1}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+def encode_transcript(session_id: str, seq: int, role: str, content: str, timestamp_ns: int) -> bytes:
+    session_bytes = session_id.encode("utf-8")
+    return (
+        bytes((OP_TRANSCRIPT,))
+        + TRANSCRIPT_HEADER.pack(seq, timestamp_ns, ROLE_CODES[role], len(session_bytes))
+        + session_bytes
+        + content.encode("utf-8")
+    )
+
+
+def encode_json(op: int, body: Dict[str, Any]) -> bytes:
+    return bytes((op,)) + json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode(payload: bytes) -> Tuple[int, Any]:
+    """Decode a record payload into (op, body)"""
+    op = payload[0]
+    if op == OP_TRANSCRIPT:
+        seq, timestamp_ns, role, session_len = TRANSCRIPT_HEADER.unpack_from(payload, 1)
+        start = 1 + TRANSCRIPT_HEADER.size
+        session_id = payload[start:start + session_len].decode("utf-8")
+        content = payload[start + session_len:].decode("utf-8")
+        return op, (session_id, seq, ROLE_NAMES[role], content, timestamp_ns)
+    if op == OP_SYNCED:
+        return op, None
+    return op, json.loads(payload[1:])
+
+
+class TranscriptWAL:
+    """Append-only, segmented write-ahead log for the conversation store.
+
+    Appends go into an in-memory batch that a background flusher writes and
+    fsyncs together (group commit), so many concurrent transcript POSTs share
+    one fsync. Segments roll over at ``segment_bytes``; replay memory-maps each
+    segment and stops at the first torn or corrupt frame.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 0.002,
+        sync: bool = True,
+        compact_every_segments: int = 8
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.compact_every_segments = compact_every_segments
+        self._segments_since_compaction = 0
+        self._batch: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._file = None
+        self._segment_index = 0
+        self._segment_size = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.records_written = 0
+        self.batches_written = 0
+        self.bytes_written = 0
+
+    # Segments
+
+    def segments(self) -> List[str]:
+        """Existing segment paths in log order"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{index:08d}{SEGMENT_SUFFIX}")
+
+    @staticmethod
+    def _segment_number(path: str) -> int:
+        return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+    def _open_segment(self, index: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._segment_index = index
+        self._segments_since_compaction += 1
+        self._file = open(self._segment_path(index), "ab")
+        self._segment_size = self._file.tell()
+
+    # Replay
+
+    def replay(self) -> Iterator[Tuple[int, Any]]:
+        """Yield (op, body) for every intact record, truncating a torn tail"""
+        for path in self.segments():
+            size = os.path.getsize(path)
+            if size == 0:
+                continue
+            with open(path, "r+b") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    offset = 0
+                    header_size = FRAME_HEADER.size
+                    while offset + header_size <= size:
+                        length, crc = FRAME_HEADER.unpack_from(mm, offset)
+                        end = offset + header_size + length
+                        if end > size:
+                            break
+                        payload = mm[offset + header_size:end]
+                        if zlib.crc32(payload) != crc:
+                            break
+                        yield decode(payload)
+                        offset = end
+                if offset < size:
+                    logger.warning(f"⚠️ Truncating torn WAL tail in {os.path.basename(path)} at {offset}/{size} bytes")
+                    f.truncate(offset)
+
+    # Appends
+
+    def append(self, payload: bytes) -> Optional[asyncio.Future]:
+        """Queue a record for the next group commit.
+
+        Returns a future resolved once the batch holding the record is durable,
+        or None if the flusher isn't running (records are then written on the
+        next flush or at close).
+        """
+        self._batch.append(frame(payload))
+        if self._flusher is None:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._wakeup.set()
+        return future
+
+    async def start(self) -> None:
+        """Open a fresh segment and start the group-commit flusher"""
+        segments = self.segments()
+        next_index = self._segment_number(segments[-1]) + 1 if segments else 0
+        self._open_segment(next_index)
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"📝 WAL started at segment {next_index} in {self.directory}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let concurrent appends join the batch
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ WAL flush failed: {e}")
+
+    async def flush(self) -> None:
+        """Write and fsync everything batched so far"""
+        async with self._lock:
+            batch, waiters = self._batch, self._waiters
+            self._batch, self._waiters = [], []
+            if not batch:
+                return
+            data = b"".join(batch)
+            try:
+                await asyncio.to_thread(self._write, data)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                raise
+            self.records_written += len(batch)
+            self.batches_written += 1
+            self.bytes_written += len(data)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(self._segment_index + 1)
+        self._file.write(data)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self._segment_size += len(data)
+
+    # Compaction
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._segments_since_compaction > self.compact_every_segments
+
+    async def compact(self, snapshot: Callable[[], List[bytes]]) -> int:
+        """Replace all existing segments with a snapshot of live records.
+
+        ``snapshot`` runs on the event loop under the flush lock, so no append
+        can land between the snapshot and the segments it replaces.
+        Returns the number of segments removed.
+        """
+        async with self._lock:
+            old_segments = self.segments()
+            data = b"".join(frame(payload) for payload in snapshot())
+            # Records batched before the snapshot are already reflected in it
+            batch_waiters = self._waiters
+            self._batch, self._waiters = [], []
+            await asyncio.to_thread(self._write_snapshot, data)
+            for path in old_segments:
+                if path != self._segment_path(self._segment_index):
+                    os.remove(path)
+            for waiter in batch_waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        logger.info(f"🗜️ WAL compacted: removed {len(old_segments)} segments, snapshot {len(data)} bytes")
+        return len(old_segments)
+
+    def _write_snapshot(self, data: bytes) -> None:
+        self._open_segment(self._segment_index + 1)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._segment_size = len(data)
+        self._segments_since_compaction = 0
+
+    async def close(self) -> None:
+        """Stop the flusher and flush what's left"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+            await self.flush()
+            logger.info("📝 WAL closed")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "segments": len(self.segments()),
+            "current_segment": self._segment_index,
+            "records_written": self.records_written,
+            "batches_written": self.batches_written,
+            "bytes_written": self.bytes_written,
+            "avg_batch_size": self.records_written / self.batches_written if self.batches_written else 0,
+            "pending": len(self._batch),
+        }
@@ -0,0 +1,128 @@
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Any
+
+import numpy as np
+
+from services.realtime_audio import PCM16_BYTES_PER_SAMPLE, PCM16_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+def frame_features(samples: np.ndarray, frame_samples: int):
+    """Per-frame RMS level in dBFS and zero-crossing rate for whole frames of int16 samples"""
+    frames = samples[:len(samples) // frame_samples * frame_samples].reshape(-1, frame_samples)
+    x = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x, axis=1))
+    level_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_samples - 1)
+    return level_db, zcr
+
+
+class SilenceTrimmer:
+    """Drops long silent stretches of PCM16 before they are sent upstream.
+
+    Frames of ``frame_ms`` count as speech when they are louder than
+    ``threshold_db``, or within ``unvoiced_margin_db`` of it with a
+    zero-crossing rate above ``zcr_threshold`` (quiet fricatives like "s" and
+    "f"). Padding follows the session's turn_detection settings: the last
+    ``prefix_padding_ms`` before speech is sent along with it, and
+    ``silence_duration_ms`` (plus ``hangover_margin_ms``) of trailing silence
+    is kept so the server's own VAD still sees the turn end. Everything else
+    between turns is dropped.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = -45.0,
+        zcr_threshold: float = 0.25,
+        unvoiced_margin_db: float = 10.0,
+        prefix_padding_ms: int = 300,
+        silence_duration_ms: int = 500,
+        hangover_margin_ms: int = 200,
+        frame_ms: int = 20,
+        sample_rate: int = PCM16_SAMPLE_RATE
+    ):
+        self.threshold_db = threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.unvoiced_margin_db = unvoiced_margin_db
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * PCM16_BYTES_PER_SAMPLE
+        self.hangover_frames = -(-(silence_duration_ms + hangover_margin_ms) // frame_ms)
+
+        self._prefix: Deque[bytes] = deque(maxlen=-(-prefix_padding_ms // frame_ms))
+        self._partial = b""
+        self._hangover = 0
+
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.speech_frames = 0
+        self.silent_frames = 0
+        self.segments = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._hangover > 0
+
+    def is_speech(self, level_db: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        unvoiced = (level_db >= self.threshold_db - self.unvoiced_margin_db) & (zcr >= self.zcr_threshold)
+        return (level_db >= self.threshold_db) | unvoiced
+
+    def process(self, audio: bytes) -> List[memoryview]:
+        """The parts of ``audio`` worth sending, in order; may be empty"""
+        self.bytes_in += len(audio)
+        if self._partial:
+            audio = self._partial + audio
+        usable = len(audio) // self.frame_bytes * self.frame_bytes
+        # Leftover samples wait for the next chunk to fill a frame
+        self._partial = bytes(audio[usable:])
+        if not usable:
+            return []
+
+        view = memoryview(audio)
+        samples = np.frombuffer(audio, dtype="<i2", count=usable // PCM16_BYTES_PER_SAMPLE)
+        speech = self.is_speech(*frame_features(samples, self.frame_samples))
+
+        out: List[memoryview] = []
+        run_start = None
+        for i, is_speech in enumerate(speech.tolist()):
+            start = i * self.frame_bytes
+            if is_speech:
+                self.speech_frames += 1
+                if not self.in_speech:
+                    self.segments += 1
+                    out.extend(memoryview(frame) for frame in self._prefix)
+                    self._prefix.clear()
+                self._hangover = self.hangover_frames
+                if run_start is None:
+                    run_start = start
+                continue
+            self.silent_frames += 1
+            if self.in_speech:
+                self._hangover -= 1
+                if run_start is None:
+                    run_start = start
+            else:
+                # Copied: the caller may reuse its buffer before speech starts
+                self._prefix.append(bytes(view[start:start + self.frame_bytes]))
+                if run_start is not None:
+                    out.append(view[run_start:start])
+                    run_start = None
+        if run_start is not None:
+            out.append(view[run_start:usable])
+
+        self.bytes_out += sum(len(segment) for segment in out)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        pending = len(self._partial) + sum(len(frame) for frame in self._prefix)
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out - pending,
+            "saved_ratio": round(1 - self.bytes_out / self.bytes_in, 3) if self.bytes_in else 0.0,
+            "speech_frames": self.speech_frames,
+            "silent_frames": self.silent_frames,
+            "segments": self.segments,
+        }
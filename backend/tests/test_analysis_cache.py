@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+from services.analysis_cache import AnalysisCache
+from services.medical_analysis import build_report, report_timestamps
+
+LLM_RESULT = {
+    "reportId": "MEDIREP-20250101-090000",
+    "patientId": "P202501010900",
+    "consultationDate": "2025-01-01",
+    "consultationTime": "09:00 AM",
+    "videoAttachmentName": "Consultation_20250101-090000.mp4",
+    "mainComplaint": "Headache",
+}
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def test_hit_gets_the_current_report_id_and_date(self):
+        cache = AnalysisCache()
+        cache.put("key", LLM_RESULT)
+
+        timestamps = report_timestamps(datetime(2025, 3, 4, 15, 30))
+        report = build_report("s1", cache.get("key"), 60, 2, timestamps)
+        self.assertEqual(report.mainComplaint, "Headache")
+        self.assertEqual(report.reportId, "MEDIREP-20250304-153000")
+        self.assertEqual(report.patientId, "P202503041530")
+        self.assertEqual(report.consultationDate, "2025-03-04")
+        self.assertEqual(report.videoAttachmentName, "Consultation_20250304-153000.mp4")
+
+    def test_concurrent_misses_compute_once(self):
+        cache = AnalysisCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return dict(LLM_RESULT)
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(3)))
+
+        first, *joined = asyncio.run(run())
+        self.assertEqual(calls, 1)
+        self.assertEqual(first["reportId"], LLM_RESULT["reportId"])
+        for result in joined:
+            self.assertNotIn("reportId", result)
+            self.assertEqual(result["mainComplaint"], "Headache")
+
+
+if __name__ == "__main__":
+    unittest.main()
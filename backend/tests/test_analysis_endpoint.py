@@ -0,0 +1,24 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from services.analysis_jobs import analysis_jobs
+
+
+class AnalysisEndpointTest(unittest.TestCase):
+    def test_finished_job_without_a_report_is_gone(self):
+        with TestClient(main.app) as client:
+            # Done, but nothing in the store and no cached result to rebuild it from
+            analysis_jobs.record_done("report-lost", cache_key="not-cached")
+            response = client.get("/api/stream/analysis/report-lost")
+        self.assertEqual(response.status_code, 410)
+
+    def test_unknown_session_is_not_found(self):
+        with TestClient(main.app) as client:
+            response = client.get("/api/stream/analysis/never-finished")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
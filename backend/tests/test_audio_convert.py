@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from services.audio_convert import SAMPLE_FORMATS, AudioConverter, PolyphaseResampler
+
+SOURCES = ((48000, 2, "f32"), (44100, 2, "f32"), (44100, 1, "s16"), (16000, 1, "s16"))
+
+
+def capture(rate: int, channels: int, sample_format: str, seconds: float, frequency: float = 440.0) -> bytes:
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 0.5 * np.sin(2 * np.pi * frequency * t)
+    frames = np.repeat(signal[:, None], channels, axis=1)
+    if sample_format == "s16":
+        frames = frames * 32767
+    return frames.astype(SAMPLE_FORMATS[sample_format]).tobytes()
+
+
+class AudioConverterTest(unittest.TestCase):
+    def test_streaming_matches_one_shot_conversion(self):
+        for rate, channels, sample_format in SOURCES:
+            data = capture(rate, channels, sample_format, 0.1)
+            one_shot = AudioConverter(rate, channels, sample_format).convert(data)
+            # Odd chunk sizes split sample frames and even single samples
+            for chunk in (3, 333, 4097):
+                converter = AudioConverter(rate, channels, sample_format)
+                streamed = b"".join(converter.convert(data[i:i + chunk]) for i in range(0, len(data), chunk))
+                self.assertEqual(streamed, one_shot, f"{rate} Hz x{channels} {sample_format}, {chunk}-byte chunks")
+
+    def test_resampler_streaming_matches_batch(self):
+        samples = np.random.default_rng(3).standard_normal(20000).astype(np.float32)
+        for from_rate in (48000, 44100, 16000):
+            batch = PolyphaseResampler(from_rate, 24000).process(samples)
+            resampler = PolyphaseResampler(from_rate, 24000)
+            streamed = np.concatenate([resampler.process(samples[i:i + 480]) for i in range(0, len(samples), 480)])
+            np.testing.assert_allclose(streamed, batch, rtol=0, atol=1e-4)
+
+    def test_output_is_24khz_mono_with_the_tone_kept(self):
+        pcm = AudioConverter(44100, 2, "f32").convert(capture(44100, 2, "f32", 1.0, frequency=1000))
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float64)
+        self.assertAlmostEqual(len(samples), 24000, delta=50)
+
+        steady = samples[1000:-1000]
+        spectrum = np.abs(np.fft.rfft(steady))
+        peak_hz = np.argmax(spectrum) * 24000 / len(steady)
+        self.assertAlmostEqual(peak_hz, 1000, delta=5)
+        self.assertAlmostEqual(np.sqrt(np.mean(steady ** 2)), 0.5 * 32767 / np.sqrt(2), delta=300)
+
+    def test_native_format_passes_through(self):
+        data = capture(24000, 1, "s16", 0.1)
+        self.assertEqual(AudioConverter(24000, 1, "s16").convert(data), data)
+
+    def test_overloaded_float_input_is_clipped_and_counted(self):
+        converter = AudioConverter(24000, 1, "f32")
+        pcm = converter.convert(np.array([0.0, 1.5, -1.5], dtype=np.float32))
+        self.assertEqual(np.frombuffer(pcm, dtype="<i2").tolist(), [0, 32767, -32768])
+        self.assertEqual(converter.stats()["clipped"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+import wave
+
+from services.consultation_recorder import ConsultationRecorder
+from services.openai_realtime import OpenAIRealtimeClient
+from services.realtime_audio import PCM16_SAMPLE_RATE, AudioSendPipeline, pcm16_bytes
+from services.voice_activity import SilenceTrimmer
+
+
+class ConsultationRecorderTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Enough buffers for a whole test consultation, so nothing is dropped however slow the disk
+        self.recorder = ConsultationRecorder(
+            self.directory.name, enabled=True, buffer_ms=100, buffers=30, segment_seconds=1
+        )
+        self.recorder.start()
+        self.addAsyncCleanup(self.recorder.close)
+
+    async def test_segments_join_into_one_wav(self):
+        audio = os.urandom(pcm16_bytes(2500))
+        recording = self.recorder.open("s1")
+        for i in range(0, len(audio), pcm16_bytes(20)):
+            recording.write(audio[i:i + pcm16_bytes(20)])
+        await self.recorder.finalize("s1")
+
+        path = self.recorder.recording_path(self.recorder.claim("s1"))
+        with wave.open(path, "rb") as wav:
+            self.assertEqual(wav.getframerate(), PCM16_SAMPLE_RATE)
+            self.assertEqual(wav.readframes(wav.getnframes()), audio)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["consultation.wav"])
+
+    async def test_stop_hands_out_the_id_before_the_join(self):
+        self.recorder.open("s1").write(os.urandom(pcm16_bytes(300)))
+        done = self.recorder.stop("s1")
+
+        recording_id = self.recorder.claim("s1")
+        self.assertIsNotNone(recording_id)
+        self.assertIsNone(self.recorder.claim("s1"))
+        self.assertIsNone(self.recorder.recording_path(recording_id))
+        await done
+        self.assertIsNotNone(self.recorder.recording_path(recording_id))
+
+    async def test_dropped_audio_is_counted_after_finalize(self):
+        recorder = ConsultationRecorder(self.directory.name, enabled=True, buffer_ms=100, buffers=1)
+        recorder.start()
+        self.addAsyncCleanup(recorder.close)
+        # One buffer: everything past it is dropped until the writer returns it
+        recorder.open("s1").write(bytes(recorder.buffer_bytes * 3))
+        await recorder.finalize("s1")
+        self.assertEqual(recorder.stats()["bytes_dropped"], recorder.buffer_bytes * 2)
+
+    async def test_silent_session_has_no_recording(self):
+        self.recorder.open("s1")
+        await self.recorder.finalize("s1")
+        self.assertIsNone(self.recorder.claim("s1"))
+
+    async def test_client_records_the_untrimmed_audio(self):
+        sent = []
+
+        async def send(frame: memoryview) -> None:
+            sent.append(len(frame))
+
+        # What connect() sets up, minus the socket
+        client = OpenAIRealtimeClient("s1")
+        client.audio = AudioSendPipeline(send)
+        client.audio.start()
+        client.recording = self.recorder.open("s1")
+        client.silence_trimmer = SilenceTrimmer()
+
+        silence = bytes(pcm16_bytes(2000))
+        for i in range(0, len(silence), pcm16_bytes(20)):
+            await client.send_audio(silence[i:i + pcm16_bytes(20)])
+        await client.audio.close()
+        await self.recorder.finalize("s1")
+
+        self.assertEqual(sent, [])
+        with wave.open(self.recorder.recording_path(self.recorder.claim("s1")), "rb") as wav:
+            self.assertEqual(wav.readframes(wav.getnframes()), silence)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from services.conversation_spill import ConversationSpillStore
+from services.conversation_store import ConversationStore, RetentionPolicy, conversation_store
+from services.transcript_wal import OP_CREATE, OP_END
+
+
+class StubBus:
+    """Stands in for the store broker connection; records are applied by hand"""
+
+    def register_store(self, store) -> None:
+        pass
+
+
+class RetentionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def ended_session(self, store: ConversationStore, session_id: str) -> None:
+        store.create_session(session_id)
+        asyncio.run(store.add_transcript(session_id, "user", "My chest hurts when I climb stairs"))
+        store.store_analysis(session_id, {"summary": "Exertional chest pain"})
+        store.end_session(session_id)
+
+    def test_evicted_session_round_trips_through_spill(self):
+        store = ConversationStore(retention=RetentionPolicy(idle_ttl_seconds=0), spill_dir=self.directory.name)
+        self.ended_session(store, "s1")
+        store.enforce_retention()
+
+        self.assertNotIn("s1", store.conversations)
+        self.assertEqual(store.evictions, 1)
+        self.assertEqual(store.get_analysis("s1"), {"summary": "Exertional chest pain"})
+        transcripts = store.get_conversation("s1")["transcripts"]
+        self.assertEqual([(t.seq, t.role, t.content) for t in transcripts], [(1, "user", "My chest hurts when I climb stairs")])
+        self.assertEqual(store.reloads, 1)
+
+    def test_nothing_is_evicted_without_a_spill_store(self):
+        store = ConversationStore(retention=RetentionPolicy(max_sessions=1, idle_ttl_seconds=0))
+        self.ended_session(store, "s1")
+        self.ended_session(store, "s2")
+
+        self.assertEqual(store.enforce_retention(), 0)
+        self.assertEqual(store.get_analysis("s1"), {"summary": "Exertional chest pain"})
+
+    def test_bus_replica_keeps_its_sessions_and_reads_the_broker_spill(self):
+        broker = ConversationStore(retention=RetentionPolicy(idle_ttl_seconds=0), spill_dir=self.directory.name)
+        replica = ConversationStore(retention=RetentionPolicy(idle_ttl_seconds=0))
+        replica.attach_bus(StubBus(), spill_dir=self.directory.name)
+
+        # Only the broker saw this session before it was spilled
+        self.ended_session(broker, "spilled")
+        broker.enforce_retention()
+        self.assertEqual(replica.get_analysis("spilled"), {"summary": "Exertional chest pain"})
+
+        replica.apply_record(OP_CREATE, {"session_id": "replicated", "start_time": "2025-01-01T09:00:00"})
+        replica.apply_record(OP_END, {"session_id": "replicated", "end_time": "2025-01-01T09:10:00", "duration_seconds": 600})
+        self.assertEqual(replica.enforce_retention(), 0)
+        self.assertIn("replicated", replica.conversations)
+
+    def test_analysis_endpoint_after_eviction(self):
+        retention, spill = conversation_store.retention, conversation_store.spill
+        conversation_store.retention = RetentionPolicy(idle_ttl_seconds=0)
+        conversation_store.spill = ConversationSpillStore(self.directory.name)
+        self.addCleanup(setattr, conversation_store, "retention", retention)
+        self.addCleanup(setattr, conversation_store, "spill", spill)
+
+        with TestClient(main.app) as client:
+            self.ended_session(conversation_store, "evicted-session")
+            conversation_store.enforce_retention()
+            self.assertNotIn("evicted-session", conversation_store.conversations)
+
+            response = client.get("/api/stream/analysis/evicted-session")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"summary": "Exertional chest pain"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.http_client import HTTPClient
+
+
+class HTTPClientStatsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def ok(request):
+            return web.json_response({"ok": True})
+
+        app = web.Application()
+        app.router.add_get("/ok", ok)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+        self.client = HTTPClient()
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_pool_stats_come_from_the_trace_counters(self):
+        url = str(self.server.make_url("/ok"))
+        for _ in range(3):
+            async with self.client.get(url) as response:
+                self.assertEqual(await response.json(), {"ok": True})
+
+        pool = self.client.stats()["pool"]
+        self.assertEqual(pool["connections_created"], 1)
+        self.assertEqual(pool["connections_reused"], 2)
+        self.assertEqual(pool["reuse_ratio"], 0.667)
+
+    async def test_failed_request_leaves_nothing_in_flight(self):
+        # Nothing listens on the discard port
+        with self.assertRaises(Exception):
+            async with self.client.get("http://127.0.0.1:9/", retries=0):
+                pass
+        self.assertEqual(self.client.stats()["pool"]["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
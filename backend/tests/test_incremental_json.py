@@ -0,0 +1,82 @@
+import json
+import unittest
+
+from services.incremental_json import IncrementalJSONParser
+
+REPORT = (
+    '```json\n'
+    '{\n'
+    '  "summary": "Cough with \\"rusty\\" sputum {since Monday}",\n'
+    '  "urgencyLevel": "medium",\n'
+    '  "confidence": 0.85,\n'
+    '  "needsFollowUp": true,\n'
+    '  "detectedSymptoms": [\n'
+    '    {"name": "cough", "severity": "moderate", "tags": ["respiratory", "]"]},\n'
+    '    {"name": "fever", "severity": "mild", "tags": []}\n'
+    '  ],\n'
+    '  "vitals": {"temperature": 38.1, "readings": [1, 2]},\n'
+    '  "recommendations": ["Chest X-ray", "Rest"]\n'
+    '}\n'
+    '```'
+)
+
+
+def feed_in_chunks(text: str, size: int):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+class IncrementalJSONParserTest(unittest.TestCase):
+    def test_events_do_not_depend_on_chunking(self):
+        whole, expected = feed_in_chunks(REPORT, len(REPORT))
+        document = json.loads(REPORT[REPORT.index("{"):REPORT.rindex("}") + 1])
+        self.assertEqual(whole.document(), document)
+        for size in (1, 2, 7, 64):
+            parser, events = feed_in_chunks(REPORT, size)
+            self.assertEqual(events, expected, f"chunk size {size}")
+            self.assertEqual(parser.document(), document)
+
+    def test_reports_top_level_fields_and_array_items(self):
+        _, events = feed_in_chunks(REPORT, len(REPORT))
+        self.assertEqual([(kind, key, index) for kind, key, index, _ in events], [
+            ("field", "summary", None),
+            ("field", "urgencyLevel", None),
+            ("field", "confidence", None),
+            ("field", "needsFollowUp", None),
+            ("item", "detectedSymptoms", 0),
+            ("item", "detectedSymptoms", 1),
+            ("field", "detectedSymptoms", None),
+            ("field", "vitals", None),
+            ("item", "recommendations", 0),
+            ("item", "recommendations", 1),
+            ("field", "recommendations", None),
+        ])
+        self.assertEqual(events[0][3], 'Cough with "rusty" sputum {since Monday}')
+        self.assertEqual(events[4][3]["tags"], ["respiratory", "]"])
+
+    def test_values_are_reported_as_soon_as_they_close(self):
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"urgencyLevel": "hi'), [])
+        self.assertEqual(parser.feed('gh", "confidence": 0.'), [("field", "urgencyLevel", None, "high")])
+        # A number only ends at its delimiter
+        self.assertEqual(parser.feed("9"), [])
+        self.assertEqual(parser.feed(', "detectedSymptoms": [{"name": "rash"}'), [
+            ("field", "confidence", None, 0.9),
+            ("item", "detectedSymptoms", 0, {"name": "rash"}),
+        ])
+        self.assertIsNone(parser.document())
+
+    def test_malformed_value_is_skipped_and_left_to_the_document_parse(self):
+        parser = IncrementalJSONParser()
+        events = parser.feed('{"range": 0.0-1.0, "summary": "ok"} trailing text')
+        self.assertEqual(events, [("field", "summary", None, "ok")])
+        self.assertTrue(parser.done)
+        with self.assertRaises(ValueError):
+            parser.document()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import base64
+import json
+import unittest
+
+from services.openai_realtime import OpenAIRealtimeClient, peek_event_type
+
+
+class PeekEventTypeTest(unittest.TestCase):
+    def test_reads_the_leading_type(self):
+        self.assertEqual(peek_event_type('{"type":"response.audio.delta","delta":"AAAA"}'), "response.audio.delta")
+        self.assertEqual(peek_event_type(json.dumps({"type": "session.created", "session": {}})), "session.created")
+        self.assertEqual(peek_event_type('{ "type" : "error" }'), "error")
+
+    def test_falls_back_when_type_may_be_nested(self):
+        self.assertIsNone(peek_event_type('{"item":{"type":"message"},"type":"conversation.item.created"}'))
+        self.assertIsNone(peek_event_type('[{"type":"error"}]'))
+        self.assertIsNone(peek_event_type('{"event_id":"e1"}'))
+
+
+class DispatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_audio_deltas_are_parsed_only_for_consumers(self):
+        client = OpenAIRealtimeClient("s1")
+        delta = json.dumps({"type": "response.audio.delta", "delta": base64.b64encode(b"\x01\x02").decode()})
+
+        await client._dispatch(delta)
+        self.assertEqual((client.audio_deltas_skipped, client.events_parsed), (1, 0))
+
+        received = []
+
+        async def consumer(session_id: str, pcm: bytes) -> None:
+            received.append((session_id, pcm))
+
+        client.watch_audio(consumer)
+        await client._dispatch(delta)
+        self.assertEqual(received, [("s1", b"\x01\x02")])
+
+    async def test_transcripts_reach_the_callback(self):
+        saved = []
+
+        async def on_transcript(session_id: str, role: str, text: str) -> None:
+            saved.append((session_id, role, text))
+
+        client = OpenAIRealtimeClient("s1", on_transcript=on_transcript)
+        await client._dispatch(json.dumps({"type": "response.audio_transcript.delta", "delta": "Hel"}))
+        await client._dispatch(json.dumps({
+            "type": "conversation.item.input_audio_transcription.completed", "transcript": "I feel dizzy"
+        }))
+        await client._dispatch(json.dumps({"type": "response.audio_transcript.done", "transcript": "Since when?"}))
+        self.assertEqual(saved, [("s1", "user", "I feel dizzy"), ("s1", "assistant", "Since when?")])
+        self.assertEqual((client.events_received, client.events_parsed), (3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
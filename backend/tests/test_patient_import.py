@@ -0,0 +1,29 @@
+import os
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from services.patient_import import patient_importer
+
+FILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "files")
+
+
+class PatientImportTest(unittest.TestCase):
+    def test_import_endpoint_parses_in_spawned_workers(self):
+        documents = []
+        for name in sorted(os.listdir(FILES_DIR)):
+            with open(os.path.join(FILES_DIR, name), encoding="utf-8") as f:
+                documents.append({"filename": name, "content": f.read()})
+        documents.append({"filename": "blank.md", "content": ""})
+
+        with TestClient(main.app) as client:
+            report = client.post("/api/profile/import", json=documents).json()
+            self.assertEqual(patient_importer.pool._mp_context.get_start_method(), "spawn")
+
+        self.assertEqual((report["received"], report["imported"], report["failed"]), (4, 3, 1))
+        self.assertEqual(report["errors"][0]["filename"], "blank.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
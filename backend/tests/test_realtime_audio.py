@@ -0,0 +1,75 @@
+import asyncio
+import base64
+import json
+import os
+import unittest
+
+from services.realtime_audio import AudioSendPipeline, pcm16_bytes
+
+
+class RecordingSocket:
+    """Collects sent frames; each send takes ``delay`` seconds"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.frames = []
+
+    async def send(self, frame: memoryview) -> None:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("socket closed")
+        # The pipeline reuses its frame buffer, so keep a copy
+        self.frames.append(json.loads(bytes(frame)))
+
+    def audio(self) -> bytes:
+        return b"".join(base64.b64decode(frame["audio"]) for frame in self.frames)
+
+
+class AudioSendPipelineTest(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_reassemble_to_the_written_audio(self):
+        socket = RecordingSocket()
+        pipeline = AudioSendPipeline(socket.send, batch_ms=100, buffer_ms=300)
+        pipeline.start()
+        audio = os.urandom(pcm16_bytes(1030))
+        # 20 ms chunks, as a capture callback would deliver them; wraps the ring several times
+        for i in range(0, len(audio), pcm16_bytes(20)):
+            await pipeline.write(audio[i:i + pcm16_bytes(20)])
+        await pipeline.close()
+
+        self.assertEqual(socket.audio(), audio)
+        self.assertTrue(all(frame["type"] == "input_audio_buffer.append" for frame in socket.frames))
+        self.assertEqual(len(socket.frames), 11)
+        self.assertEqual(pipeline.stats()["bytes_sent"], len(audio))
+
+    async def test_close_waits_for_the_batch_being_sent(self):
+        socket = RecordingSocket(delay=0.05)
+        pipeline = AudioSendPipeline(socket.send, batch_ms=100)
+        pipeline.start()
+        await pipeline.write(bytes(pipeline.batch_bytes))
+        # The sender has taken the batch off the ring and is inside send()
+        await asyncio.sleep(0.01)
+        await pipeline.close()
+        self.assertEqual(len(socket.frames), 1)
+
+    async def test_full_ring_applies_backpressure(self):
+        socket = RecordingSocket(delay=0.02)
+        pipeline = AudioSendPipeline(socket.send, batch_ms=100, buffer_ms=200)
+        pipeline.start()
+        await pipeline.write(bytes(pipeline.capacity * 3))
+        await pipeline.close()
+        self.assertGreater(pipeline.stats()["backpressure_waits"], 0)
+        self.assertEqual(len(socket.audio()), pipeline.capacity * 3)
+
+    async def test_send_failure_surfaces_to_writers(self):
+        pipeline = AudioSendPipeline(RecordingSocket(fail=True).send, batch_ms=100, buffer_ms=200)
+        pipeline.start()
+        with self.assertRaises(ConnectionError):
+            for _ in range(10):
+                await pipeline.write(bytes(pipeline.batch_bytes))
+                await asyncio.sleep(0)
+        await asyncio.gather(pipeline.close(), return_exceptions=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from services.conversation_store import conversation_store
+
+USER_EVENT = "conversation.item.input_audio_transcription.completed"
+ASSISTANT_EVENT = "response.audio_transcript.done"
+
+
+def frame(session_id: str, batch: int, *transcripts: str) -> dict:
+    return {
+        "type": "batch",
+        "session_id": session_id,
+        "channel": "channel-1",
+        "batch": batch,
+        "events": [{"type": USER_EVENT, "transcript": transcript} for transcript in transcripts],
+    }
+
+
+class TranscriptIngestTest(unittest.TestCase):
+    def contents(self, session_id: str):
+        return [(t.role.value, t.content) for t in conversation_store.get_conversation(session_id)["transcripts"]]
+
+    def test_resent_batch_is_acked_without_saving_again(self):
+        with TestClient(main.app) as client:
+            with client.websocket_connect("/api/stream/ingest/ingest-ws") as ws:
+                ws.send_json(frame("ingest-ws", 1, "I have a cough", "since Monday"))
+                self.assertEqual(ws.receive_json(), {"type": "ack", "batch": 1, "received": 2, "saved": 2})
+                # Ack lost, the client reconnects and resends
+                ws.send_json(frame("ingest-ws", 1, "I have a cough", "since Monday"))
+                self.assertTrue(ws.receive_json()["duplicate"])
+
+            # The fallback POST shares the channel's numbering
+            response = client.post("/api/stream/transcripts", json=frame("ingest-ws", 2, "and a fever"))
+            self.assertEqual(response.json()["saved"], 1)
+            response = client.post("/api/stream/transcripts", json=frame("ingest-ws", 2, "and a fever"))
+            self.assertTrue(response.json()["duplicate"])
+
+        self.assertEqual(
+            self.contents("ingest-ws"),
+            [("user", "I have a cough"), ("user", "since Monday"), ("user", "and a fever")]
+        )
+
+    def test_single_event_route_uses_the_event_roles(self):
+        with TestClient(main.app) as client:
+            for event_type, transcript in ((USER_EVENT, "My knee hurts"), (ASSISTANT_EVENT, "Since when?"), ("other", "x")):
+                client.post("/api/stream/transcript", json={"type": event_type, "transcript": transcript, "session_id": "ingest-one"})
+        self.assertEqual(self.contents("ingest-one"), [("user", "My knee hurts"), ("assistant", "Since when?")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from services.transcript_wal import (
+    OP_CREATE,
+    OP_TRANSCRIPT,
+    TranscriptWAL,
+    encode_json,
+    encode_transcript,
+    frame,
+)
+
+
+class TranscriptWALReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, *payloads: bytes) -> None:
+        async def run():
+            wal = TranscriptWAL(self.directory.name, sync=False)
+            await wal.start()
+            await asyncio.gather(*(wal.append(payload) for payload in payloads))
+            await wal.close()
+
+        asyncio.run(run())
+
+    def records(self):
+        return list(TranscriptWAL(self.directory.name).replay())
+
+    def test_replay_decodes_intact_records(self):
+        self.write(
+            encode_json(OP_CREATE, {"session_id": "s1"}),
+            encode_transcript("s1", 1, "user", "I have had a cough for two weeks", 42)
+        )
+        self.assertEqual(self.records(), [
+            (OP_CREATE, {"session_id": "s1"}),
+            (OP_TRANSCRIPT, ("s1", 1, "user", "I have had a cough for two weeks", 42))
+        ])
+
+    def test_torn_tail_is_truncated_and_later_appends_replay(self):
+        self.write(encode_json(OP_CREATE, {"session_id": "s1"}))
+        segment = TranscriptWAL(self.directory.name).segments()[-1]
+        intact_size = os.path.getsize(segment)
+        # A crash mid-write leaves half a frame behind
+        torn = frame(encode_transcript("s1", 1, "user", "Lost in the crash", 0))
+        with open(segment, "ab") as f:
+            f.write(torn[:len(torn) // 2])
+
+        self.assertEqual(self.records(), [(OP_CREATE, {"session_id": "s1"})])
+        self.assertEqual(os.path.getsize(segment), intact_size)
+
+        self.write(encode_transcript("s1", 2, "assistant", "Any fever?", 7))
+        self.assertEqual(self.records(), [
+            (OP_CREATE, {"session_id": "s1"}),
+            (OP_TRANSCRIPT, ("s1", 2, "assistant", "Any fever?", 7))
+        ])
+
+    def test_replay_stops_at_a_corrupt_frame(self):
+        self.write(
+            encode_json(OP_CREATE, {"session_id": "s1"}),
+            encode_transcript("s1", 1, "user", "Corrupted on disk", 0),
+            encode_transcript("s1", 2, "user", "Behind the corruption", 0)
+        )
+        segment = TranscriptWAL(self.directory.name).segments()[-1]
+        first_size = len(frame(encode_json(OP_CREATE, {"session_id": "s1"})))
+        with open(segment, "r+b") as f:
+            f.seek(first_size + 12)
+            f.write(b"\xff")
+
+        self.assertEqual(self.records(), [(OP_CREATE, {"session_id": "s1"})])
+        self.assertEqual(os.path.getsize(segment), first_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from services.conversation_store import conversation_store
+
+
+class TranscriptWebSocketResumeTest(unittest.TestCase):
+    def test_reconnect_with_since_gets_only_missed_transcripts(self):
+        with TestClient(main.app) as client:
+            for content in ("I get headaches", "mostly in the morning", "for a month now"):
+                client.portal.call(conversation_store.add_transcript, "resume-ws", "user", content)
+
+            with client.websocket_connect("/api/realtime/ws/resume-ws?since=1") as ws:
+                backlog = [ws.receive_json()["data"] for _ in range(2)]
+                self.assertEqual(
+                    [(t["seq"], t["content"]) for t in backlog],
+                    [(2, "mostly in the morning"), (3, "for a month now")]
+                )
+
+                # New transcripts follow straight on from the backlog
+                client.portal.call(conversation_store.add_transcript, "resume-ws", "assistant", "Any nausea?")
+                live = ws.receive_json()
+                self.assertEqual(live["type"], "transcript")
+                self.assertEqual((live["data"]["seq"], live["data"]["content"]), (4, "Any nausea?"))
+
+    def test_since_past_the_end_sends_no_backlog(self):
+        with TestClient(main.app) as client:
+            client.portal.call(conversation_store.add_transcript, "caught-up-ws", "user", "Already seen")
+
+            with client.websocket_connect("/api/realtime/ws/caught-up-ws?since=1") as ws:
+                client.portal.call(conversation_store.add_transcript, "caught-up-ws", "user", "Brand new")
+                self.assertEqual(ws.receive_json()["data"]["content"], "Brand new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from services.realtime_audio import PCM16_SAMPLE_RATE, pcm16_bytes
+from services.voice_activity import SilenceTrimmer
+
+
+def tone(ms: int, level_db: float = -20.0) -> bytes:
+    t = np.arange(PCM16_SAMPLE_RATE * ms // 1000) / PCM16_SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 32767 * 10 ** (level_db / 20)).astype("<i2").tobytes()
+
+
+def silence(ms: int) -> bytes:
+    return bytes(pcm16_bytes(ms))
+
+
+def run(trimmer: SilenceTrimmer, audio: bytes, chunk_ms: int = 20) -> bytes:
+    chunk = pcm16_bytes(chunk_ms)
+    return b"".join(
+        bytes(segment) for i in range(0, len(audio), chunk) for segment in trimmer.process(audio[i:i + chunk])
+    )
+
+
+class SilenceTrimmerTest(unittest.TestCase):
+    def test_silence_between_turns_is_dropped_with_padding_kept(self):
+        trimmer = SilenceTrimmer(prefix_padding_ms=300, silence_duration_ms=500, hangover_margin_ms=200)
+        audio = silence(2000) + tone(1000) + silence(3000)
+        out = run(trimmer, audio)
+
+        # 300 ms of lead-in, the speech, then 700 ms of trailing silence for the server VAD
+        self.assertEqual(out, silence(300) + tone(1000) + silence(700))
+        stats = trimmer.stats()
+        self.assertEqual(stats["segments"], 1)
+        self.assertEqual(stats["bytes_in"], len(audio))
+        self.assertEqual(stats["bytes_out"], len(out))
+
+    def test_chunk_boundaries_do_not_change_the_output(self):
+        audio = silence(1000) + tone(500) + silence(2000) + tone(700) + silence(100)
+        # 7 ms chunks split the 20 ms analysis frames
+        self.assertEqual(run(SilenceTrimmer(), audio, chunk_ms=7), run(SilenceTrimmer(), audio, chunk_ms=20))
+
+    def test_quiet_fricatives_count_as_speech(self):
+        rng = np.random.default_rng(1)
+        hiss = rng.normal(0, 32768 * 10 ** (-50 / 20), PCM16_SAMPLE_RATE // 5).astype("<i2").tobytes()
+        trimmer = SilenceTrimmer(threshold_db=-45)
+        self.assertTrue(run(trimmer, silence(1000) + hiss))
+        self.assertEqual(trimmer.stats()["segments"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,11 @@ interface AnalysisResult {
   videoAttachmentName: string
 }
 
+// Polling for a queued analysis: 1 s, growing to 5 s between attempts, about 2 minutes in all
+const POLL_INITIAL_DELAY_MS = 1000
+const POLL_MAX_DELAY_MS = 5000
+const POLL_MAX_ATTEMPTS = 30
+
 export default function ResultsPage() {
   const params = useParams()
   const router = useRouter()
@@ -41,13 +46,31 @@ export default function ResultsPage() {
   const [currentPage, setCurrentPage] = useState(1)
 
   useEffect(() => {
+    // Stops polling once the page unmounts or the session changes
+    const controller = new AbortController()
+
     const fetchAnalysis = async () => {
       try {
         console.log(`Fetching analysis for session: ${sessionId}`)
-        const response = await fetch(`http://localhost:8000/api/stream/analysis/${sessionId}`)
+        const url = `http://localhost:8000/api/stream/analysis/${sessionId}`
+        let response = await fetch(url, { signal: controller.signal })
+        // 202 means the analysis job is still pending/running; poll with backoff until it lands
+        let delay = POLL_INITIAL_DELAY_MS
+        for (let attempt = 1; response.status === 202; attempt++) {
+          if (attempt > POLL_MAX_ATTEMPTS) {
+            setError("The analysis is taking longer than expected. Please check back later.")
+            setLoading(false)
+            return
+          }
+          await new Promise((resolve) => setTimeout(resolve, delay))
+          delay = Math.min(delay * 1.5, POLL_MAX_DELAY_MS)
+          response = await fetch(url, { signal: controller.signal })
+        }
         if (!response.ok) {
           if (response.status === 404) {
             setError("Analysis not found for this session. The session may have expired.")
+          } else if (response.status === 410) {
+            setError("The analysis for this session is no longer available.")
           } else {
             setError(`Failed to load analysis: ${response.status}`)
           }
@@ -59,12 +82,14 @@ export default function ResultsPage() {
         setAnalysis(analysisData)
         setLoading(false)
       } catch (err) {
+        if (controller.signal.aborted) return
         console.error("Error fetching analysis:", err)
         setError("Failed to load analysis results")
         setLoading(false)
       }
     }
     fetchAnalysis()
+    return () => controller.abort()
   }, [sessionId])
 
   const getSeverityVariant = (severity: string) => {
@@ -4,6 +4,7 @@ import { useState, useEffect, useCallback, useRef } from 'react';
 
 interface TranscriptEntry {
   id: string;
+  seq: number;
   role: 'user' | 'assistant';
   content: string;
   timestamp: string;
@@ -22,6 +23,8 @@ export const useTranscript = (): UseTranscriptReturn => {
   const [isConnected, setIsConnected] = useState(false);
   const wsRef = useRef<WebSocket | null>(null);
   const sessionIdRef = useRef<string | null>(null);
+  // Last transcript seq received, so reconnects only fetch what was missed
+  const lastSeqRef = useRef(0);
 
   const connect = useCallback((sessionId: string) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
@@ -29,8 +32,14 @@ export const useTranscript = (): UseTranscriptReturn => {
       return;
     }
 
+    if (sessionIdRef.current !== sessionId) {
+      lastSeqRef.current = 0;
+      setTranscripts([]);
+    }
     sessionIdRef.current = sessionId;
-    const ws = new WebSocket(`ws://localhost:8000/api/realtime/ws/${sessionId}`);
+    const ws = new WebSocket(
+      `ws://localhost:8000/api/realtime/ws/${sessionId}?since=${lastSeqRef.current}`
+    );
 
     ws.onopen = () => {
       console.log('WebSocket connected for transcript streaming');
@@ -42,7 +51,20 @@ export const useTranscript = (): UseTranscriptReturn => {
         const message = JSON.parse(event.data);
         
         if (message.type === 'transcript' && message.data) {
+          if (message.data.seq <= lastSeqRef.current) {
+            return;
+          }
+          lastSeqRef.current = message.data.seq;
           setTranscripts(prev => [...prev, message.data]);
+        } else if (message.type === 'transcripts' && Array.isArray(message.data)) {
+          // One ingestion batch
+          const fresh = message.data.filter(
+            (entry: TranscriptEntry) => entry.seq > lastSeqRef.current
+          );
+          if (fresh.length > 0) {
+            lastSeqRef.current = fresh[fresh.length - 1].seq;
+            setTranscripts(prev => [...prev, ...fresh]);
+          }
         } else if (message.type === 'ping') {
           // Keep alive ping, no action needed
         }
@@ -2,6 +2,29 @@
 
 import { useState, useRef, useCallback } from 'react';
 
+const API_BASE = 'http://localhost:8000/api/stream';
+const INGEST_URL = 'ws://localhost:8000/api/stream/ingest/default';
+
+// Data channel events that carry a finished transcript (TRANSCRIPT_EVENT_ROLES on the backend)
+const TRANSCRIPT_EVENT_TYPES = new Set([
+  'conversation.item.input_audio_transcription.completed',
+  'response.audio_transcript.done',
+]);
+
+// Transcript events are sent in batches: after a short delay or once enough pile up
+const INGEST_FLUSH_MS = 250;
+const INGEST_MAX_EVENTS = 20;
+const INGEST_RECONNECT_MAX_MS = 5000;
+
+// Numbered per channel so the backend can skip a batch it already saved
+interface IngestFrame {
+  type: 'batch';
+  session_id: string;
+  channel: string;
+  batch: number;
+  events: unknown[];
+}
+
 interface UseWebRTCReturn {
   isConnected: boolean;
   localStream: MediaStream | null;
@@ -19,6 +42,125 @@ export const useWebRTC = (): UseWebRTCReturn => {
   const peerRef = useRef<RTCPeerConnection | null>(null);
   const dataChannelRef = useRef<RTCDataChannel | null>(null);
   const audioElementRef = useRef<HTMLAudioElement | null>(null);
+  const ingestRef = useRef<WebSocket | null>(null);
+  const ingestActiveRef = useRef(false);
+  const ingestChannelRef = useRef('');
+  const ingestBatchRef = useRef(0);
+  const pendingEventsRef = useRef<unknown[]>([]);
+  // Sent (or waiting to be sent) but not acked yet, oldest first
+  const unackedRef = useRef(new Map<number, IngestFrame>());
+  const flushTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const reconnectTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  const handleAck = useCallback((ack: { type?: string; batch?: number }) => {
+    if (ack.type !== 'ack' || typeof ack.batch !== 'number') return;
+    // Batches are saved in order, so an ack covers everything before it
+    for (const batch of Array.from(unackedRef.current.keys())) {
+      if (batch <= ack.batch) unackedRef.current.delete(batch);
+    }
+  }, []);
+
+  // Last resort when the channel is down at disconnect: POST the unacked batches one at a
+  // time, in order, so the backend's duplicate check never skips an unsaved batch
+  const postUnacked = useCallback(async () => {
+    for (const frame of Array.from(unackedRef.current.values())) {
+      try {
+        const response = await fetch(`${API_BASE}/transcripts`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify(frame),
+          keepalive: true,
+        });
+        if (!response.ok) throw new Error(`status ${response.status}`);
+        handleAck(await response.json());
+      } catch (error) {
+        console.error('❌ Error posting transcript batch:', error);
+        return;
+      }
+    }
+  }, [handleAck]);
+
+  const flushIngest = useCallback(() => {
+    if (flushTimerRef.current) {
+      clearTimeout(flushTimerRef.current);
+      flushTimerRef.current = null;
+    }
+    if (pendingEventsRef.current.length === 0) return;
+    const frame: IngestFrame = {
+      type: 'batch',
+      session_id: 'default',
+      channel: ingestChannelRef.current,
+      batch: ++ingestBatchRef.current,
+      events: pendingEventsRef.current,
+    };
+    pendingEventsRef.current = [];
+    unackedRef.current.set(frame.batch, frame);
+
+    // While the channel is down the batch waits; it is resent in order on reconnect
+    const ingest = ingestRef.current;
+    if (ingest && ingest.readyState === WebSocket.OPEN) {
+      ingest.send(JSON.stringify(frame));
+    }
+  }, []);
+
+  const queueTranscriptEvent = useCallback((event: unknown) => {
+    pendingEventsRef.current.push(event);
+    if (pendingEventsRef.current.length >= INGEST_MAX_EVENTS) {
+      flushIngest();
+    } else if (!flushTimerRef.current) {
+      flushTimerRef.current = setTimeout(flushIngest, INGEST_FLUSH_MS);
+    }
+  }, [flushIngest]);
+
+  const openIngest = useCallback((attempt = 0) => {
+    const ingest = new WebSocket(INGEST_URL);
+    ingestRef.current = ingest;
+    ingest.onopen = () => {
+      attempt = 0;
+      // Anything unacked may have been lost with the previous connection
+      unackedRef.current.forEach((frame) => ingest.send(JSON.stringify(frame)));
+    };
+    ingest.onmessage = (event) => {
+      try {
+        handleAck(JSON.parse(event.data));
+      } catch (error) {
+        console.error('❌ Error reading ingest ack:', error);
+      }
+    };
+    ingest.onclose = () => {
+      if (!ingestActiveRef.current || ingestRef.current !== ingest) return;
+      const delay = Math.min(1000 * 2 ** attempt, INGEST_RECONNECT_MAX_MS);
+      console.log(`🔁 Transcript ingest channel closed, reconnecting in ${delay}ms`);
+      reconnectTimerRef.current = setTimeout(() => openIngest(attempt + 1), delay);
+    };
+  }, [handleAck]);
+
+  const startIngest = useCallback(() => {
+    ingestActiveRef.current = true;
+    ingestChannelRef.current = crypto.randomUUID();
+    ingestBatchRef.current = 0;
+    pendingEventsRef.current = [];
+    unackedRef.current.clear();
+    openIngest();
+  }, [openIngest]);
+
+  const stopIngest = useCallback(() => {
+    ingestActiveRef.current = false;
+    if (reconnectTimerRef.current) {
+      clearTimeout(reconnectTimerRef.current);
+      reconnectTimerRef.current = null;
+    }
+    flushIngest();
+    const ingest = ingestRef.current;
+    ingestRef.current = null;
+    if (ingest && ingest.readyState === WebSocket.OPEN) {
+      // Batches already sent go out before the close frame
+      ingest.close();
+    } else {
+      ingest?.close();
+      postUnacked();
+    }
+  }, [flushIngest, postUnacked]);
 
   const cleanup = useCallback(() => {
     console.log('🧹 Cleaning up WebRTC resources...');
@@ -35,6 +177,9 @@ export const useWebRTC = (): UseWebRTCReturn => {
       dataChannelRef.current = null;
     }
     
+    // Send the last transcript batch and close the ingestion channel
+    stopIngest();
+    
     // Remove audio element
     if (audioElementRef.current) {
       document.body.removeChild(audioElementRef.current);
@@ -49,7 +194,7 @@ export const useWebRTC = (): UseWebRTCReturn => {
     setLocalStream(null);
     setIsConnected(false);
     setError(null);
-  }, [localStream]);
+  }, [localStream, stopIngest]);
 
   const connect = useCallback(async () => {
     try {
@@ -64,28 +209,13 @@ export const useWebRTC = (): UseWebRTCReturn => {
       setLocalStream(stream);
       console.log('✅ Media stream started');
       
-      // Step 2: Get ephemeral session from backend
-      console.log('🔑 Getting ephemeral session...');
-      const sessionResponse = await fetch('http://localhost:8000/api/stream/session', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ session_id: 'default' }),
-      });
-
-      if (!sessionResponse.ok) {
-        throw new Error(`Session creation failed: ${sessionResponse.status}`);
-      }
-
-      const sessionData = await sessionResponse.json();
-      console.log('✅ Ephemeral session created:', sessionData.openai_session_id);
-
-      // Step 3: Create RTCPeerConnection
+      // Step 2: Create RTCPeerConnection
       const pc = new RTCPeerConnection({
         iceServers: [{ urls: 'stun:stun.l.google.com:19302' }]
       });
       peerRef.current = pc;
 
-      // Step 4: Set up audio element for AI responses
+      // Step 3: Set up audio element for AI responses
       if (!audioElementRef.current) {
         audioElementRef.current = document.createElement('audio');
         audioElementRef.current.autoplay = true;
@@ -99,33 +229,30 @@ export const useWebRTC = (): UseWebRTCReturn => {
         }
       };
 
-      // Step 5: Add local audio track
+      // Step 4: Add local audio track
       const audioTrack = stream.getAudioTracks()[0];
       if (audioTrack) {
         pc.addTrack(audioTrack, stream);
         console.log('🎤 Added local audio track to peer connection');
       }
 
-      // Step 6: Set up data channel for transcript events
+      // Step 5: Set up data channel for transcript events
       const dataChannel = pc.createDataChannel('oai-events');
       dataChannelRef.current = dataChannel;
 
       dataChannel.onopen = () => console.log('📡 Data channel opened');
 
-      dataChannel.onmessage = async (event) => {
+      // Persistent channel for forwarding transcript events in batches, instead of one POST each
+      startIngest();
+
+      dataChannel.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
           console.log('📝 Received OpenAI event:', data.type);
           
           // Forward transcript events to backend
-          if (data.type === 'conversation.item.input_audio_transcription.completed' ||
-              data.type === 'response.audio_transcript.done') {
-            
-            await fetch('http://localhost:8000/api/stream/transcript', {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' },
-              body: JSON.stringify({ ...data, session_id: 'default' }),
-            });
+          if (TRANSCRIPT_EVENT_TYPES.has(data.type)) {
+            queueTranscriptEvent({ ...data, session_id: 'default' });
           }
         } catch (error) {
           console.error('❌ Error processing data channel message:', error);
@@ -136,7 +263,7 @@ export const useWebRTC = (): UseWebRTCReturn => {
         console.error('❌ Data channel error:', error);
       };
 
-      // Step 7: Handle connection state changes
+      // Step 6: Handle connection state changes
       pc.onconnectionstatechange = () => {
         console.log('🔄 Connection state:', pc.connectionState);
         if (pc.connectionState === 'connected') {
@@ -150,24 +277,26 @@ export const useWebRTC = (): UseWebRTCReturn => {
         }
       };
 
-      // Step 8: Create offer and exchange SDP
+      // Step 7: Create offer and exchange SDP
       const offer = await pc.createOffer();
       await pc.setLocalDescription(offer);
       console.log('📋 Created WebRTC offer');
 
+      // One round trip: the backend creates the session and exchanges the SDP
       console.log('📡 Sending offer to OpenAI...');
-      const webrtcResponse = await fetch('http://localhost:8000/api/stream/webrtc', {
+      const connectResponse = await fetch(`${API_BASE}/connect`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ sdp: offer.sdp, session_id: 'default' }),
       });
 
-      if (!webrtcResponse.ok) {
-        throw new Error(`WebRTC setup failed: ${webrtcResponse.status}`);
+      if (!connectResponse.ok) {
+        throw new Error(`WebRTC setup failed: ${connectResponse.status}`);
       }
 
-      const answerSdp = await webrtcResponse.text();
-      await pc.setRemoteDescription({ type: 'answer', sdp: answerSdp });
+      const connectData = await connectResponse.json();
+      console.log('✅ Ephemeral session created:', connectData.openai_session_id);
+      await pc.setRemoteDescription({ type: 'answer', sdp: connectData.sdp });
       
       console.log('✅ WebRTC connection setup complete');
 
@@ -177,7 +306,7 @@ export const useWebRTC = (): UseWebRTCReturn => {
       console.error('❌ Connection error:', err);
       cleanup();
     }
-  }, [cleanup]);
+  }, [cleanup, startIngest, queueTranscriptEvent]);
 
   const disconnect = useCallback(() => {
     console.log('🛑 Disconnecting WebRTC...');